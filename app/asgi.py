@@ -0,0 +1,144 @@
+"""An asyncio-native front end for the game, written as a plain ASGI application.
+
+The application does not depend on any web framework, so it can be served directly by an ASGI server (for example,
+`uvicorn asgi:app`) or mounted inside a Starlette or Quart application. It defines the same endpoints as main.py,
+an endpoint for executing many commands in one request, and a WebSocket for playing the whole game over one
+connection:
+ - the default route '/' serves index.html, and the route '/static/...' serves the files used by the webpage.
+ - the route '/on_load' returns the name and description of the player's starting room.
+ - the route '/execute_command' defines a POST request where the client provides a command in JSON format, in the
+   form {"input": "go north"}. The game engine processes the command and returns a list of strings.
+ - the route '/execute_batch' defines a POST request where the client provides a list of commands, in the form
+   {"inputs": ["go north", "take key"]}. The commands are executed in order, and a list containing the output of
+   each command is returned.
+ - the route '/suggest' defines a POST request where the client provides the command that the player is typing, in
+   the form {"input": "take ru"}, and is returned a list of the commands it could be completed to (see main.py).
+ - the route '/metrics' returns the server's metrics in the Prometheus text format (see main.py).
+ - the route '/ws' is a WebSocket that stays open for the whole game. When it is opened, the server sends the
+   announcement of the player's current room. After that, each text message the client sends is executed as a
+   command, and the server sends back the command's output as a JSON list of strings. In a shared world, the news
+   of what other players do near the player is also sent as a JSON list of strings as soon as it arrives, rather
+   than with the output of the player's next command, as it is over POST requests.
+
+The endpoints themselves are defined in handlers.py, which the workers of the cluster (see cluster.py) share.
+
+Everything that can block (running commands, loading and saving sessions, waiting for the journal, measuring the
+metrics and reading files) is run in a thread with asyncio.to_thread, so that one slow session never stalls the
+event loop, and with it every other connection.
+"""
+import asyncio
+import json
+from functools import partial
+
+import game_factory
+import handlers
+from handlers import BadRequest, Receive, Scope, Send
+
+sessions = game_factory.create_sessions()
+metrics = game_factory.create_metrics(sessions)
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    """The ASGI entry point."""
+    if scope['type'] == 'http':
+        await handle_http(scope, receive, send)
+    elif scope['type'] == 'websocket':
+        await handle_websocket(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await handle_lifespan(receive, send)
+
+
+async def handle_lifespan(receive: Receive, send: Send) -> None:
+    """Acknowledge the server starting up and shutting down."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def handle_http(scope: Scope, receive: Receive, send: Send) -> None:
+    """Route an HTTP request to the matching endpoint."""
+    route = (scope['method'], scope['path'])
+    if await handlers.send_webpage(scope, send):
+        return
+    elif route == ('GET', '/metrics'):
+        await handlers.send_metrics(send, await asyncio.to_thread(metrics.render))
+        return
+
+    session_id = handlers.read_session_id(scope)
+    try:
+        if route == ('GET', '/on_load'):
+            session_id, output = await asyncio.to_thread(handlers.on_load, sessions, session_id)
+        elif route == ('POST', '/execute_command'):
+            session_id, output = await asyncio.to_thread(handlers.execute_command, sessions, session_id,
+                                                         await handlers.read_json(receive))
+        elif route == ('POST', '/execute_batch'):
+            session_id, output = await asyncio.to_thread(handlers.execute_batch, sessions, session_id,
+                                                         await handlers.read_json(receive))
+        elif route == ('POST', '/suggest'):
+            session_id, output = await asyncio.to_thread(handlers.suggest, sessions, session_id,
+                                                         await handlers.read_json(receive))
+        else:
+            await handlers.send_response(send, 404, 'ERROR: NOT FOUND')
+            return
+    except BadRequest as error:
+        await handlers.send_response(send, 400, f'ERROR: BAD REQUEST ({error})')
+        return
+
+    await handlers.send_response(send, 200, output, session_id)
+
+
+async def handle_websocket(scope: Scope, receive: Receive, send: Send) -> None:
+    """Run a game over a WebSocket until the client disconnects. In a shared world, the news for the player is sent
+    by a task of its own, which the player's Occupant wakes from whichever thread made the news.
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    elif scope['path'] != '/ws':
+        await send({'type': 'websocket.close', 'code': 1008})
+        return
+
+    session_id, output = await asyncio.to_thread(handlers.on_load, sessions, handlers.read_session_id(scope))
+    await send({'type': 'websocket.accept', 'headers': [handlers.session_cookie(session_id)]})
+    await send({'type': 'websocket.send', 'text': json.dumps(output)})
+
+    news = asyncio.Event()
+    listener = partial(asyncio.get_running_loop().call_soon_threadsafe, news.set)
+    sending = asyncio.Lock()  # held while sending, as the output of commands and the news are sent by two tasks
+
+    async def send_news() -> None:
+        """Send the player their news whenever it arrives. It may already have been sent with a command's output."""
+        while True:
+            await news.wait()
+            news.clear()
+            _, lines = await asyncio.to_thread(handlers.take_news, sessions, session_id)
+            if lines:
+                async with sending:
+                    await send({'type': 'websocket.send', 'text': json.dumps(lines)})
+
+    session_id, stop = await asyncio.to_thread(handlers.listen, sessions, session_id, listener)
+    news.set()  # for any news that arrived before the player was listened to
+    sender = asyncio.create_task(send_news())
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                return
+            command = message.get('text')
+            if command is None:
+                command = (message.get('bytes') or b'').decode(errors='replace')
+
+            new_session_id, output = await asyncio.to_thread(handlers.execute_command, sessions, session_id,
+                                                             {'input': command})
+            if new_session_id != session_id:  # the session was evicted, and the player was given a new one
+                stop()
+                session_id, stop = await asyncio.to_thread(handlers.listen, sessions, new_session_id, listener)
+            async with sending:
+                await send({'type': 'websocket.send', 'text': json.dumps(output)})
+    finally:
+        stop()
+        sender.cancel()
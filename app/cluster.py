@@ -0,0 +1,413 @@
+"""Runs the game on every core of a machine, as a router in front of a number of worker processes.
+
+Each worker process runs its own copy of the engine and owns a shard of the sessions: a session is owned by worker
+crc32(session id) % number of workers. Workers create the ids of new sessions so that they always fall in their own
+shard. The router is an ASGI application (see asgi.py) that serves the webpage itself, and sends every request that
+involves a session (/on_load, /execute_command, /execute_batch, /suggest and the messages of /ws) to the worker that
+owns the session, over a pipe. Requests without a session go to the workers in turn. Each pipe is written by a
+thread of its own, so a large request (such as a long /execute_batch) never blocks the router's event loop while it
+waits for the worker to read it.
+
+The router only imports handlers.py, so it starts without loading the world. Each worker creates its sessions with
+game_factory.create_sessions, so the workers are configured by the same environment variables as a single server
+(see game_factory.py), which they inherit from the router; except that a shared world is kept in the memory of a
+single process, so GAME_SHARED_WORLD can only be used with one worker. The workers only answer requests, so in a
+shared world the news of what other players have done is sent to a player with the output of their next command,
+even over /ws (asgi.py sends it as it arrives).
+
+A request that fails in a worker is answered with an error, and the worker carries on. If a worker stops, the
+requests it was serving fail, and the router starts a new worker in its place after RESTART_DELAY seconds. The
+sessions that the worker kept in memory are lost, unless they can be restored from a journal or a session database.
+
+A session can be migrated to another worker with Cluster.migrate: the worker that owns it takes a snapshot of it
+(see engine/snapshot.py) and ends it, and the new worker restores it (see game_factory.export_session).
+Requests for the session wait until the migration is finished.
+
+The route /metrics reports the metrics of every worker that is running (see engine/metrics.py), each labelled with
+the number of its worker, worker="<number>".
+
+Usage: python cluster.py [number of workers] [port], which serves the router with uvicorn; or
+GAME_WORKERS=<number of workers> uvicorn cluster:app. Only run one router process: the workers are its children.
+The cluster is created when the server starts up rather than when this module is imported, since each worker
+imports it again to run run_worker.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import uuid
+import zlib
+from functools import partial
+from multiprocessing.connection import Connection
+from typing import Any
+
+import handlers
+from handlers import BadRequest, Receive, Scope, Send
+
+WORKERS = int(os.environ.get('GAME_WORKERS', os.cpu_count() or 1))
+# the same setting as game_factory.SHARED_WORLD, which the router reads itself so that it does not load the world
+SHARED_WORLD = os.environ.get('GAME_SHARED_WORLD', '') not in ('', '0')
+RESTART_DELAY = 1.0  # the number of seconds to wait before starting a worker in place of one that stopped
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerError(Exception):
+    """Raised when a request fails in a worker."""
+
+
+def shard_of(session_id: str, workers: int) -> int:
+    """Return the number of the worker that owns a session, unless it has been migrated."""
+    return zlib.crc32(session_id.encode()) % workers
+
+
+def shard_session_id(worker: int, workers: int) -> str:
+    """Return a new random session id that is owned by the given worker."""
+    while True:
+        session_id = uuid.uuid4().hex
+        if shard_of(session_id, workers) == worker:
+            return session_id
+
+
+class Cluster:
+    """The worker processes, and the pipes that the router uses to send requests to them.
+
+    workers: the number of worker processes.
+    moved: a dictionary of the ids of migrated sessions and the number of the worker that now owns them.
+    """
+    workers: int
+    moved: dict[str, int]
+    _processes: list[multiprocessing.Process | None]
+    _requests: list[queue.SimpleQueue | None]
+    _pending: list[dict[int, asyncio.Future]]
+    _migrations: dict[str, asyncio.Event]
+    _ids: itertools.count
+    _turn: itertools.cycle
+    _loop: asyncio.AbstractEventLoop | None
+    _stopping: bool
+
+    def __init__(self, workers: int) -> None:
+        if SHARED_WORLD and workers > 1:
+            raise ValueError('a shared world can only be served by one worker')
+        self.workers = workers
+        self.moved = {}
+        self._processes = [None] * workers
+        self._requests = [None] * workers  # the requests waiting to be written to each worker, None while it is stopped
+        self._pending = [{} for _ in range(workers)]  # the ids and futures of the requests waiting for a response
+        self._migrations = {}  # the ids of sessions being migrated, and events that are set once they are done
+        self._ids = itertools.count()
+        self._turn = itertools.cycle(range(workers))
+        self._loop = None
+        self._stopping = False
+
+    def start(self) -> None:
+        """Start the worker processes.
+
+        Preconditions:
+         - this is called from the event loop that the router runs in
+        """
+        self._loop = asyncio.get_running_loop()
+        for worker in range(self.workers):
+            self._start_worker(worker)
+
+    def stop(self) -> None:
+        """Stop the worker processes."""
+        self._stopping = True
+        for requests in self._requests:
+            if requests is not None:
+                requests.put(None)
+        for process in self._processes:
+            if process is not None:
+                process.join()
+
+    def owner(self, session_id: str | None) -> int:
+        """Return the number of the worker that owns a session, or the next worker in turn if there is no session."""
+        if session_id is None:
+            return next(self._turn)
+        return self.moved.get(session_id, shard_of(session_id, self.workers))
+
+    async def call(self, name: str, session_id: str | None, *args: Any) -> Any:
+        """Run one of the functions served by the workers (see run_worker) for a session, on the worker that owns
+        the session, and return its result.
+        """
+        if session_id in self._migrations:
+            await self._migrations[session_id].wait()
+        return await self._call(self.owner(session_id), name, session_id, *args)
+
+    async def metrics(self) -> str:
+        """Return the metrics of every worker that is running in the Prometheus text format, with the number of the
+        worker that each sample came from as its worker label.
+        """
+        from engine.metrics import combine
+
+        rendered = await asyncio.gather(*(self._call(worker, 'metrics') for worker in range(self.workers)),
+                                        return_exceptions=True)
+        return combine({str(worker): text for worker, text in enumerate(rendered) if isinstance(text, str)}, 'worker')
+
+    async def migrate(self, session_id: str, worker: int) -> bool:
+        """Move a session to another worker. Return whether the session existed."""
+        if session_id in self._migrations:
+            await self._migrations[session_id].wait()
+        owner = self.owner(session_id)
+        if owner == worker:
+            return True
+
+        self._migrations[session_id] = done = asyncio.Event()
+        try:
+            snapshot = await self._call(owner, 'export', session_id)
+            if snapshot is None:
+                return False
+            await self._call(worker, 'import', session_id, snapshot)
+            if worker == shard_of(session_id, self.workers):
+                self.moved.pop(session_id, None)
+            else:
+                self.moved[session_id] = worker
+            return True
+        finally:
+            del self._migrations[session_id]
+            done.set()
+
+    async def _call(self, worker: int, name: str, *args: Any) -> Any:
+        """Send a request to a worker and wait for its response. Raise ConnectionError if the worker is stopped, or
+        stops before it responds.
+        """
+        requests = self._requests[worker]
+        if requests is None:
+            raise ConnectionError(f'game worker {worker} is restarting')
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[worker][request_id] = future
+        requests.put((request_id, name, args))  # if the worker has stopped, the future fails once that is noticed
+        status, result = await future
+        if status == 'bad request':
+            raise BadRequest(result)
+        elif status == 'error':
+            raise WorkerError(result)
+        return result
+
+    def _start_worker(self, worker: int) -> None:
+        """Start a worker process, a thread that sends it requests, and a thread that receives its responses."""
+        context = multiprocessing.get_context('spawn')
+        worker_requests, pipe = context.Pipe(duplex=False)
+        responses, worker_responses = context.Pipe(duplex=False)
+        process = context.Process(target=run_worker, args=(worker, self.workers, worker_requests, worker_responses),
+                                  name=f'game-worker-{worker}', daemon=True)
+        process.start()
+        worker_requests.close()
+        worker_responses.close()
+        self._processes[worker] = process
+        self._requests[worker] = requests = queue.SimpleQueue()
+        self._pending[worker] = pending = {}
+        threading.Thread(target=_send, args=(pipe, requests), daemon=True).start()
+        threading.Thread(target=self._receive, args=(worker, responses, pending), daemon=True).start()
+
+    def _receive(self, worker: int, responses: Connection, pending: dict[int, asyncio.Future]) -> None:
+        """Pass the responses from a worker to the requests waiting for them, until the worker stops."""
+        while True:
+            try:
+                request_id, response = responses.recv()
+            except (EOFError, OSError):
+                break
+            future = pending.pop(request_id)
+            future.get_loop().call_soon_threadsafe(_resolve, future, response)
+
+        try:
+            self._loop.call_soon_threadsafe(self._stopped, worker, pending)
+        except RuntimeError:  # the event loop has already been closed
+            pass
+
+    def _stopped(self, worker: int, pending: dict[int, asyncio.Future]) -> None:
+        """Fail the requests that a worker that has stopped was serving, and start a new worker in its place after
+        RESTART_DELAY seconds, unless the cluster is stopping.
+        """
+        self._requests[worker].put(None)  # ends the thread that sends it requests
+        self._requests[worker] = None
+        error = ConnectionError(f'game worker {worker} stopped')
+        for future in list(pending.values()):
+            _resolve(future, None, error)
+        pending.clear()
+        if not self._stopping:
+            logger.error('game worker %d stopped; starting a new one in %s seconds', worker, RESTART_DELAY)
+            self._loop.call_later(RESTART_DELAY, self._restart, worker)
+
+    def _restart(self, worker: int) -> None:
+        """Start a new worker in place of one that has stopped, unless the cluster is stopping."""
+        if not self._stopping:
+            self._processes[worker].join()
+            self._start_worker(worker)
+
+
+def _send(pipe: Connection, requests: queue.SimpleQueue) -> None:
+    """Write requests to the pipe of a worker, until the request None, which tells the worker to stop, has been
+    written or the worker has stopped; then close the pipe. Writing blocks while the pipe is full, so it is done on
+    this thread rather than on the event loop.
+    """
+    try:
+        while True:
+            request = requests.get()
+            pipe.send(request)
+            if request is None:
+                break
+    except OSError:  # the worker has stopped
+        pass
+    finally:
+        pipe.close()
+
+
+def _resolve(future: asyncio.Future, response: tuple[str, Any] | None, error: Exception | None = None) -> None:
+    """Complete a request with a worker's response, or with an error if the worker stopped."""
+    if future.done():
+        return
+    elif error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(response)
+
+
+cluster: Cluster | None = None  # created when the server starts up, so that importing this module starts nothing
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    """The ASGI entry point of the router."""
+    if scope['type'] == 'http':
+        await handle_http(scope, receive, send)
+    elif scope['type'] == 'websocket':
+        await handle_websocket(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await handle_lifespan(receive, send)
+
+
+async def handle_lifespan(receive: Receive, send: Send) -> None:
+    """Create the cluster, unless it was already created, and start the workers when the server starts up; and stop
+    the workers when it shuts down. The cluster has GAME_WORKERS workers if it is created here.
+    """
+    global cluster
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                if cluster is None:
+                    cluster = Cluster(WORKERS)
+            except ValueError as error:
+                await send({'type': 'lifespan.startup.failed', 'message': str(error)})
+                return
+            cluster.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            cluster.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def handle_http(scope: Scope, receive: Receive, send: Send) -> None:
+    """Serve the webpage, or send a request to the worker that owns its session."""
+    route = (scope['method'], scope['path'])
+    if await handlers.send_webpage(scope, send):
+        return
+    elif route == ('GET', '/metrics'):
+        await handlers.send_metrics(send, await cluster.metrics())
+        return
+
+    session_id = handlers.read_session_id(scope)
+    try:
+        if route == ('GET', '/on_load'):
+            session_id, output = await cluster.call('on_load', session_id)
+        elif route == ('POST', '/execute_command'):
+            session_id, output = await cluster.call('execute_command', session_id, await handlers.read_json(receive))
+        elif route == ('POST', '/execute_batch'):
+            session_id, output = await cluster.call('execute_batch', session_id, await handlers.read_json(receive))
+        elif route == ('POST', '/suggest'):
+            session_id, output = await cluster.call('suggest', session_id, await handlers.read_json(receive))
+        else:
+            await handlers.send_response(send, 404, 'ERROR: NOT FOUND')
+            return
+    except BadRequest as error:
+        await handlers.send_response(send, 400, f'ERROR: BAD REQUEST ({error})')
+        return
+    except WorkerError:
+        await handlers.send_response(send, 500, 'ERROR: INTERNAL SERVER ERROR')
+        return
+    except ConnectionError:
+        await handlers.send_response(send, 503, 'ERROR: SERVICE UNAVAILABLE')
+        return
+
+    await handlers.send_response(send, 200, output, session_id)
+
+
+async def handle_websocket(scope: Scope, receive: Receive, send: Send) -> None:
+    """Run a game over a WebSocket, sending each message to the worker that owns the session. The WebSocket is
+    closed if a message fails in its worker.
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    elif scope['path'] != '/ws':
+        await send({'type': 'websocket.close', 'code': 1008})
+        return
+
+    try:
+        session_id, output = await cluster.call('on_load', handlers.read_session_id(scope))
+    except (WorkerError, ConnectionError):
+        await send({'type': 'websocket.close', 'code': 1011})
+        return
+    await send({'type': 'websocket.accept', 'headers': [handlers.session_cookie(session_id)]})
+    await send({'type': 'websocket.send', 'text': json.dumps(output)})
+
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            return
+        command = message.get('text')
+        if command is None:
+            command = (message.get('bytes') or b'').decode(errors='replace')
+
+        try:
+            session_id, output = await cluster.call('execute_command', session_id, {'input': command})
+        except (WorkerError, ConnectionError):
+            await send({'type': 'websocket.close', 'code': 1011})
+            return
+        await send({'type': 'websocket.send', 'text': json.dumps(output)})
+
+
+def run_worker(worker: int, workers: int, requests: Connection, responses: Connection) -> None:
+    """Serve the requests sent to a worker by the router, one at a time, until the router sends None. A request
+    that fails is answered with its error, which is also logged.
+    """
+    import game_factory
+
+    # this process only serves its own shard, so new sessions are given ids in the shard
+    sessions = game_factory.create_sessions(new_id=lambda: shard_session_id(worker, workers))
+    metrics = game_factory.create_metrics(sessions)
+    functions = {'on_load': partial(handlers.on_load, sessions),
+                 'execute_command': partial(handlers.execute_command, sessions),
+                 'execute_batch': partial(handlers.execute_batch, sessions),
+                 'suggest': partial(handlers.suggest, sessions),
+                 'export': partial(game_factory.export_session, sessions),
+                 'import': partial(game_factory.import_session, sessions),
+                 'metrics': metrics.render}
+
+    while True:
+        request = requests.recv()
+        if request is None:
+            break
+        request_id, name, args = request
+        try:
+            response = ('ok', functions[name](*args))
+        except BadRequest as error:
+            response = ('bad request', str(error))
+        except Exception as error:
+            logger.exception('request %r failed in game worker %d', name, worker)
+            response = ('error', f'{type(error).__name__}: {error}')
+        responses.send((request_id, response))
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    cluster = Cluster(int(sys.argv[1]) if len(sys.argv) > 1 else WORKERS)
+    uvicorn.run(app, port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
@@ -1,13 +1,256 @@
-"""Factory that initialises the game engine."""
+"""Factory that initialises the game engine.
+
+The modules that are only used by some configurations of the server (journals, the session database and regions) are
+imported by the functions that use them, so that a server that does not use them starts without importing them.
+"""
+import os
+import sys
+from functools import cache, partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from data.loader import load_world
 from engine.controller import Controller
 from engine.gameinteractor import GameInteractor
+from engine.metrics import Metrics, instrument
+from engine.navigation import RoomGraph
+from engine.parser import Parser
+from engine.session_manager import SessionManager, deep_sizeof
+from engine.snapshot import Snapshot, restore_snapshot, take_snapshot
 from entities.player import Player
-import data.test_data as data
+from entities.world import World
+
+if TYPE_CHECKING:
+    from data.regions import RegionMap
+    from engine.journal import Journal
+    from engine.session_store import StoredSessions
+    from engine.shared_world import SharedWorld
+
+WORLD_FILE = Path(os.environ.get('GAME_WORLD_FILE', Path(__file__).parent.parent / 'data' / 'test_world.jsonl'))
+# if set, the world, its map and its parser are loaded from the world image at this path (see data/world_image.py)
+# instead of being built from WORLD_FILE, which is much faster for large worlds. The image is rebuilt from WORLD_FILE
+# if it is missing or out of date; run this module to build it in advance, for example when deploying.
+WORLD_IMAGE = os.environ.get('GAME_WORLD_IMAGE')
+
+# if set, games are recorded in this directory, so that they survive a restart of the server
+JOURNAL_DIR = os.environ.get('GAME_JOURNAL_DIR')
+# if set, no games are kept in memory: they are loaded from and saved to this SQLite database for every command, so
+# that any number of server processes can share them
+SESSION_DB = os.environ.get('GAME_SESSION_DB')
+# if set, the duration of every command is measured and reported by the /metrics endpoint
+METRICS_ENABLED = os.environ.get('GAME_METRICS', '') not in ('', '0')
+# if set, every player plays in a single shared world, where they see each other and each other's changes (see
+# engine/shared_world.py). A shared world is only kept in the memory of a single server process, so this takes
+# precedence over SESSION_DB and JOURNAL_DIR.
+SHARED_WORLD = os.environ.get('GAME_SHARED_WORLD', '') not in ('', '0')
+# if set, the world is loaded from this directory of regions (see data/regions.py), which are loaded as players enter
+# them and evicted when nobody is in them, instead of from WORLD_FILE. The whole world is then never in memory, so
+# this takes precedence over SHARED_WORLD, SESSION_DB and JOURNAL_DIR, which need it.
+REGIONS_DIR = os.environ.get('GAME_REGIONS_DIR')
+# how often, in seconds, the sessions in memory that have been idle for too long are evicted
+SWEEP_INTERVAL = 60.0
+
+
+def compile_world(world: World) -> dict[str, Any]:
+    """Return the structures compiled from the world template that are shared by every game."""
+    return {'graph': RoomGraph(world.rooms.values()), 'parser': Parser(world.items.values())}
+
+
+# the world template, its map and the parser of its vocabulary are loaded once when this module is imported, and are
+# shared by every game. A world split into regions has no map, and the names of the items in each region are added
+# to the parser as the region is loaded.
+if REGIONS_DIR is not None:
+    WORLD = None
+    _compiled = {'graph': None, 'parser': Parser()}
+elif WORLD_IMAGE is None:
+    WORLD = load_world(WORLD_FILE)
+    _compiled = compile_world(WORLD)
+else:
+    from data.world_image import load_world_fast
+    WORLD, _compiled = load_world_fast(WORLD_FILE, WORLD_IMAGE, compile_world, build=True)
+GRAPH: RoomGraph | None = _compiled['graph']
+PARSER: Parser = _compiled['parser']
+
+
+def initialise(session_id: str | None = None) -> Controller:
+    """Initialise the engine with a new player in the shared world."""
+    player = Player(WORLD.start)
+    interactor = GameInteractor(player, graph=GRAPH)
+
+    return Controller(interactor, PARSER)
+
+
+@cache
+def shared_world() -> 'SharedWorld':
+    """Return the world shared by every player, which is created when the first player joins it."""
+    from engine.shared_world import SharedWorld
+    return SharedWorld(WORLD)
+
+
+def initialise_shared(session_id: str) -> Controller:
+    """Initialise the engine with a new player in the world shared by every player."""
+    from engine.shared_world import Occupant
+
+    shared = shared_world()
+    player = Player(WORLD.start, shared.view())
+    interactor = GameInteractor(player, graph=GRAPH, shared=shared, occupant=Occupant(f'Adventurer {session_id[:4]}'))
+
+    return Controller(interactor, PARSER)
+
+
+@cache
+def journal() -> 'Journal':
+    """Return the journal in JOURNAL_DIR that games are recorded in, which is opened when it is first used."""
+    from engine.journal import Journal
+    return Journal(JOURNAL_DIR)
+
+
+def initialise_journaled(session_id: str, journal: 'Journal') -> Controller:
+    """Initialise the engine with a new player in the shared world, whose progress is recorded in a journal."""
+    from engine.journal import SessionJournal
+
+    player = Player(WORLD.start)
+    interactor = GameInteractor(player, graph=GRAPH, journal=SessionJournal(journal, session_id))
+
+    return Controller(interactor, PARSER)
+
+
+def restore(session_id: str, journal: 'Journal') -> Controller | None:
+    """Restore a game that was recorded in a journal, by loading its latest snapshot and replaying the events
+    after it. Return None if the journal has no record of the session.
+    """
+    from engine.journal import SessionJournal, replay
+
+    saved = journal.load(session_id)
+    if saved is None:
+        return None
+    snapshot, seq, events = saved
+
+    player = Player(WORLD.start) if snapshot is None else restore_snapshot(snapshot, WORLD)
+    interactor = GameInteractor(player, graph=GRAPH)
+    replay(interactor, events)
+    seq = events[-1]['seq'] if events else seq
+    interactor.journal = SessionJournal(journal, session_id, seq=seq, since_snapshot=len(events))
+
+    return Controller(interactor, PARSER)
+
+
+@cache
+def region_map() -> 'RegionMap':
+    """Return the regions of the world in REGIONS_DIR, whose items are added to the parser as they are loaded."""
+    from data.regions import RegionMap
+    return RegionMap(REGIONS_DIR, on_load=lambda region: PARSER.add_items(region.items.values()))
+
+
+def initialise_in_regions(session_id: str, regions: 'RegionMap') -> Controller:
+    """Initialise the engine with a new player in a world that is split into regions, which are loaded as players
+    move into them.
+    """
+    player = Player(regions.start)
+    interactor = GameInteractor(player, regions)
+
+    return Controller(interactor, PARSER)
+
+
+def from_snapshot(snapshot: Snapshot) -> Controller:
+    """Initialise the engine with a player whose progress is restored from a snapshot."""
+    player = restore_snapshot(snapshot, WORLD)
+    interactor = GameInteractor(player, graph=GRAPH)
+
+    return Controller(interactor, PARSER)
+
+
+def snapshot(controller: Controller) -> Snapshot:
+    """Return a snapshot of the progress of the player in a game created by this module."""
+    return take_snapshot(controller.interactor.player)
+
+
+def close(controller: Controller) -> None:
+    """End the game run by a Controller created by this module."""
+    controller.interactor.close()
+
+
+def create_sessions(new_id: Callable[[], str] | None = None) -> 'SessionManager | StoredSessions':
+    """Return the sessions used by the web server. If SESSION_DB is set, sessions are kept in that database
+    instead of in memory. Otherwise, if JOURNAL_DIR is set, every game is recorded in a journal in that directory, and
+    restored from it when it is not in the pool. If SHARED_WORLD is set, every game is played in the shared world,
+    and if REGIONS_DIR is set, in the regions of the world in that directory. Sessions kept in memory are swept for
+    idle sessions every SWEEP_INTERVAL seconds.
+
+    new_id is the function that gives new sessions kept in memory their ids, if they need ids of a particular form,
+    as the workers of the cluster do (see cluster.py).
+    """
+    options = {} if new_id is None else {'new_id': new_id}
+    if REGIONS_DIR is not None:
+        sessions = SessionManager(partial(initialise_in_regions, regions=region_map()), on_close=close, **options)
+    elif SHARED_WORLD:
+        sessions = SessionManager(initialise_shared, on_close=close, **options)
+    elif SESSION_DB is not None:
+        from engine.session_store import SQLiteSessionStore, StoredSessions
+        return StoredSessions(SQLiteSessionStore(SESSION_DB), initialise, from_snapshot, snapshot)
+    elif JOURNAL_DIR is None:
+        sessions = SessionManager(initialise, on_close=close, **options)
+    else:
+        sessions = SessionManager(partial(initialise_journaled, journal=journal()), on_close=close,
+                                  restore=partial(restore, journal=journal()), **options)
+    sessions.sweep(SWEEP_INTERVAL)
+    return sessions
+
+
+def export_session(sessions: 'SessionManager | StoredSessions', session_id: str) -> Snapshot | None:
+    """End a session in this process so that another process can take it over with import_session, and return a
+    snapshot of it; or None if the session is not in memory. Sessions kept in SESSION_DB are shared by every
+    process, so they are left in the database, and their snapshot is only returned. Sessions in a shared world or in
+    a world split into regions cannot be moved.
+    """
+    if not isinstance(sessions, SessionManager):
+        return sessions.store.load(session_id)
+    elif SHARED_WORLD or REGIONS_DIR is not None:
+        raise ValueError('sessions in a shared world or a world split into regions cannot be moved')
+    elif session_id not in sessions:
+        return None
+
+    with sessions.session(session_id) as session:
+        saved = snapshot(session.controller)
+    sessions.remove(session_id)
+    if JOURNAL_DIR is not None:
+        journal().flush()  # the session is closed, so everything it recorded is written for the other process
+    return saved
+
+
+def import_session(sessions: 'SessionManager | StoredSessions', session_id: str, saved: Snapshot) -> None:
+    """Take over a session that another process has ended with export_session. A journaled session is restored
+    from its journal, so that it carries on being recorded, and any other session from its snapshot.
+    """
+    if not isinstance(sessions, SessionManager):
+        return
+    controller = restore(session_id, journal()) if JOURNAL_DIR is not None else None
+    sessions.add(session_id, controller if controller is not None else from_snapshot(saved))
+
+
+def create_metrics(sessions: 'SessionManager | StoredSessions') -> Metrics:
+    """Return the metrics reported by the web server, instrumenting the engine if METRICS_ENABLED is set."""
+    metrics = Metrics()
+    if METRICS_ENABLED:
+        instrument(metrics)
 
+    # the world template never changes while the server is running, and measuring a large one takes a while, so it is
+    # measured once, when the metrics are first read rather than when the server starts
+    if WORLD is not None:
+        metrics.gauge('game_world_template_bytes', 'The estimated memory used by the shared world template.',
+                      cache(lambda: deep_sizeof(WORLD)))
+    else:
+        metrics.gauge('game_loaded_regions', 'The number of regions of the world in memory.', lambda: len(region_map()))
+    if isinstance(sessions, SessionManager):
+        metrics.gauge('game_active_sessions', 'The number of sessions in memory.', lambda: len(sessions))
+        metrics.gauge('game_session_memory_bytes', 'The estimated memory used by the sessions in memory.',
+                      lambda: sessions.memory)
+    return metrics
 
-def initialise() -> Controller:
-    """Initialise the engine."""
-    player = Player(data.TEST_ROOM1)
-    interactor = GameInteractor(player)
 
-    return Controller(interactor)
+if __name__ == '__main__':
+    if WORLD_IMAGE is None or REGIONS_DIR is not None:
+        sys.exit('Set GAME_WORLD_IMAGE (and not GAME_REGIONS_DIR) to the path of the world image to build.')
+    from data.world_image import file_hash, save_image
+    save_image(WORLD, WORLD_IMAGE, file_hash(WORLD_FILE), _compiled)
+    print(f'Saved the image of {WORLD_FILE} to {WORLD_IMAGE}')
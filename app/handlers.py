@@ -0,0 +1,174 @@
+"""The endpoints of the game that are shared by the ASGI application (see asgi.py) and the workers of the cluster (see
+cluster.py), and the helpers that both use to speak ASGI.
+
+This module does not import game_factory, so that the router of the cluster, which only passes requests on to its
+workers, starts without loading the world. The endpoints are given the sessions to run the game in (see
+game_factory.create_sessions), and return the id of the session that they used, which is new if the client had no
+session or its session could not be restored, with their output.
+"""
+import asyncio
+import html
+import json
+from http.cookies import SimpleCookie
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+if TYPE_CHECKING:
+    from engine.session_manager import SessionManager
+    from engine.session_store import StoredSessions
+
+SESSION_COOKIE = 'session_id'
+MAX_BATCH_SIZE = 1000
+MAX_BODY_SIZE = 1 << 20
+TEMPLATES_DIR = Path(__file__).parent / 'templates'
+STATIC_DIR = Path(__file__).parent / 'static'
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+Sessions = 'SessionManager | StoredSessions'
+
+
+class BadRequest(Exception):
+    """Raised when the client sends a request that cannot be processed."""
+
+
+def on_load(sessions: Sessions, session_id: str | None) -> tuple[str, list[str]]:
+    """Return the announcement of the player's current room."""
+    with sessions.session(session_id) as session:
+        return session.session_id, session.controller.announce_room()
+
+
+def execute_command(sessions: Sessions, session_id: str | None, body: Any) -> tuple[str, list[str]]:
+    """Execute a single command and return its output."""
+    if not isinstance(body, dict) or not isinstance(body.get('input'), str):
+        raise BadRequest('expected {"input": <command>}')
+
+    with sessions.session(session_id) as session:
+        return session.session_id, session.controller.parse_input(html.escape(body['input']))
+
+
+def execute_batch(sessions: Sessions, session_id: str | None, body: Any) -> tuple[str, list[list[str]]]:
+    """Execute a list of commands in order and return the output of each command."""
+    if not isinstance(body, dict) or not isinstance(body.get('inputs'), list) \
+            or not all(isinstance(command, str) for command in body['inputs']):
+        raise BadRequest('expected {"inputs": [<command>, ...]}')
+    elif len(body['inputs']) > MAX_BATCH_SIZE:
+        raise BadRequest(f'at most {MAX_BATCH_SIZE} commands can be sent at once')
+
+    with sessions.session(session_id) as session:
+        parse_input = session.controller.parse_input
+        return session.session_id, [parse_input(html.escape(command)) for command in body['inputs']]
+
+
+def suggest(sessions: Sessions, session_id: str | None, body: Any) -> tuple[str, list[str]]:
+    """Return the suggested completions of the command that the player is typing. The suggestions are not
+    escaped, as the webpage only ever shows them as the text of the command being typed.
+    """
+    if not isinstance(body, dict) or not isinstance(body.get('input'), str):
+        raise BadRequest('expected {"input": <partial command>}')
+
+    with sessions.session(session_id) as session:
+        return session.session_id, session.controller.suggest(body['input'])
+
+
+def listen(sessions: Sessions, session_id: str | None, listener: Callable[[], None]) -> tuple[str, Callable[[], None]]:
+    """In a shared world, call listener whenever news of what other players have done arrives for the player, from
+    whichever thread made the news. Return a function that stops calling it (see GameInteractor.listen).
+    """
+    with sessions.session(session_id) as session:
+        return session.session_id, session.controller.listen(listener)
+
+
+def take_news(sessions: Sessions, session_id: str | None) -> tuple[str, list[str]]:
+    """Return the news of what other players have done that is waiting for the player, and clear it."""
+    with sessions.session(session_id) as session:
+        return session.session_id, session.controller.news()
+
+
+def read_session_id(scope: Scope) -> str | None:
+    """Return the session id stored in the request's cookies, or None if there is none."""
+    for name, value in scope['headers']:
+        if name == b'cookie':
+            cookie = SimpleCookie(value.decode('latin-1'))
+            if SESSION_COOKIE in cookie:
+                return cookie[SESSION_COOKIE].value
+    return None
+
+
+async def read_json(receive: Receive) -> Any:
+    """Read the whole body of the request and decode it as JSON."""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise BadRequest('client disconnected')
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_SIZE:
+            raise BadRequest('request body is too large')
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            break
+
+    try:
+        return json.loads(b''.join(chunks))
+    except ValueError:
+        raise BadRequest('request body is not valid JSON')
+
+
+async def send_response(send: Send, status: int, content: Any, session_id: str | None = None) -> None:
+    """Send content to the client as a JSON response."""
+    body = json.dumps(content).encode()
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    if session_id is not None:
+        headers.append(session_cookie(session_id))
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_metrics(send: Send, metrics: str) -> None:
+    """Send metrics to the client in the Prometheus text format."""
+    body = metrics.encode()
+    headers = [(b'content-type', b'text/plain; version=0.0.4'), (b'content-length', str(len(body)).encode())]
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_file(send: Send, path: Path) -> None:
+    """Send the contents of a file to the client. Only files inside the templates and static directories are
+    served.
+    """
+    path = path.resolve()
+    if not (path.is_relative_to(TEMPLATES_DIR.resolve()) or path.is_relative_to(STATIC_DIR.resolve())) \
+            or not path.is_file():
+        await send_response(send, 404, 'ERROR: NOT FOUND')
+        return
+
+    import mimetypes  # only the webpage needs it, so it is imported when the webpage is first served
+
+    body = await asyncio.to_thread(path.read_bytes)
+    content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+    headers = [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode())]
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_webpage(scope: Scope, send: Send) -> bool:
+    """Serve the webpage if the request is for index.html or one of its static files, and return whether it was."""
+    if scope['method'] != 'GET':
+        return False
+    elif scope['path'] == '/':
+        await send_file(send, TEMPLATES_DIR / 'index.html')
+    elif scope['path'].startswith('/static/'):
+        await send_file(send, STATIC_DIR / scope['path'].removeprefix('/static/'))
+    else:
+        return False
+    return True
+
+
+def session_cookie(session_id: str) -> tuple[bytes, bytes]:
+    """Return the header that stores the session id in the client's cookies."""
+    return b'set-cookie', f'{SESSION_COOKIE}={session_id}; HttpOnly; SameSite=Strict; Path=/'.encode()
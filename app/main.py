@@ -5,14 +5,27 @@ are two defined endpoints:
  - the default route '/' loads the webpage through rendering index.html.
  - the route '/execute_command' defines a POST request where the webpage provides a command in JSON format.
    The game engine processes the command and returns a string.
+ - the route '/suggest' defines a POST request where the webpage provides the command that the player is typing, in
+   the same format, and is returned a list of the commands it could be completed to (or, if there are none, the
+   commands it may be a misspelling of). The webpage calls it on every keypress.
+ - the route '/metrics' returns the server's metrics in the Prometheus text format. The latency of each command is
+   only measured if the environment variable GAME_METRICS is set.
+
+Every client plays its own game: the id of the client's session is stored in a cookie, and the SessionManager gives
+each session its own controller. If the environment variable GAME_SESSION_DB is set, sessions are kept in that
+SQLite database instead of in memory (see game_factory.create_sessions), so the app can be run as any number of
+stateless worker processes, for example with `gunicorn -w 8 main:app`.
 """
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from markupsafe import escape
 
 import game_factory
 
+SESSION_COOKIE = 'session_id'
+
 app = Flask(import_name=__name__)
-controller = game_factory.initialise()
+sessions = game_factory.create_sessions()
+metrics = game_factory.create_metrics(sessions)
 
 
 @app.route('/')
@@ -24,7 +37,10 @@ def index():
 @app.route('/on_load', methods=['GET'])
 def on_load():
     """Render API text on page load."""
-    return jsonify(controller.announce_room())
+    with sessions.session(request.cookies.get(SESSION_COOKIE)) as session:
+        response = jsonify(session.controller.announce_room())
+    response.set_cookie(SESSION_COOKIE, session.session_id, httponly=True, samesite='Strict')
+    return response
 
 
 @app.route('/execute_command', methods=['POST'])
@@ -32,10 +48,28 @@ def execute_command():
     """Process and attempt to execute the given command via the GameInteractor"""
     if request.method == 'POST':
         command = escape(request.get_json()['input'])
-        return jsonify(controller.parse_input(command))
+        with sessions.session(request.cookies.get(SESSION_COOKIE)) as session:
+            response = jsonify(session.controller.parse_input(command))
+        response.set_cookie(SESSION_COOKIE, session.session_id, httponly=True, samesite='Strict')
+        return response
     else:
         return "ERROR: BAD REQUEST"
 
 
+@app.route('/suggest', methods=['POST'])
+def suggest():
+    """Return the suggested completions of the command that the player is typing."""
+    with sessions.session(request.cookies.get(SESSION_COOKIE)) as session:
+        response = jsonify(session.controller.suggest(request.get_json()['input']))
+    response.set_cookie(SESSION_COOKIE, session.session_id, httponly=True, samesite='Strict')
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Return the server's metrics in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == "__main__":
     app.run()
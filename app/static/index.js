@@ -1,9 +1,20 @@
 const form = document.getElementById("form");
 const command = document.getElementById("command");
+const suggestions = document.getElementById("suggestions");
+
+// the number of the latest request for suggestions, so that the responses to earlier requests can be ignored
+let suggestionRequest = 0;
+
+// the game is played over a WebSocket when the server supports it, and over POST requests otherwise
+let socket = null;
 
 document.addEventListener('DOMContentLoaded', function() {
-    getStartingInfo("/on_load").then(commands => {
-        commands.forEach((command) => {addElement(command)});
+    openSocket('/ws').then(ws => {
+        socket = ws;
+    }).catch(() => {
+        getStartingInfo("/on_load").then(commands => {
+            commands.forEach((command) => {addElement(command)});
+        });
     });
 });
 
@@ -14,8 +25,14 @@ form.addEventListener("submit", function (e) {
     const userInput = command.value
     addElement(userInput);
     form.reset();
+    suggestionRequest++;
+    showSuggestions([]);
 
     // execute game command
+    if (socket !== null && socket.readyState === WebSocket.OPEN) {
+        socket.send(userInput);
+        return;
+    }
     executeCommand(userInput, '/execute_command').then(r => {
         const commands = eval(r)
 
@@ -25,6 +42,54 @@ form.addEventListener("submit", function (e) {
     });
 })
 
+// suggest how to complete the command on every keypress, and complete it with the first suggestion on tab
+command.addEventListener("input", function () {
+    const request = ++suggestionRequest;
+    if (command.value.trim() === '') {
+        showSuggestions([]);
+        return;
+    }
+    getSuggestions(command.value, '/suggest').then(options => {
+        if (request === suggestionRequest) {
+            showSuggestions(options);
+        }
+    });
+})
+
+command.addEventListener("keydown", function (e) {
+    if (e.key === 'Tab' && suggestions.options.length > 0) {
+        e.preventDefault();
+        command.value = suggestions.options[0].value;
+        command.dispatchEvent(new Event('input'));
+    }
+})
+
+function showSuggestions(options) {
+    // the suggestions are only ever used as the values of options, so they are never interpreted as HTML
+    suggestions.replaceChildren(...options.map(option => {
+        const element = document.createElement('option');
+        element.value = option;
+        return element;
+    }));
+}
+
+function openSocket(path) {
+    const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    const ws = new WebSocket(`${protocol}//${window.location.host}${path}`);
+
+    // every message from the server is a list of lines to display, including the room announcement that is
+    // pushed as soon as the connection opens
+    ws.addEventListener('message', (event) => {
+        for (const line of JSON.parse(event.data)) {
+            addElement(line);
+        }
+    });
+    return new Promise((resolve, reject) => {
+        ws.addEventListener('open', () => resolve(ws));
+        ws.addEventListener('error', () => reject(ws));
+    });
+}
+
 async function getStartingInfo(url) {
     const requestOptions = {
         method: 'GET',
@@ -55,6 +120,22 @@ async function executeCommand(userInput, url) {
     }
 }
 
+async function getSuggestions(userInput, url) {
+    // suggestions are only a convenience, so a failed request shows none rather than an error
+    const requestOptions = {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({input: userInput})
+    };
+    try {
+        const response = await fetch(url, requestOptions);
+        const options = await response.json();
+        return Array.isArray(options) ? options : [];
+    } catch (e) {
+        return [];
+    }
+}
+
 function addElement(text) {
     const output = document.getElementById('outputs');
 
@@ -0,0 +1,47 @@
+"""Microbenchmark of parsing and dispatching a command with Controller.parse_input.
+
+The parser's vocabulary is padded with generated verbs and item names to show that the cost of a command does not
+depend on how many verbs, aliases and items the game defines. For comparison, the verb is also found by linearly
+checking each command's set of aliases, as the command-line game used to.
+
+Usage: python benchmarks/bench_dispatch.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / 'app')]
+
+import game_factory  # noqa: E402
+from engine.commands import COMMANDS  # noqa: E402
+from engine.parser import Parser  # noqa: E402
+from entities.item import Item  # noqa: E402
+
+SIZES = [10, 1_000, 100_000]
+NUMBER = 100_000
+
+
+def main() -> None:
+    """Time parse_input and a linear alias scan for each size of the vocabulary."""
+    game = game_factory.initialise()
+    print(f'{"words":>10} {"help (ns)":>12} {"inspect (ns)":>14} {"linear scan (ns)":>18}')
+    for size in SIZES:
+        parser = Parser(game_factory.WORLD.items.values())
+        commands = {}
+        for i in range(size):
+            parser.verbs.add([f'verb{i}'], 'help')
+            commands[f'command{i}'] = {f'verb{i}'}
+        parser.add_items(Item(-i - 1, f'Generated Item {i}', 'An item.', True, True) for i in range(size))
+        commands.update(COMMANDS)
+        game.parser = parser
+
+        parse = timeit.timeit(lambda: game.parse_input('help'), number=NUMBER) / NUMBER
+        inspect = timeit.timeit(lambda: game.parse_input('inspect the old rusty key'), number=NUMBER) / NUMBER
+        linear = timeit.timeit(lambda: next(name for name in commands if 'help' in commands[name]),
+                               number=NUMBER // 100) / (NUMBER // 100)
+        print(f'{size:>10} {parse * 1e9:>12.0f} {inspect * 1e9:>14.0f} {linear * 1e9:>18.0f}')
+
+
+if __name__ == '__main__':
+    main()
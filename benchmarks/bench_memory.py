@@ -0,0 +1,69 @@
+"""Memory benchmark of the world entities.
+
+Builds a generated world of empty rooms, then a world of rooms connected in a grid where every tenth room holds a
+container with an item in it, and reports the memory used per room and per item, measured with tracemalloc.
+
+Usage: python benchmarks/bench_memory.py [number of rooms]
+"""
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from entities.item import Item, Container  # noqa: E402
+from entities.room import Room  # noqa: E402
+
+WIDTH = 100
+
+
+def build_rooms(count: int, connected: bool = True) -> list[Room]:
+    """Return count empty rooms, connected in a grid if connected is True."""
+    rooms = []
+    for i in range(count):
+        room = Room(name=f'Room {i % 50}', description='A featureless room.', room_id=i)
+        if connected and i % WIDTH:
+            room.add_neighbour(rooms[i - 1], 'west')
+        if connected and i >= WIDTH:
+            room.add_neighbour(rooms[i - WIDTH], 'south')
+        rooms.append(room)
+    return rooms
+
+
+def add_items(rooms: list[Room]) -> int:
+    """Put a container holding an item in every tenth room, and return the number of items created."""
+    count = 0
+    for room in rooms[::10]:
+        chest = Container(item_id=2 * room.room_id, name='Old Chest', description='An old chest.',
+                          interactable=True, locked=False)
+        chest.insert_item(Item(item_id=2 * room.room_id + 1, name='Rusty Key', description='A rusty key.',
+                               interactable=True, portable=True))
+        room.add_item(chest)
+        count += 2
+    return count
+
+
+def main(count: int) -> None:
+    """Build the world and print the memory used per room and per item."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rooms = build_rooms(count, connected=False)
+    print(f'{count:,} unconnected rooms: {(tracemalloc.get_traced_memory()[0] - before) / count:.0f} bytes/room')
+    del rooms
+    gc.collect()
+
+    before = tracemalloc.get_traced_memory()[0]
+    rooms = build_rooms(count)
+    after_rooms = tracemalloc.get_traced_memory()[0]
+    items = add_items(rooms)
+    after_items = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f'{count:,} connected rooms: {(after_rooms - before) / count:.0f} bytes/room')
+    print(f'{items:,} items: {(after_items - after_rooms) / items:.0f} bytes/item (including the room dicts they fill)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,80 @@
+"""Throughput benchmark of saving and loading sessions with SQLiteSessionStore.
+
+Plays a few commands in each of the given number of sessions, then saves every session's snapshot to a fresh
+database, one transaction per snapshot and in batches, and loads them all back in a random order, as a stateless
+worker would when each request arrives. Finally, it times the full round trip of a stateless command: loading the
+snapshot, restoring the game, running a command and saving the snapshot again.
+
+Usage: python benchmarks/bench_session_store.py [number of sessions]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / 'app')]
+
+import game_factory  # noqa: E402
+from engine.session_store import SQLiteSessionStore, StoredSessions  # noqa: E402
+
+COMMANDS = ['take key', 'unlock chest with key', 'take sword', 'go south', 'drop key', 'take pendant', 'go north']
+BATCH_SIZE = 500
+
+
+def build_snapshots(count: int) -> list[tuple[str, dict]]:
+    """Return the snapshots of count sessions, each of which has played some of COMMANDS."""
+    snapshots = []
+    for i in range(count):
+        game = game_factory.initialise()
+        game.announce_room()
+        for command in COMMANDS[:i % (len(COMMANDS) + 1)]:
+            game.parse_input(command)
+        snapshots.append((f'session{i}', game_factory.snapshot(game)))
+    return snapshots
+
+
+def report(name: str, count: int, seconds: float) -> None:
+    """Print the throughput of an operation."""
+    print(f'{name:<32} {count / seconds:>12,.0f} sessions/sec {seconds / count * 1e6:>10.1f} us/session')
+
+
+def main(count: int) -> None:
+    """Time saving, loading and serving count sessions."""
+    snapshots = build_snapshots(count)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteSessionStore(str(Path(directory) / 'unbatched.db'))
+        start = time.perf_counter()
+        for session_id, snapshot in snapshots:
+            store.save(session_id, snapshot)
+        report('save, one per transaction', count, time.perf_counter() - start)
+        store.close()
+
+        store = SQLiteSessionStore(str(Path(directory) / 'sessions.db'), batch_size=BATCH_SIZE)
+        start = time.perf_counter()
+        for session_id, snapshot in snapshots:
+            store.save(session_id, snapshot)
+        store.flush()
+        report(f'save, batches of {BATCH_SIZE}', count, time.perf_counter() - start)
+        store.close()
+
+        store = SQLiteSessionStore(str(Path(directory) / 'sessions.db'))
+        session_ids = [session_id for session_id, _ in snapshots]
+        random.shuffle(session_ids)
+        start = time.perf_counter()
+        for session_id in session_ids:
+            store.load(session_id)
+        report('load, random order', count, time.perf_counter() - start)
+
+        sessions = StoredSessions(store, game_factory.initialise, game_factory.from_snapshot, game_factory.snapshot)
+        start = time.perf_counter()
+        for session_id in session_ids:
+            with sessions.session(session_id) as session:
+                session.controller.parse_input('inventory')
+        report('stateless command round trip', count, time.perf_counter() - start)
+        store.close()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
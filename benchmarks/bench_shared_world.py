@@ -0,0 +1,114 @@
+"""Throughput benchmark of many players playing at once in one shared world.
+
+Joins the given number of players to a SharedWorld made from a generated world, and has each of them send random
+commands (see simulate.RandomAgent) from a pool of threads, as the threads of a server process would. The same
+players are then run in worlds of their own, to show what sharing costs. For each run, it reports the number of
+commands per second, and the number of messages about other players that each command delivered.
+
+After each shared run, it checks that taking and dropping items concurrently neither duplicated nor lost any: every
+item is in exactly one room, container or inventory.
+
+Python's GIL means that more threads do not add throughput: the threads show that the world stays consistent while
+the commands of many players interleave, and what the locks cost while they do.
+
+Usage: python benchmarks/bench_shared_world.py [players] [rooms] [steps per player]
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from data.generator import generate_world  # noqa: E402
+from engine.controller import Controller  # noqa: E402
+from engine.gameinteractor import GameInteractor  # noqa: E402
+from engine.navigation import RoomGraph  # noqa: E402
+from engine.parser import Parser  # noqa: E402
+from engine.shared_world import Occupant, SharedWorld  # noqa: E402
+from entities.item import Container  # noqa: E402
+from entities.player import Player  # noqa: E402
+from entities.world import World  # noqa: E402
+from simulate import RandomAgent  # noqa: E402
+
+THREADS = [1, 8, 32]
+
+
+def join(world: World, graph: RoomGraph, parser: Parser, players: int,
+         shared: SharedWorld | None) -> list[Controller]:
+    """Return the games of the given number of players, in the shared world if there is one and alone otherwise."""
+    controllers = []
+    for number in range(players):
+        if shared is None:
+            interactor = GameInteractor(Player(world.start), graph=graph)
+        else:
+            interactor = GameInteractor(Player(world.start, shared.view()), graph=graph, shared=shared,
+                                        occupant=Occupant(f'Player {number}'))
+        controllers.append(Controller(interactor, parser))
+        controllers[-1].announce_room()
+    return controllers
+
+
+def play(controllers: list[Controller], steps: int, threads: int) -> tuple[float, int]:
+    """Have every player send steps random commands, splitting the players between a pool of threads. Return the
+    time taken and the number of messages about other players that were delivered.
+    """
+    delivered = [0] * threads
+
+    def run(thread: int) -> None:
+        games = [(controller, RandomAgent(seed)) for seed, controller in enumerate(controllers)
+                 if seed % threads == thread]
+        for _ in range(steps):
+            for controller, agent in games:
+                occupant = controller.interactor.occupant
+                if occupant is not None:
+                    delivered[thread] += len(occupant.messages)
+                controller.parse_input(agent.next_command(controller))
+
+    pool = [threading.Thread(target=run, args=(thread,)) for thread in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start, sum(delivered)
+
+
+def check(shared: SharedWorld, controllers: list[Controller]) -> list[str]:
+    """Return a description of every item that is in more than one place, or in none."""
+    places = Counter()
+    stack = [item for room in shared.world.rooms.values() for item in shared.state.contents(room).values()]
+    stack += [item for controller in controllers for item in controller.interactor.player.inventory.values()]
+    while stack:
+        item = stack.pop()
+        places[item.item_id] += 1
+        if isinstance(item, Container):
+            stack.extend(shared.state.contents(item).values())
+    return [f'item {item_id} is in {places[item_id]} places' for item_id in shared.world.items
+            if places[item_id] != 1]
+
+
+def main(players: int = 1000, rooms: int = 100, steps: int = 100) -> None:
+    """Time the given number of players sharing a generated world, and playing alone."""
+    world = generate_world(rooms)
+    graph = RoomGraph(world.rooms.values())
+    parser = Parser(world.items.values())
+    print(f'{players:,} players, {rooms:,} rooms, {steps:,} commands each')
+    for threads in THREADS:
+        shared = SharedWorld(world)
+        controllers = join(world, graph, parser, players, shared)
+        seconds, delivered = play(controllers, steps, threads)
+        commands = players * steps
+        problems = check(shared, controllers)
+        print(f'shared world, {threads:>2} threads {commands / seconds:>12,.0f} commands/sec '
+              f'{delivered / commands:>8.2f} messages/command   {"consistent" if not problems else problems[:5]}')
+
+    controllers = join(world, graph, parser, players, None)
+    seconds, _ = play(controllers, steps, 1)
+    print(f'separate worlds, 1 thread  {players * steps / seconds:>12,.0f} commands/sec')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,99 @@
+"""Benchmark of the cold start of the web server: the time from launching a new process to serving its first /on_load.
+
+Each run launches a fresh Python process that imports app/asgi.py and serves /on_load through the ASGI application,
+as a server would once it has accepted the first connection. The world is loaded from its world data file, and then
+from its world image (see data/world_image.py), which is built before the runs so that every run finds it up to date.
+Besides the test world, a generated world of --entities rooms and items is used, to show how the cost grows with the
+size of the world.
+
+The time of each stage is reported: starting the interpreter, importing the server (which loads the world), and
+serving the first request.
+
+Usage: python benchmarks/bench_startup.py [--entities 100000] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / 'app')]
+
+import game_factory  # noqa: E402
+from data.loader import load_world, save_world  # noqa: E402
+from data.world_image import file_hash, save_image  # noqa: E402
+
+# run in the new process: each stage prints the wall-clock time at which it finished. asyncio is imported before the
+# first stage, since it belongs to the ASGI server rather than the game
+CHILD = '''
+import asyncio
+import time
+print(time.time(), flush=True)
+import asgi
+print(time.time(), flush=True)
+
+async def on_load():
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi.app({'type': 'http', 'method': 'GET', 'path': '/on_load', 'headers': []}, receive, send)
+    assert sent[0]['status'] == 200, sent
+
+asyncio.run(on_load())
+print(time.time(), flush=True)
+'''
+
+
+def cold_start(world_file: Path, image: Path | None) -> tuple[float, float, float]:
+    """Launch a server process, and return the seconds it took to start the interpreter, to import the server,
+    and to serve the first /on_load.
+    """
+    env = dict(os.environ, PYTHONPATH=str(ROOT), GAME_WORLD_FILE=str(world_file))
+    env.pop('GAME_WORLD_IMAGE', None)
+    if image is not None:
+        env['GAME_WORLD_IMAGE'] = str(image)
+    launched = time.time()
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT / 'app', env=env, capture_output=True,
+                            text=True, check=True).stdout
+    started, imported, served = (float(line) for line in output.split())
+    return started - launched, imported - started, served - imported
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entities', type=int, default=100_000,
+                        help='the number of rooms and items in the generated world')
+    parser.add_argument('--runs', type=int, default=5, help='the number of times to start each server')
+    args = parser.parse_args()
+
+    from suite import generated_world  # imported here, since it imports the whole engine
+    with tempfile.TemporaryDirectory() as directory:
+        worlds = {'test world': ROOT / 'data' / 'test_world.jsonl'}
+        if args.entities:
+            worlds[f'{args.entities:,} entities'] = Path(directory) / 'generated.jsonl'
+            save_world(generated_world(args.entities), worlds[f'{args.entities:,} entities'])
+
+        print(f'{"world":<20} {"loaded from":<12} {"interpreter":>12} {"import":>10} {"first request":>14} '
+              f'{"total (ms)":>11}')
+        for name, world_file in worlds.items():
+            image = Path(directory) / f'{world_file.stem}.image'
+            world = load_world(world_file)
+            save_image(world, image, file_hash(world_file), game_factory.compile_world(world))
+            for source, image_file in (('data file', None), ('image', image)):
+                runs = [cold_start(world_file, image_file) for _ in range(args.runs)]
+                stages = [statistics.median(stage) * 1000 for stage in zip(*runs)]
+                print(f'{name:<20} {source:<12} {stages[0]:>12.1f} {stages[1]:>10.1f} {stages[2]:>14.1f} '
+                      f'{statistics.median(sum(run) for run in runs) * 1000:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
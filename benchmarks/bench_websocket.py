@@ -0,0 +1,82 @@
+"""Load test comparing the WebSocket channel with the POST endpoint of the ASGI front end.
+
+The ASGI application is driven in-process, so the numbers measure the cost of the application itself (routing,
+sessions, JSON encoding and the game engine) and leave out the network and the ASGI server. Throughput is measured
+in CPU time, so it is reported as messages per second per core.
+
+Usage: python benchmarks/bench_websocket.py [number of messages]
+"""
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / 'app')]
+
+import asgi  # noqa: E402
+import handlers  # noqa: E402
+
+COMMANDS = ['go north', 'room', 'go south', 'inventory', 'help']
+
+
+async def run_post(messages: int) -> float:
+    """Send each command as its own POST request and return the CPU time taken."""
+    sent = []
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    session_id, _ = handlers.on_load(asgi.sessions, None)
+    headers = [(b'cookie', f'{handlers.SESSION_COOKIE}={session_id}'.encode())]
+    start = time.process_time()
+    for i in range(messages):
+        body = json.dumps({'input': COMMANDS[i % len(COMMANDS)]}).encode()
+
+        async def receive() -> dict:
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/execute_command', 'headers': headers}
+        await asgi.app(scope, receive, send)
+        json.loads(sent[-1]['body'])
+        sent.clear()
+    return time.process_time() - start
+
+
+async def run_websocket(messages: int) -> float:
+    """Send every command over a single WebSocket and return the CPU time taken."""
+    incoming = asyncio.Queue()
+    received = 0
+    done = asyncio.Event()
+
+    async def send(message: dict) -> None:
+        nonlocal received
+        if message['type'] == 'websocket.send':
+            json.loads(message['text'])
+            received += 1
+            if received > messages:  # the first message is the room announcement
+                done.set()
+
+    await incoming.put({'type': 'websocket.connect'})
+    for i in range(messages):
+        incoming.put_nowait({'type': 'websocket.receive', 'text': COMMANDS[i % len(COMMANDS)]})
+
+    start = time.process_time()
+    task = asyncio.create_task(asgi.app({'type': 'websocket', 'path': '/ws', 'headers': []}, incoming.get, send))
+    await done.wait()
+    elapsed = time.process_time() - start
+    await incoming.put({'type': 'websocket.disconnect', 'code': 1000})
+    await task
+    return elapsed
+
+
+def main(messages: int) -> None:
+    """Run both load tests and print the results."""
+    for name, run in (('POST /execute_command', run_post), ('WebSocket /ws', run_websocket)):
+        elapsed = asyncio.run(run(messages))
+        print(f'{name:24} {messages / elapsed:12,.0f} messages/sec/core  ({elapsed * 1e6 / messages:.1f} us/message)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
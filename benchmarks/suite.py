@@ -0,0 +1,317 @@
+"""Benchmark suite for the hot paths of the engine, with results stored by commit so that they can be compared.
+
+Each benchmark is a function that is given the number of entities (rooms and items) in a generated world, and
+returns the operation to time. Operations that change the game are given fresh state before every call, which is
+prepared outside the timed region. Every operation is run for at least MIN_TIME seconds per round, for ROUNDS rounds,
+and the fastest and median time per call are reported.
+
+Results are saved to benchmarks/results/<commit>.json, where <commit> is the short hash of the checked out commit,
+followed by -dirty if there are uncommitted changes. --compare <commit> prints the ratio of every result to the
+results saved for another commit, and exits with status 1 if any benchmark is more than --threshold slower.
+
+Usage: python benchmarks/suite.py [--sizes 1000,100000,1000000] [--filter NAME] [--compare COMMIT] [--no-save]
+"""
+import argparse
+import gc
+import importlib
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import system  # noqa: E402
+from data.generator import generate_records  # noqa: E402
+from data.loader import WorldBuilder, world_records  # noqa: E402
+from data.validator import validate_records  # noqa: E402
+from engine.controller import Controller  # noqa: E402
+from engine.gameinteractor import GameInteractor  # noqa: E402
+from entities.item import Item, Container  # noqa: E402
+from entities.player import Player  # noqa: E402
+from entities.room import Room  # noqa: E402
+from entities.world import World  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+SIZES = [1_000, 100_000, 1_000_000]
+WIDTH = 100  # the width of the grid of rooms in generated worlds
+NESTING = 8  # the depth of the nested containers in the starting room of generated worlds
+MIN_TIME = 0.1
+ROUNDS = 5
+
+# a benchmark returns the operation to time, and optionally a function that prepares fresh state for each call, whose
+# result is passed to the operation
+Operation = tuple[Callable[[Any], Any], Callable[[], Any] | None]
+BENCHMARKS: dict[str, tuple[Callable[[int | None], Operation], bool]] = {}
+
+
+def benchmark(scaled: bool = True) -> Callable:
+    """Register a benchmark. Benchmarks that are not scaled are run once, and are given None as their size."""
+    def register(function: Callable[[int | None], Operation]) -> Callable[[int | None], Operation]:
+        BENCHMARKS[function.__name__] = (function, scaled)
+        return function
+    return register
+
+
+@lru_cache(maxsize=1)
+def generated_world(entities: int) -> World:
+    """Return a world with about the given number of rooms and items. The rooms are connected in a grid, each room
+    holds a chest with a coin in it, and the starting room also holds a chest nested NESTING deep, with two coins at
+    every level.
+    """
+    world = World()
+    rooms = []
+    for i in range(max(entities // 3, WIDTH + 1)):
+        room = Room(name=f'Room {i % 50}', description='A featureless room.', room_id=i)
+        if i % WIDTH:
+            room.add_neighbour(rooms[i - 1], 'west')
+        if i >= WIDTH:
+            room.add_neighbour(rooms[i - WIDTH], 'south')
+        chest = Container(item_id=-2 * i - 1, name='Wooden Chest', description='A wooden chest.', interactable=True,
+                          locked=False)
+        coin = Item(item_id=-2 * i - 2, name='Copper Coin', description='A copper coin.', interactable=True,
+                    portable=True)
+        chest.insert_item(coin)
+        room.add_item(chest)
+        world.add_room(room)
+        world.add_item(chest)
+        world.add_item(coin)
+        rooms.append(room)
+
+    world.start = rooms[WIDTH]  # a room with a neighbour to the south
+    outer = container = None
+    for level in range(NESTING):
+        nested = Container(item_id=10 ** 9 + 3 * level, name=f'Treasure Chest {level}', description='A chest.',
+                           interactable=True, locked=False)
+        nested.insert_items([Item(item_id=10 ** 9 + 3 * level + n, name=f'Gold Coin {level}.{n}',
+                                  description='A gold coin.', interactable=True, portable=True) for n in (1, 2)])
+        world.add_item(nested)
+        world.items.update(nested.contents)
+        if container is None:
+            outer = nested
+        else:
+            container.insert_item(nested)
+        container = nested
+    world.start.add_item(outer)
+    return world
+
+
+def legacy_tree(entities: int, branching: int = 10) -> system.Container:
+    """Return a tree of about the given number of unlocked system.Containers, where every container holds branching
+    containers until the leaves, which hold a single item.
+    """
+    count = 1
+    root = system.Container('Root', {'root'}, 'The root.', True, True, set(), False)
+    level = [root]
+    while count < entities:
+        next_level = []
+        for parent in level:
+            for _ in range(branching):
+                child = system.Container('Box', {'box'}, 'A box.', True, True, set(), False)
+                parent.contents.add(child)
+                next_level.append(child)
+                count += 1
+        level = next_level
+    for leaf in level:
+        leaf.contents.add(system.Item('Pebble', {'pebble'}, 'A pebble.', True, True))
+    return root
+
+
+def new_game(world: World) -> Controller:
+    """Return a new game in a world."""
+    return Controller(GameInteractor(Player(world.start)))
+
+
+@benchmark()
+def parse_input(entities: int) -> Operation:
+    """Controller.parse_input, inspecting an item in the starting room."""
+    game = new_game(generated_world(entities))
+    return lambda _: game.parse_input('inspect wooden chest'), None
+
+
+@benchmark()
+def suggest(entities: int) -> Operation:
+    """Controller.suggest, completing the name of an item in the starting room as it is typed."""
+    game = new_game(generated_world(entities))
+    return lambda _: game.suggest('take the treasure ch'), None
+
+
+@benchmark()
+def move_rooms(entities: int) -> Operation:
+    """GameInteractor.move_rooms, moving south and back north."""
+    interactor = new_game(generated_world(entities)).interactor
+    interactor.move_rooms('south')  # visit both rooms first, so that later moves are the same
+    interactor.move_rooms('north')
+    return lambda _: (interactor.move_rooms('south'), interactor.move_rooms('north')), None
+
+
+@benchmark()
+def pickup_nested(entities: int) -> Operation:
+    """GameInteractor.pickup_item, taking everything out of a chest nested NESTING deep."""
+    world = generated_world(entities)
+    return (lambda interactor: interactor.pickup_item(10 ** 9),
+            lambda: GameInteractor(Player(world.start)))
+
+
+@benchmark()
+def legacy_search_deep(entities: int) -> Operation:
+    """system.Container.search_for_item, searching a tree of containers for an item that is not in it."""
+    root = legacy_tree(entities)
+    return lambda _: root.search_for_item('sword'), None
+
+
+@benchmark()
+def legacy_display_contents(entities: int) -> Operation:
+    """system.Container.display_contents, listing a container holding every item."""
+    container = system.Container('Hoard', {'hoard'}, 'A hoard.', True, False, set(), False)
+    container.contents.update(system.Item(f'Coin {i}', {'coin'}, 'A coin.', True, True) for i in range(entities))
+    return lambda _: container.display_contents(), None
+
+
+@benchmark()
+def build_world(entities: int) -> Operation:
+    """WorldBuilder, building a generated world from its records."""
+    records = list(world_records(generated_world(entities)))
+
+    def build(_) -> World:
+        builder = WorldBuilder()
+        builder.add_records(records)
+        return builder.finish()
+    return build, None
+
+
+@benchmark()
+def generate_world_records(entities: int) -> Operation:
+    """data.generator.generate_records, generating the records of a world with a third as many rooms as entities."""
+    return lambda _: deque(generate_records(entities // 3), maxlen=0), None
+
+
+@benchmark()
+def validate_world(entities: int) -> Operation:
+    """data.validator.validate_records, validating the records of a generated world in a single process."""
+    records = list(generate_records(entities // 3))
+    return lambda _: validate_records(records), None
+
+
+@benchmark(scaled=False)
+def build_test_data(_) -> Operation:
+    """Building the rooms and items in data/test_data.py."""
+    from data import test_data
+    return lambda _: importlib.reload(test_data), None
+
+
+def measure(operation: Operation) -> tuple[float, float, int]:
+    """Time an operation, and return the fastest and median time per call in nanoseconds, and the number of calls
+    per round.
+    """
+    run, prepare = operation
+    calls = 1
+    while True:  # find how many calls take at least MIN_TIME
+        elapsed = time_calls(run, prepare, calls)
+        if elapsed >= MIN_TIME * 1e9:
+            break
+        calls = max(calls * 2, int(calls * MIN_TIME * 1.2e9 / max(elapsed, 1)))
+    times = [elapsed / calls] + [time_calls(run, prepare, calls) / calls for _ in range(ROUNDS - 1)]
+    return min(times), statistics.median(times), calls
+
+
+def time_calls(run: Callable[[Any], Any], prepare: Callable[[], Any] | None, calls: int) -> int:
+    """Return the nanoseconds taken by the given number of calls of run, not counting prepare."""
+    gc.disable()
+    try:
+        if prepare is None:
+            start = time.perf_counter_ns()
+            for _ in range(calls):
+                run(None)
+            return time.perf_counter_ns() - start
+        total = 0
+        for _ in range(calls):
+            state = prepare()
+            start = time.perf_counter_ns()
+            run(state)
+            total += time.perf_counter_ns() - start
+        return total
+    finally:
+        gc.enable()
+
+
+def commit() -> str:
+    """Return the short hash of the checked out commit, followed by -dirty if there are uncommitted changes."""
+    def git(*args: str) -> str:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    dirty = git('status', '--porcelain', '--untracked-files=no')
+    return (git('rev-parse', '--short', 'HEAD') or 'unknown') + ('-dirty' if dirty else '')
+
+
+def format_time(nanoseconds: float) -> str:
+    """Return a time in nanoseconds in the most readable unit."""
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if nanoseconds >= scale:
+            return f'{nanoseconds / scale:.2f} {unit}'
+    return f'{nanoseconds:.0f} ns'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help='the numbers of entities in the generated worlds, separated by commas')
+    parser.add_argument('--filter', default='', help='only run the benchmarks whose names contain this')
+    parser.add_argument('--compare', help='the commit whose saved results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='how much slower a benchmark can be than the compared results before it is reported '
+                             'as a regression')
+    parser.add_argument('--no-save', action='store_true', help="don't save the results")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    baseline = None
+    if args.compare is not None:
+        matches = sorted(RESULTS_DIR.glob(f'{args.compare}*.json'))
+        if not matches:
+            sys.exit(f'no saved results for {args.compare}')
+        baseline = json.loads(matches[0].read_text())['results']
+
+    # run every benchmark for one size before moving on to the next, so that each generated world is built once
+    runs = [(name, function, None) for name, (function, scaled) in BENCHMARKS.items() if not scaled]
+    runs += [(f'{name}[{size}]', function, size) for size in sizes
+             for name, (function, scaled) in BENCHMARKS.items() if scaled]
+    results = {}
+    regressions = []
+    for key, function, size in runs:
+        if args.filter not in key:
+            continue
+        fastest, median, calls = measure(function(size))
+        results[key] = {'min': fastest, 'median': median, 'calls': calls}
+        line = f'{key:<40} {format_time(fastest):>12} {format_time(median):>12}'
+        if baseline is not None and key in baseline:
+            ratio = fastest / baseline[key]['min']
+            line += f' {ratio:>8.2f}x'
+            if ratio > 1 + args.threshold:
+                line += '  REGRESSION'
+                regressions.append(key)
+        print(line, flush=True)
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f'{commit()}.json'
+        saved = json.loads(path.read_text())['results'] if path.exists() else {}
+        path.write_text(json.dumps({'commit': commit(),
+                                    'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                                    'python': platform.python_version(),
+                                    'machine': platform.machine(),
+                                    'results': saved | results}, indent=2))
+        print(f'Saved results to {path.relative_to(ROOT)}')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
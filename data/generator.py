@@ -0,0 +1,195 @@
+"""Generates worlds of any size, for benchmarks and for load and stress tests.
+
+Worlds are generated from a seed, so the same arguments always generate the same world. The rooms form a tree that
+is grown breadth first: each room leads on to `branching` new rooms until there are `rooms` of them, and a fraction
+(`loops`) of the rooms also have a passage back to an earlier room, so that there is more than one way around the
+map. Each room holds `density` items on average, of which a fraction (`containers`) are containers, nested up to
+`nesting` deep. A fraction (`locked`) of the containers and of the rooms are locked, and their keys are always
+placed where the player finds them first: the key of a container is in the same room, and the key of a room is in
+the room that leads to it, where using the key opens the way.
+
+generate_records yields the records of a world in the format of a world data file (see data/loader.py), one at a
+time, so that a world of millions of rooms can be written to a file without ever being held in memory. Every record
+only refers to rooms and items that were yielded before it. generate_world builds the world itself.
+
+Usage: python -m data.generator ROOMS [--seed N] [--branching N] [--nesting N] [--density X] [--containers X]
+                                      [--locked X] [--loops X] [--output PATH]
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+from typing import Any, Iterator, Sequence
+
+from data.loader import WorldBuilder
+from entities.room import DIRECTIONS
+from entities.world import World
+
+ROOM_ADJECTIVES = ('Dusty', 'Silent', 'Narrow', 'Flooded', 'Crumbling', 'Gilded', 'Damp', 'Echoing', 'Forgotten',
+                   'Mossy', 'Sunken', 'Frozen')
+ROOM_NOUNS = ('Hall', 'Cellar', 'Corridor', 'Chamber', 'Library', 'Kitchen', 'Crypt', 'Gallery', 'Armoury', 'Chapel',
+              'Study', 'Vault')
+MATERIALS = ('Iron', 'Copper', 'Silver', 'Brass', 'Bone', 'Glass', 'Oak', 'Jade', 'Gold', 'Stone')
+THINGS = ('Coin', 'Goblet', 'Dagger', 'Candle', 'Ring', 'Scroll', 'Lantern', 'Skull', 'Compass', 'Feather', 'Mirror',
+          'Bell')
+CONTAINER_NOUNS = ('Chest', 'Box', 'Crate', 'Coffer', 'Casket', 'Urn')
+
+# every name is chosen with a single call from one of these, which is quicker than choosing and joining its words
+ROOM_NAMES = tuple(f'{adjective} {noun}' for adjective in ROOM_ADJECTIVES for noun in ROOM_NOUNS)
+ROOM_DESCRIPTIONS = {name: f'You are in a {name.lower()}.' for name in ROOM_NAMES}
+ITEM_NAMES = tuple(f'{material} {thing}' for material in MATERIALS for thing in THINGS)
+CONTAINER_NAMES = tuple(f'{material} {noun}' for material in MATERIALS for noun in CONTAINER_NOUNS)
+KEY_NAMES = tuple(f'{material} Key' for material in MATERIALS)
+
+_DIRECTIONS = tuple(DIRECTIONS)
+_OPPOSITES = tuple(_DIRECTIONS.index(DIRECTIONS[direction]) for direction in _DIRECTIONS)
+_ALL_EXITS = (1 << len(_DIRECTIONS)) - 1
+# for every set of directions, as bits, the directions in the set
+_DIRECTIONS_IN = tuple(tuple(direction for direction in range(len(_DIRECTIONS)) if bits >> direction & 1)
+                       for bits in range(_ALL_EXITS + 1))
+# for every set of directions used by a room's passages, the opposite directions, which a passage back can't use
+_MIRRORED = tuple(sum(1 << _OPPOSITES[direction] for direction in _DIRECTIONS_IN[bits])
+                  for bits in range(_ALL_EXITS + 1))
+
+
+def generate_records(rooms: int, seed: int = 0, branching: int = 3, nesting: int = 2, density: float = 1.0,
+                     containers: float = 0.25, locked: float = 0.1, loops: float = 0.1) -> Iterator[dict[str, Any]]:
+    """Yield the records of a generated world. The ids of the rooms are 0 to rooms - 1, in the order they are
+    yielded, and players start in room 0. The ids of the items follow on from the ids of the rooms.
+
+    Preconditions:
+     - rooms >= 1
+     - 1 <= branching < len(DIRECTIONS)
+     - nesting >= 0
+     - density >= 0
+     - 0 <= containers <= 1 and 0 <= locked <= 1 and 0 <= loops <= 1
+    """
+    random_float = random.Random(seed).random
+
+    def choice(options: Sequence) -> Any:  # much quicker than Random.choice, which is written in Python
+        return options[int(random_float() * len(options))]
+    exits = bytearray(rooms)  # for each room, a bit for each direction that is already used by a passage
+    back = bytearray(rooms)  # for each room but the first, the direction of the passage back to the room before it
+    room_keys = {}  # locked rooms that have not been yielded yet, and the room and id of their key
+    next_id = rooms
+
+    for room_id in range(rooms):
+        contents = []
+        neighbours = {}
+        if room_id > 0:
+            parent = (room_id - 1) // branching
+            neighbours[_DIRECTIONS[back[room_id]]] = parent
+
+        # choose the directions of the passages to the rooms that this room leads on to
+        for child in range(room_id * branching + 1, min(room_id * branching + branching + 1, rooms)):
+            direction = choice(_DIRECTIONS_IN[~exits[room_id] & _ALL_EXITS])
+            exits[room_id] |= 1 << direction
+            exits[child] |= 1 << _OPPOSITES[direction]
+            back[child] = _OPPOSITES[direction]
+            if random_float() < locked:
+                key_id, next_id = next_id, next_id + 1
+                yield _item(key_id, choice(KEY_NAMES), 'A heavy key. It must open a door nearby.')
+                contents.append(key_id)
+                room_keys[child] = (room_id, key_id)
+
+        if room_id > 0 and random_float() < loops:
+            earlier = int(random_float() * room_id)
+            free = ~exits[room_id] & _ALL_EXITS & ~_MIRRORED[exits[earlier]]
+            if free and earlier not in neighbours.values():
+                direction = choice(_DIRECTIONS_IN[free])
+                exits[room_id] |= 1 << direction
+                exits[earlier] |= 1 << _OPPOSITES[direction]
+                neighbours[_DIRECTIONS[direction]] = earlier
+
+        count = int(density) + (random_float() < density % 1)
+        for _ in range(count):
+            if nesting > 0 and random_float() < containers:
+                depth = int(random_float() * nesting) + 1
+                inner = []
+                for _ in range(depth):  # the innermost container first, so that its contents are yielded before it
+                    item_id, next_id = next_id, next_id + 1
+                    yield _item(item_id, choice(ITEM_NAMES), 'It looks valuable.')
+                    container = {'type': 'container', 'id': next_id, 'name': choice(CONTAINER_NAMES),
+                                 'description': 'It might hold something.', 'contents': inner + [item_id]}
+                    next_id += 1
+                    if random_float() < locked:
+                        key_id, next_id = next_id, next_id + 1
+                        yield _item(key_id, choice(KEY_NAMES), 'A small key.')
+                        contents.append(key_id)
+                        container.update(locked=True, key=key_id)
+                    yield container
+                    inner = [container['id']]
+                contents.append(inner[0])
+            else:
+                item_id, next_id = next_id, next_id + 1
+                yield _item(item_id, choice(ITEM_NAMES), 'It looks valuable.')
+                contents.append(item_id)
+
+        name = choice(ROOM_NAMES)
+        record = {'type': 'room', 'id': room_id, 'name': name, 'description': ROOM_DESCRIPTIONS[name],
+                  'contents': contents, 'neighbours': neighbours}
+        if room_id in room_keys:
+            key_room, key_id = room_keys.pop(room_id)
+            record.update(locked=True, key=key_id)
+            yield record
+            yield {'type': 'interaction', 'id': f'open {room_id}', 'room': key_room, 'item': key_id,
+                   'message': 'The key turns, and a door swings open.', 'condition': {'has': key_id},
+                   'effects': [{'unlock_room': room_id}]}
+        else:
+            yield record
+
+    yield {'type': 'start', 'room': 0}
+
+
+def generate_world(rooms: int, **parameters: Any) -> World:
+    """Return a generated world. The parameters are the same as generate_records."""
+    # nothing that is created is garbage until the world is built, so the garbage collector would only waste time
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        builder = WorldBuilder()
+        builder.add_records(generate_records(rooms, **parameters))
+        return builder.finish()
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _item(item_id: int, name: str, description: str) -> dict[str, Any]:
+    """Return the record of a portable item."""
+    return {'type': 'item', 'id': item_id, 'name': name, 'description': description}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('rooms', type=int, help='the number of rooms')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the random number generator')
+    parser.add_argument('--branching', type=int, default=3, help='the number of rooms each room leads on to')
+    parser.add_argument('--nesting', type=int, default=2, help='the greatest depth of nested containers')
+    parser.add_argument('--density', type=float, default=1.0, help='the average number of items in each room')
+    parser.add_argument('--containers', type=float, default=0.25, help='the fraction of items that are containers')
+    parser.add_argument('--locked', type=float, default=0.1,
+                        help='the fraction of containers and rooms that are locked')
+    parser.add_argument('--loops', type=float, default=0.1,
+                        help='the fraction of rooms with a passage back to an earlier room')
+    parser.add_argument('--output', help='the world data file to write, instead of standard output')
+    args = parser.parse_args()
+    if not 1 <= args.branching < len(DIRECTIONS):
+        parser.error(f'--branching must be between 1 and {len(DIRECTIONS) - 1}')
+
+    records = generate_records(args.rooms, args.seed, args.branching, args.nesting, args.density, args.containers,
+                               args.locked, args.loops)
+    file = sys.stdout if args.output is None else open(args.output, 'w', encoding='utf-8', buffering=1 << 20)
+    try:
+        encode = json.JSONEncoder(separators=(',', ':')).encode
+        for record in records:
+            file.write(encode(record))
+            file.write('\n')
+    finally:
+        if file is not sys.stdout:
+            file.close()
+
+
+if __name__ == '__main__':
+    main()
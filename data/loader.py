@@ -0,0 +1,279 @@
+"""Loads worlds from, and saves worlds to, world data files.
+
+A world data file is in the JSON Lines format: every line is a JSON object that defines one record of the world.
+Records are read one at a time, so the file never has to be held in memory all at once. Records can refer to
+items and rooms that are defined later in the file. There are five kinds of records:
+ - {"type": "item", "id": "key1", "name": "Rusty Key", "description": "...", "portable": true,
+    "interactable": true, "keywords": ["key"]}
+ - {"type": "container", "id": "chest1", "name": "Old Chest", "description": "...", "locked": true,
+    "key": "key1", "contents": ["sword"]}
+ - {"type": "room", "id": "room1", "name": "Test Room", "description": "...", "contents": ["key1", "chest1"],
+    "neighbours": {"north": "room2"}, "locked": false, "key": null}
+ - {"type": "start", "room": "room1"}
+ - {"type": "interaction", "id": "open_vault", "room": "room1", "item": "pendant1", "message": "...",
+    "condition": {"has": "pendant1"}, "effects": [{"unlock_room": "vault"}], "repeatable": false}
+   (see entities/interaction.py for the conditions and effects that can be used)
+
+Rooms in a world that is split into regions (see data/regions.py) may also have "portals": neighbours that are in
+a different region, given as {"north": {"region": "forest", "room": "room7"}}. The key item of an interaction in a
+region may be defined in a different region.
+
+Ids in the file may be strings or integers. String ids are converted to integers with stable_id, so the ids of the
+loaded rooms and items are the same in every process. "portable", "interactable", "locked", "key", "keywords",
+"contents", "neighbours", "portals", "condition", "effects" and "repeatable" are optional. If there is no start
+record, players start in the first room.
+"""
+import json
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from entities.ids import stable_id
+from entities.interaction import Interaction, compile_condition, compile_effect
+from entities.item import Item, Container, keywords_for
+from entities.room import Room, DIRECTIONS
+from entities.world import World
+
+
+class WorldDataError(Exception):
+    """Raised when a world data file contains an invalid record."""
+
+
+def record_id(value: str | int) -> int:
+    """Return the id of a room or item given its id in a world data file."""
+    return value if isinstance(value, int) else stable_id(value)
+
+
+class WorldBuilder:
+    """Builds a world one record at a time.
+
+    world: the world being built.
+    region: the name of the region that the rooms being built belong to, or None if the world is not split into
+            regions.
+    """
+    world: World
+    region: str | None
+    _start: int | None
+    _waiting_items: dict[int: list[Room | Container]]
+    _waiting_rooms: dict[int: list[tuple[Room, str]]]
+    _interactions: list[dict[str, Any]]
+
+    def __init__(self, region: str | None = None) -> None:
+        self.world = World()
+        self.region = region
+        self._start = None
+        self._waiting_items = {}  # ids of undefined items, and the rooms or containers they go in
+        self._waiting_rooms = {}  # ids of undefined rooms, and their neighbours and directions
+        self._interactions = []  # interactions are compiled once every room and item they use has been defined
+
+    def add_record(self, record: dict[str, Any]) -> None:
+        """Add the room or item defined by a record to the world."""
+        try:
+            kind = record['type']
+            if kind == 'item':
+                self._add_item(Item(item_id=record_id(record['id']),
+                                    name=record['name'],
+                                    description=record['description'],
+                                    interactable=record.get('interactable', True),
+                                    portable=record.get('portable', True),
+                                    keywords=record.get('keywords')))
+            elif kind == 'container':
+                container = Container(item_id=record_id(record['id']),
+                                      name=record['name'],
+                                      description=record['description'],
+                                      interactable=record.get('interactable', True),
+                                      locked=record.get('locked', False),
+                                      key_id=record_id(record['key']) if record.get('key') is not None else None,
+                                      keywords=record.get('keywords'))
+                self._add_item(container)
+                for item_id in record.get('contents', ()):
+                    self._place_item(container, record_id(item_id))
+            elif kind == 'room':
+                self._add_room(record)
+            elif kind == 'start':
+                self._start = record_id(record['room'])
+            elif kind == 'interaction':
+                self._interactions.append(record)
+            else:
+                raise WorldDataError(f'unknown record type {kind!r}')
+        except (KeyError, TypeError) as error:
+            raise WorldDataError(f'invalid {record.get("type", "")} record: {error!r}') from error
+
+    def add_records(self, records: Iterable[dict[str, Any]]) -> None:
+        """Add every record to the world."""
+        for record in records:
+            self.add_record(record)
+
+    def finish(self) -> World:
+        """Check that every reference has been resolved, and return the world."""
+        if self._waiting_items:
+            raise WorldDataError(f'items are used but never defined: {sorted(self._waiting_items)}')
+        elif self._waiting_rooms:
+            raise WorldDataError(f'rooms are used but never defined: {sorted(self._waiting_rooms)}')
+        elif self._start is not None:
+            if self._start not in self.world.rooms:
+                raise WorldDataError(f'the starting room {self._start} is never defined')
+            self.world.start = self.world.rooms[self._start]
+
+        owners = self._starting_owners()
+        for record in self._interactions:
+            self._add_interaction(record, owners)
+        self._interactions = []
+        return self.world
+
+    def _starting_owners(self) -> dict[int: Room | Container]:
+        """Return the ids of the items that interactions place in rooms, and the room or container that each starts
+        in, if it starts in one. The rooms and containers are only searched if an interaction places an item.
+        """
+        placed = set()
+        for record in self._interactions:  # invalid records are reported when they are compiled
+            for effect in record.get('effects', ()) if isinstance(record.get('effects'), list) else ():
+                if isinstance(effect, dict) and isinstance(effect.get('add_item'), (str, int)):
+                    placed.add(record_id(effect['add_item']))
+        owners = {}
+        if placed:
+            for owner in (*self.world.rooms.values(), *self.world.items.values()):
+                if isinstance(owner, (Room, Container)):
+                    for item_id in placed.intersection(owner.contents):
+                        owners[item_id] = owner
+        return owners
+
+    def _add_interaction(self, record: dict[str, Any], owners: dict[int: Room | Container]) -> None:
+        """Compile the interaction defined by a record and add it to its room."""
+        try:
+            room = self.world.rooms[record_id(record['room'])]
+            key_id = record_id(record['item'])
+            if self.region is None and key_id not in self.world.items:
+                # the key item of an interaction in a region may be defined in another region
+                raise KeyError(key_id)
+            interaction = Interaction(
+                interaction_id=record_id(record['id']),
+                key_id=key_id,
+                message=record['message'],
+                condition=compile_condition(record['condition'], record_id) if 'condition' in record else None,
+                effects=[compile_effect(effect, self.world.rooms, self.world.items, record_id, owners)
+                         for effect in record.get('effects', ())],
+                repeatable=record.get('repeatable', False),
+                source=record)
+        except (KeyError, TypeError, ValueError) as error:
+            raise WorldDataError(f'invalid interaction {record.get("id")!r}: {error!r}') from error
+        room.add_interaction(interaction)
+
+    def _add_item(self, item: Item) -> None:
+        """Add an item to the world, and place it anywhere it was used before being defined."""
+        if item.item_id in self.world.items:
+            raise WorldDataError(f'item {item.item_id} is defined more than once')
+        self.world.add_item(item)
+        for owner in self._waiting_items.pop(item.item_id, ()):
+            self._insert(owner, item)
+
+    def _place_item(self, owner: Room | Container, item_id: int) -> None:
+        """Place an item in a room or container, or wait for the item to be defined."""
+        if item_id in self.world.items:
+            self._insert(owner, self.world.items[item_id])
+        else:
+            self._waiting_items.setdefault(item_id, []).append(owner)
+
+    @staticmethod
+    def _insert(owner: Room | Container, item: Item) -> None:
+        """Insert an item into a room or container."""
+        if isinstance(owner, Room):
+            owner.add_item(item)
+        else:
+            owner.insert_item(item)
+
+    def _add_room(self, record: dict[str, Any]) -> None:
+        """Add the room defined by a record to the world, and connect it to its neighbours."""
+        room = Room(name=record['name'], description=record['description'], room_id=record_id(record['id']),
+                    region=self.region, locked=record.get('locked', False),
+                    key_id=record_id(record['key']) if record.get('key') is not None else None)
+        if room.room_id in self.world.rooms:
+            raise WorldDataError(f'room {room.room_id} is defined more than once')
+        self.world.add_room(room)
+
+        for item_id in record.get('contents', ()):
+            self._place_item(room, record_id(item_id))
+        for direction, neighbour_id in record.get('neighbours', {}).items():
+            if direction not in DIRECTIONS:
+                raise WorldDataError(f'room {room.room_id} has an unknown direction {direction!r}')
+            neighbour_id = record_id(neighbour_id)
+            if neighbour_id in self.world.rooms:
+                self._connect(room, self.world.rooms[neighbour_id], direction)
+            else:
+                self._waiting_rooms.setdefault(neighbour_id, []).append((room, direction))
+        for direction, portal in record.get('portals', {}).items():
+            if direction not in DIRECTIONS:
+                raise WorldDataError(f'room {room.room_id} has an unknown direction {direction!r}')
+            room.add_portal(portal['region'], record_id(portal['room']), direction)
+        for neighbour, direction in self._waiting_rooms.pop(room.room_id, ()):
+            self._connect(neighbour, room, direction)
+
+    @staticmethod
+    def _connect(room: Room, neighbour: Room, direction: str) -> None:
+        """Connect two rooms, unless they are already connected (both rooms may list the other)."""
+        if room.neighbours.get(direction) is not neighbour:
+            room.add_neighbour(neighbour, direction)
+
+
+def read_records(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Read the records in a world data file one line at a time. Blank lines are skipped."""
+    with open(path, encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as error:
+                    raise WorldDataError(f'{path}:{line_number}: {error}') from error
+
+
+def load_world(path: str | Path, region: str | None = None) -> World:
+    """Load a world (or one region of a world) from a world data file."""
+    builder = WorldBuilder(region)
+    builder.add_records(read_records(path))
+    return builder.finish()
+
+
+def world_records(world: World) -> Iterator[dict[str, Any]]:
+    """Return the records that define a world, in the format of a world data file."""
+    for item in world.items.values():
+        record = {'type': 'container' if isinstance(item, Container) else 'item', 'id': item.item_id,
+                  'name': item.name, 'description': item.description, 'interactable': item.interactable}
+        if isinstance(item, Container):
+            record.update(locked=item.locked, key=item.key_id, contents=list(item.contents))
+        else:
+            record['portable'] = item.portable
+        if item.keywords != keywords_for(item.name):
+            record['keywords'] = sorted(item.keywords)
+        yield record
+
+    for room in world.rooms.values():
+        yield room_record(room)
+
+    for room in world.rooms.values():
+        for interactions in room.interactions.values():
+            for interaction in interactions:
+                if interaction.source is not None:
+                    yield interaction.source
+
+    if world.start is not None:
+        yield {'type': 'start', 'room': world.start.room_id}
+
+
+def room_record(room: Room) -> dict[str, Any]:
+    """Return the record that defines a room."""
+    record = {'type': 'room', 'id': room.room_id, 'name': room.name, 'description': room.description,
+              'contents': list(room.contents),
+              'neighbours': {direction: neighbour.room_id for direction, neighbour in room.neighbours.items()}}
+    if room.locked:
+        record.update(locked=True, key=room.key_id)
+    if room.portals:
+        record['portals'] = {direction: {'region': region, 'room': room_id}
+                             for direction, (region, room_id) in room.portals.items()}
+    return record
+
+
+def save_world(world: World, path: str | Path) -> None:
+    """Save a world to a world data file."""
+    with open(path, 'w', encoding='utf-8') as file:
+        for record in world_records(world):
+            file.write(json.dumps(record, separators=(',', ':')))
+            file.write('\n')
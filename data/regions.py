@@ -0,0 +1,209 @@
+"""Worlds that are split into regions, which are loaded when a player enters them and evicted when nobody is in them.
+
+A world that is split into regions is stored as a directory containing a world data file (see data/loader.py) for
+each region, named <region>.jsonl, and a file named world.json that gives the starting room in the form
+{"start": {"region": "village", "room": "room1"}}. Rooms only refer to rooms in other regions through portals, which
+hold the region and id of the room rather than the Room itself, so a region can be evicted without the rest of the
+world holding on to it.
+"""
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from data.loader import load_world, record_id, room_record, world_records
+from entities.item import Container, Item
+from entities.room import Room
+from entities.world import World
+
+
+class RegionMap:
+    """A world that is split into regions, of which only the most recently used are kept in memory.
+
+    directory: the directory that the world is stored in.
+    max_regions: the number of regions to keep in memory. Regions that players are in are never evicted, so more
+                 regions than this are loaded if more regions are occupied.
+    start_region: the region of the room that players start in.
+    start_id: the id of the room that players start in.
+    on_load: a function that is called with the rooms and items of every region when it is loaded, for example to add
+             the names of its items to the vocabulary of the parser; or None.
+    """
+    directory: Path
+    max_regions: int
+    start_region: str
+    start_id: int
+    on_load: Callable[[World], None] | None
+    _regions: OrderedDict[str, World]
+    _occupants: dict[str: int]
+    _lock: threading.RLock
+
+    def __init__(self, directory: str | Path, max_regions: int = 64,
+                 on_load: Callable[[World], None] | None = None) -> None:
+        self.directory = Path(directory)
+        self.max_regions = max_regions
+        self.on_load = on_load
+        with open(self.directory / 'world.json', encoding='utf-8') as file:
+            start = json.load(file)['start']
+        self.start_region = start['region']
+        self.start_id = record_id(start['room'])
+        self._regions = OrderedDict()  # ordered from least to most recently used
+        self._occupants = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, region: str) -> bool:
+        """Returns whether the region is loaded."""
+        return region in self._regions
+
+    def __len__(self) -> int:
+        """Returns the number of loaded regions."""
+        return len(self._regions)
+
+    @property
+    def start(self) -> Room:
+        """The room that players start in."""
+        return self.room(self.start_region, self.start_id)
+
+    def region(self, region: str) -> World:
+        """Return the rooms and items in a region, loading the region if it is not in memory."""
+        with self._lock:
+            world = self._regions.get(region)
+            if world is None:
+                world = self._regions[region] = load_world(self.directory / f'{region}.jsonl', region)
+                if self.on_load is not None:
+                    self.on_load(world)
+                self._evict()
+            else:
+                self._regions.move_to_end(region)
+            return world
+
+    def room(self, region: str, room_id: int) -> Room:
+        """Return the room with the given id in the given region, loading the region if it is not in memory."""
+        return self.region(region).room(room_id)
+
+    def enter(self, room: Room) -> None:
+        """Record that a player has entered a room, so that its region is not evicted."""
+        with self._lock:
+            self._occupants[room.region] = self._occupants.get(room.region, 0) + 1
+
+    def leave(self, room: Room) -> None:
+        """Record that a player has left a room. Once nobody is in a region, it can be evicted.
+
+        Preconditions:
+         - a player has entered the room and has not left it
+        """
+        with self._lock:
+            self._occupants[room.region] -= 1
+            if self._occupants[room.region] == 0:
+                del self._occupants[room.region]
+                self._evict()
+
+    def occupants(self, region: str) -> int:
+        """Return the number of players in a region."""
+        return self._occupants.get(region, 0)
+
+    def _evict(self) -> None:
+        """Evict the least recently used regions that nobody is in until at most max_regions are loaded. The most
+        recently used region is never evicted, since a player may be about to enter it.
+
+        Preconditions:
+         - self._lock is held by the caller
+        """
+        excess = len(self._regions) - self.max_regions
+        if excess <= 0:
+            return
+
+        for region in [region for region in list(self._regions)[:-1] if region not in self._occupants][:excess]:
+            del self._regions[region]
+
+
+def save_regions(world: World, directory: str | Path, region_of: Callable[[Room], str]) -> None:
+    """Split a world into regions and save it to a directory that RegionMap can load. region_of gives the region
+    that each room belongs to. Items are saved in the region of the room that contains them.
+
+    Interactions are saved in the region of their room. Their key items, and the items and rooms in their conditions
+    and in the effects that unlock things or take items, are referred to by id, so they can be in any region. The
+    room and item of an add_item effect are not, so they must be in the interaction's region; an item that starts in
+    no room is saved in the region of the interaction that places it.
+
+    Raise ValueError if an interaction places an item from, or into, another region.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    regions = {room.room_id: region_of(room) for room in world.rooms.values()}
+    items = {region: World() for region in regions.values()}  # the items saved in each region
+    item_regions = {}
+    for room in world.rooms.values():
+        for item in _item_tree(room.contents.values()):
+            items[regions[room.room_id]].add_item(item)
+            item_regions[item.item_id] = regions[room.room_id]
+
+    records = {region: [] for region in items}
+    for room in world.rooms.values():
+        region = regions[room.room_id]
+        records[region].append(_room_record(room, region, regions))
+        for interactions in room.interactions.values():
+            for interaction in interactions:
+                if interaction.source is None:
+                    continue
+                for item_id in _placed_items(interaction.source, region, regions, item_regions):
+                    for item in _item_tree([world.items[item_id]]):
+                        items[region].add_item(item)
+                        item_regions[item.item_id] = region
+                records[region].append(interaction.source)
+
+    for region, region_records in records.items():
+        with open(directory / f'{region}.jsonl', 'w', encoding='utf-8') as file:
+            for record in itertools.chain(world_records(items[region]), region_records):
+                file.write(json.dumps(record, separators=(',', ':')))
+                file.write('\n')
+
+    with open(directory / 'world.json', 'w', encoding='utf-8') as file:
+        json.dump({'start': {'region': regions[world.start.room_id], 'room': world.start.room_id}}, file)
+
+
+def _item_tree(items: Iterable[Item]) -> Iterator[Item]:
+    """Return the given items and every item inside them."""
+    pending = list(items)
+    while pending:
+        item = pending.pop()
+        yield item
+        if isinstance(item, Container):
+            pending.extend(item.contents.values())
+
+
+def _room_record(room: Room, region: str, regions: dict[int: str]) -> dict:
+    """Return the record that defines a room, as saved in the room's region. Neighbours in other regions become
+    portals.
+    """
+    record = room_record(room)
+    neighbours = record['neighbours']
+    record['neighbours'] = {direction: room_id for direction, room_id in neighbours.items()
+                            if regions[room_id] == region}
+    record['portals'] = record.get('portals', {}) | {direction: {'region': regions[room_id], 'room': room_id}
+                                                     for direction, room_id in neighbours.items()
+                                                     if regions[room_id] != region}
+    return record
+
+
+def _placed_items(interaction: dict, region: str, regions: dict[int: str], item_regions: dict[int: str]) -> list[int]:
+    """Return the ids of the items that start in no room and that an interaction in a region places in a room.
+
+    Raise ValueError if the interaction places an item in a room of another region, or places an item that is saved
+    in another region.
+    """
+    placed = []
+    for effect in interaction.get('effects', ()):
+        if 'add_item' not in effect:
+            continue
+        room_id, item_id = record_id(effect['room']), record_id(effect['add_item'])
+        if regions[room_id] != region:
+            raise ValueError(f'interaction {interaction["id"]!r} in region {region!r} places an item in region '
+                             f'{regions[room_id]!r}')
+        elif item_regions.get(item_id, region) != region:
+            raise ValueError(f'interaction {interaction["id"]!r} in region {region!r} places an item from region '
+                             f'{item_regions[item_id]!r}')
+        elif item_id not in item_regions:
+            placed.append(item_id)
+    return placed
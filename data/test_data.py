@@ -1,5 +1,6 @@
 """This module contains some test items and rooms that can be used to test the game."""
 
+from entities.ids import stable_id
 from entities.room import Room
 from entities.item import Item, Container
 
@@ -9,30 +10,31 @@ from entities.item import Item, Container
 
 # test_room1
 TEST_KEY = Item(name='Rusty Key',
-                item_id=hash('Key1'),
+                item_id=stable_id('Key1'),
                 description='The key is old and rusted.',
                 portable=True,
                 interactable=True,
                 )
 TEST_ITEM1 = Item(name='Sword',
-                  item_id=hash('Sword'),
+                  item_id=stable_id('Sword'),
                   description='A one-handed sword made of bronze, forged in a bygone era by an ancient '
                               'civilisation. It\'s still sharp.',
                   portable=True,
                   interactable=True
                   )
 TEST_CHEST = Container(name='Old Chest',
-                       item_id=hash('chest1'),
+                       item_id=stable_id('chest1'),
                        description='The chest is ancient: the wood is rotted and covered in moss. '
                                    'Yet, the lock still holds firm.',
                        interactable=True,
-                       locked=True
+                       locked=True,
+                       key_id=TEST_KEY.item_id
                        )
 TEST_CHEST.insert_item(TEST_ITEM1)
 
 # test_room2
 TEST_ITEM2 = Item(name='Ruby Pendant',
-                  item_id=hash('Ruby Pendant'),
+                  item_id=stable_id('Ruby Pendant'),
                   description='A pendant of gold with a large ruby inlaid in the middle. The gold is dull, '
                               'but the ruby still shines brightly despite the dim light in the room.',
                   portable=True,
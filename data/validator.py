@@ -0,0 +1,594 @@
+"""Checks world data files for mistakes that the loader lets through, before players run into them.
+
+The loader only rejects records that it cannot build. The validator also checks that:
+ - every room, item and interaction is defined once, and no two different ids in the file are converted to the same
+   id by stable_id (see entities/ids.py).
+ - every room and item that is referred to is defined, including the room and item of every interaction, and no
+   item is in more than one place.
+ - passages are consistent: no direction leads from a room to two different rooms, counting the passages that the
+   room's neighbours list back to it (see the preconditions of Room.add_neighbour).
+ - every room can be reached from the starting room, if locks are ignored.
+ - every locked container and room can be opened: the key of each locked container, and the item and conditions of
+   the interaction that unlocks each locked room, can be found without first getting past that lock.
+ - every item can be named: among the items in its room, including those in containers, some keyword refers to it
+   alone.
+
+Each problem is an error, which leaves part of the world unplayable, or a warning, which makes it harder to play.
+
+The file is split into chunks of lines that are checked by a pool of processes. Each process parses its chunk, and
+does every check that only needs the records in the chunk: it checks each record on its own, the passages and
+contents that its records list, and the keywords of the items in each room whose items are all in the chunk, which
+in a world written room by room is nearly every room. The chunks are then merged, mostly with operations on whole
+sets and dictionaries, and the checks that need the whole world are done by playing through it once. A world that is
+split into regions (see data/regions.py) is validated one region at a time, and portals are not followed.
+
+Usage: python -m data.validator WORLD_FILE [--processes N] [--limit N]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable
+
+from data.loader import record_id
+from entities.item import keywords_for
+from entities.room import DIRECTIONS
+
+CHUNKS_PER_PROCESS = 4  # more chunks than processes, so that a process that finishes early can take another
+MAX_CHUNKS = 1 << 16
+
+# the directions as numbers, so that a direction of a room is a single integer: room id * 8 + direction number
+_DIRECTIONS = tuple(DIRECTIONS)
+_NUMBERS = {direction: number for number, direction in enumerate(_DIRECTIONS)}
+_OPPOSITES = tuple(_NUMBERS[DIRECTIONS[direction]] for direction in _DIRECTIONS)
+
+
+class Problem:
+    """A problem with a world.
+
+    severity: 'error' or 'warning'.
+    check: the name of the check that found the problem.
+    message: a description of the problem.
+    line: the line of the world data file that the problem was found on, or None if it is not on one line.
+    """
+    severity: str
+    check: str
+    message: str
+    line: int | None
+
+    def __init__(self, severity: str, check: str, message: str, line: int | None = None) -> None:
+        self.severity = severity
+        self.check = check
+        self.message = message
+        self.line = line
+
+    def __str__(self) -> str:
+        where = f'line {self.line}: ' if self.line is not None else ''
+        return f'{self.severity}: {where}{self.message} [{self.check}]'
+
+
+class _Chunk:
+    """The records on a range of lines of a world data file, reduced to the fields that the checks need, and the
+    results of the checks that only need those records.
+
+    Lines are stored as positions: line * MAX_CHUNKS + the number of the chunk, where line is counted from the start
+    of the chunk, as the line of the chunk in the file is only known once every chunk before it has been read.
+
+    number: the number of the chunk.
+    lines: the number of lines in the chunk.
+    rooms: (id in the file, position, contents, locked) of each room, by id.
+    items: (id in the file, position, whether it is a container, contents, locked, key id, portable) of each item and
+           container, by id.
+    interactions: (id in the file, position, room id, item id, condition, effects) of each interaction, by id; the
+                  condition is a tuple (kind, value), and each effect is a tuple (kind, id, room id).
+    starts: (room id, position) of each start record.
+    owners: the position of the room or container holding each item that the chunk's records hold.
+    misplaced: (item id, position) for each item that a room or container holds when it is already somewhere else.
+    slots: the room that each direction of a room leads to, by room id * 8 + direction number.
+    neighbours: the ids of the rooms that each room leads to, according to the chunk's passages.
+    clashes: (room id * 8 + direction number, room id, other room id, position) for each direction that leads to two
+             different rooms.
+    keywords: the keywords of each item in the chunk that is not in a room of the chunk whose keywords were checked.
+    deferred: the ids of the rooms of the chunk holding items in other chunks, whose keywords are checked later.
+    problems: the other problems found in the chunk, at positions rather than lines.
+    """
+    number: int
+    lines: int
+    rooms: dict[int, tuple]
+    items: dict[int, tuple]
+    interactions: dict[int, tuple]
+    starts: list[tuple[int, int]]
+    owners: dict[int, int]
+    misplaced: list[tuple[int, int]]
+    slots: dict[int, int]
+    neighbours: dict[int, list[int]]
+    clashes: list[tuple[int, int, int, int]]
+    keywords: dict[int, tuple[str, ...]]
+    deferred: list[int]
+    problems: list[Problem]
+
+    def __init__(self, number: int = 0) -> None:
+        self.number = number
+        self.lines = 0
+        self.rooms = {}
+        self.items = {}
+        self.interactions = {}
+        self.starts = []
+        self.owners = {}
+        self.misplaced = []
+        self.slots = {}
+        self.neighbours = {}
+        self.clashes = []
+        self.keywords = {}
+        self.deferred = []
+        self.problems = []
+
+    def add(self, record: Any, line: int) -> None:
+        """Check a record on its own, and add it to the chunk."""
+        position = line * MAX_CHUNKS + self.number
+        try:
+            kind = record['type']
+            if kind == 'item' or kind == 'container':
+                container = kind == 'container'
+                item_id = record_id(record['id'])
+                contents = tuple(map(record_id, record.get('contents', ()))) if container else ()
+                key = record.get('key') if container else None
+                item = (record['id'], position, container, contents, container and record.get('locked', False),
+                        record_id(key) if key is not None else None, not container and record.get('portable', True))
+                keywords = record.get('keywords')
+                keywords = keywords_for(record['name']) if keywords is None else {word.lower() for word in keywords}
+                if self._define(self.items, item_id, item, 'item'):
+                    self.keywords[item_id] = tuple(keywords)
+                    self._place(contents, position)
+            elif kind == 'room':
+                room_id = record_id(record['id'])
+                contents = tuple(map(record_id, record.get('contents', ())))
+                if self._define(self.rooms, room_id, (record['id'], position, contents, record.get('locked', False)),
+                                'room'):
+                    self._place(contents, position)
+                    for direction, neighbour in record.get('neighbours', {}).items():
+                        number = _NUMBERS.get(direction)
+                        if number is None:
+                            self.problems.append(Problem('error', 'record', f'unknown direction {direction!r}',
+                                                         position))
+                            continue
+                        neighbour = record_id(neighbour)
+                        self._connect(room_id * 8 + number, neighbour, position)
+                        self._connect(neighbour * 8 + _OPPOSITES[number], room_id, position)
+            elif kind == 'interaction':
+                condition = _condition(record['condition']) if 'condition' in record else None
+                interaction = (record['id'], position, record_id(record['room']), record_id(record['item']),
+                               condition, tuple(_effect(effect) for effect in record.get('effects', ())))
+                self._define(self.interactions, record_id(record['id']), interaction, 'interaction')
+            elif kind == 'start':
+                self.starts.append((record_id(record['room']), position))
+            else:
+                self.problems.append(Problem('error', 'record', f'unknown record type {kind!r}', position))
+        except (KeyError, TypeError, ValueError, AttributeError) as error:
+            self.problems.append(Problem('error', 'record', f'invalid record: {error!r}', position))
+
+    def finish(self) -> None:
+        """Check the keywords of the items in each room whose items are all in the chunk, and keep the keywords of
+        the other items for the rooms in other chunks.
+        """
+        checked = set()
+        for room_id, room in self.rooms.items():
+            if not room[2]:
+                continue
+            scope = []
+            stack = list(room[2])
+            while stack:
+                item_id = stack.pop()
+                item = self.items.get(item_id)
+                if item is None:
+                    self.deferred.append(room_id)
+                    break
+                scope.append(item_id)
+                stack.extend(item[3])
+            else:
+                checked.update(scope)
+                self.problems.extend(_check_scope(room, [(self.items[item_id], self.keywords[item_id])
+                                                         for item_id in scope]))
+        self.keywords = {item_id: keywords for item_id, keywords in self.keywords.items() if item_id not in checked}
+
+    def _define(self, defined: dict[int, tuple], key: int, record: tuple, kind: str) -> bool:
+        """Add a record to the records of its kind, unless a record with the same id was already added."""
+        previous = defined.setdefault(key, record)
+        if previous is not record:
+            self.problems.append(_duplicate(kind, record, previous))
+            return False
+        return True
+
+    def _place(self, contents: tuple[int, ...], position: int) -> None:
+        """Record that the room or container at a position holds the items with the given ids."""
+        owners = self.owners
+        for item_id in contents:
+            if owners.setdefault(item_id, position) != position:
+                self.misplaced.append((item_id, position))
+
+    def _connect(self, slot: int, neighbour: int, position: int) -> None:
+        """Record that a direction of a room leads to a neighbour."""
+        existing = self.slots.get(slot)
+        if existing is None:
+            self.slots[slot] = neighbour
+            self.neighbours.setdefault(slot >> 3, []).append(neighbour)
+        elif existing != neighbour:
+            self.clashes.append((slot, existing, neighbour, position))
+
+
+def validate_file(path: str | Path, processes: int | None = None) -> list[Problem]:
+    """Validate a world data file, checking its chunks with a pool of processes, and return its problems."""
+    size = os.path.getsize(path)
+    processes = processes or os.cpu_count() or 1
+    count = max(1, min(processes * CHUNKS_PER_PROCESS if processes > 1 else 1, size >> 16, MAX_CHUNKS))
+    if count == 1:
+        chunks = [_read_chunk(path, 0, 0, size)]
+    else:
+        bounds = [size * number // count for number in range(count + 1)]
+        # the chunks are unpickled as they arrive, and none of them are garbage
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with ProcessPoolExecutor(processes) as pool:
+                chunks = list(pool.map(_read_chunk, [path] * count, range(count), bounds[:-1], bounds[1:]))
+        finally:
+            if collecting:
+                gc.enable()
+    return _check(chunks)
+
+
+def validate_records(records: Iterable[dict[str, Any]]) -> list[Problem]:
+    """Validate the records of a world in a single process (for example, those of data.loader.world_records), and
+    return their problems.
+    """
+    chunk = _Chunk()
+    for chunk.lines, record in enumerate(records, start=1):
+        chunk.add(record, chunk.lines)
+    chunk.finish()
+    return _check([chunk])
+
+
+def _read_chunk(path: str | Path, number: int, start: int, end: int) -> _Chunk:
+    """Read and check the chunk of a file made of the lines that start at or after byte start, and before byte end."""
+    with open(path, 'rb') as file:
+        file.seek(max(start - 1, 0))
+        data = file.read(end - max(start - 1, 0))
+        if data and not data.endswith(b'\n'):
+            data += file.readline()  # the rest of the last line
+    if start > 0:  # the rest of the line that the previous chunk started
+        data = data[data.find(b'\n') + 1:] if b'\n' in data else b''
+    lines = data.decode('utf-8', errors='replace').split('\n')
+    if lines[-1] == '':
+        lines.pop()
+
+    # nothing that is created is garbage, so the garbage collector would only waste time
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        chunk = _Chunk(number)
+        chunk.lines = len(lines)
+        decode = json.JSONDecoder().decode
+        for line_number, line in enumerate(lines, start=1):
+            if line.strip():
+                try:
+                    record = decode(line)
+                except ValueError as error:
+                    chunk.problems.append(Problem('error', 'record', f'invalid JSON: {error}',
+                                                  line_number * MAX_CHUNKS + number))
+                    continue
+                chunk.add(record, line_number)
+        chunk.finish()
+        return chunk
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _condition(spec: dict[str, Any]) -> tuple:
+    """Return a condition written as data as a tuple of its kind and value (see entities/interaction.py)."""
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise ValueError(f'a condition must have exactly one key: {spec!r}')
+    (kind, value), = spec.items()
+    if kind in ('all', 'any'):
+        return kind, tuple(_condition(part) for part in value)
+    elif kind == 'not':
+        return kind, _condition(value)
+    elif kind in ('has', 'visited', 'unlocked', 'unlocked_room', 'triggered'):
+        return kind, record_id(value)
+    raise ValueError(f'unknown condition {kind!r}')
+
+
+def _effect(spec: dict[str, Any]) -> tuple:
+    """Return an effect written as data as a tuple of its kind, the id it acts on, and the room it acts in."""
+    for kind in ('unlock', 'unlock_room', 'add_item', 'remove_item'):
+        if kind in spec:
+            return kind, record_id(spec[kind]), record_id(spec['room']) if kind == 'add_item' else None
+    raise ValueError(f'unknown effect {spec!r}')
+
+
+def _duplicate(kind: str, record: tuple, previous: tuple) -> Problem:
+    """Return the problem with a record whose id is the id of a record before it."""
+    if previous[0] == record[0]:
+        return Problem('error', 'duplicate_id', f'{kind} {record[0]!r} is defined more than once', record[1])
+    return Problem('error', 'id_collision', f'{kind} {record[0]!r} has the same id as {kind} {previous[0]!r}',
+                   record[1])
+
+
+def _check_scope(room: tuple, scope: list[tuple[tuple, tuple[str, ...]]]) -> list[Problem]:
+    """Return a problem for each item in a room that cannot be named, given the items in the room (including those
+    in containers) and their keywords.
+    """
+    if len(scope) < 2:
+        return []
+    counts = Counter(keyword for _, keywords in scope for keyword in keywords)
+    return [Problem('warning', 'keywords', f'item {item[0]!r} cannot be named in room {room[0]!r}: each of its '
+                                           f'keywords also names another item there', item[1])
+            for item, keywords in scope if all(counts[keyword] > 1 for keyword in keywords)]
+
+
+def _check(chunks: list[_Chunk]) -> list[Problem]:
+    """Merge the chunks of a file, run the checks that need the whole world, and return every problem found."""
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        problems = _merge(chunks)
+    finally:
+        if collecting:
+            gc.enable()
+
+    offsets = [0]  # the number of lines before each chunk
+    for chunk in chunks:
+        offsets.append(offsets[-1] + chunk.lines)
+    for problem in problems:
+        if problem.line is not None:
+            line, number = divmod(problem.line, MAX_CHUNKS)
+            problem.line = offsets[number] + line
+    return problems
+
+
+def _merge(chunks: list[_Chunk]) -> list[Problem]:
+    """Merge the chunks of a file, and return every problem with the world, at positions rather than lines."""
+    problems = []
+    rooms, items, interactions, owners, slots, neighbours, keywords = {}, {}, {}, {}, {}, {}, {}
+    misplaced, clashes, deferred = [], [], []
+    start = None
+    for chunk in chunks:
+        problems.extend(chunk.problems)
+        for defined, records, kind in ((rooms, chunk.rooms, 'room'), (items, chunk.items, 'item'),
+                                       (interactions, chunk.interactions, 'interaction')):
+            for key in defined.keys() & records.keys():
+                problems.append(_duplicate(kind, records.pop(key), defined[key]))
+            defined.update(records)
+        misplaced.extend(chunk.misplaced)
+        misplaced.extend((item_id, chunk.owners.pop(item_id)) for item_id in owners.keys() & chunk.owners.keys())
+        owners.update(chunk.owners)
+        clashes.extend(chunk.clashes)
+        clashes.extend((slot, slots[slot], chunk.slots[slot], None) for slot in slots.keys() & chunk.slots.keys()
+                       if slots[slot] != chunk.slots[slot])
+        slots.update(chunk.slots)
+        joined = {room_id: neighbours[room_id] + chunk.neighbours[room_id]
+                  for room_id in neighbours.keys() & chunk.neighbours.keys()}
+        neighbours.update(chunk.neighbours)
+        neighbours.update(joined)
+        keywords.update(chunk.keywords)
+        deferred.extend(chunk.deferred)
+        if chunk.starts:
+            start, start_position = chunk.starts[-1]
+
+    if start is not None and start not in rooms:
+        problems.append(Problem('error', 'reference', f'the starting room {start} is never defined', start_position))
+        start = None
+    if start is None:
+        start = next(iter(rooms), None)
+    if start is None:
+        problems.append(Problem('error', 'reference', 'the world has no rooms'))
+        return problems
+
+    for item_id, position in misplaced:
+        name = repr(items[item_id][0]) if item_id in items else item_id
+        problems.append(Problem('error', 'reference', f'item {name} is in more than one place', position))
+    for item_id in owners.keys() - items.keys():
+        problems.append(Problem('error', 'reference', 'an item that is never defined is held here', owners[item_id]))
+    for item in items.values():
+        if item[4] and item[5] is None:
+            problems.append(Problem('error', 'solvability', f'container {item[0]!r} is locked, but has no key',
+                                    item[1]))
+        elif item[4] and item[5] not in items:
+            problems.append(Problem('error', 'reference', f'the key of container {item[0]!r} is never defined',
+                                    item[1]))
+    for room_id in neighbours.keys() - rooms.keys():
+        for neighbour in neighbours[room_id]:
+            if neighbour in rooms:
+                problems.append(Problem('error', 'reference', f'room {rooms[neighbour][0]!r} leads to a room that is '
+                                                              f'never defined', rooms[neighbour][1]))
+    for slot, existing, neighbour, position in clashes:
+        room_id, number = divmod(slot, 8)
+        if room_id in rooms and existing in rooms and neighbour in rooms:
+            problems.append(Problem('error', 'neighbours', f'{_DIRECTIONS[number]} leads from room '
+                                                           f'{rooms[room_id][0]!r} to both {rooms[existing][0]!r} '
+                                                           f'and {rooms[neighbour][0]!r}',
+                                    position if position is not None else rooms[room_id][1]))
+    for interaction_id, position, room_id, item_id, _, _ in interactions.values():
+        if room_id not in rooms:
+            problems.append(Problem('error', 'reference', f'interaction {interaction_id!r} takes place in a room that '
+                                                          f'is never defined', position))
+        if item_id not in items:
+            problems.append(Problem('error', 'reference', f'the item of interaction {interaction_id!r} is never '
+                                                          f'defined', position))
+
+    problems.extend(_play(rooms, items, list(interactions.values()), neighbours, start))
+    for room_id in deferred:
+        scope = []
+        stack = list(rooms[room_id][2])
+        while stack:
+            item_id = stack.pop()
+            if item_id in items and item_id in keywords:
+                scope.append((items[item_id], keywords[item_id]))
+                stack.extend(items[item_id][3])
+        problems.extend(_check_scope(rooms[room_id], scope))
+    return problems
+
+
+def _play(rooms: dict[int, tuple], items: dict[int, tuple], interactions: list[tuple],
+          neighbours: dict[int, list[int]], start: int) -> list[Problem]:
+    """Play a world from the starting room, visiting every room and finding every item that can be reached, opening
+    every container whose key has been found, and triggering every interaction that can happen, until nothing more
+    can be done. Return a problem for each locked room and container that was found but never opened, and for each
+    room that cannot be reached even if locks are ignored.
+
+    The conditions of interactions are approximated: an item counts as held once it has been found, and a 'not'
+    condition is assumed to be satisfiable.
+    """
+    visited, opened, unlocked_rooms, triggered = set(), set(), set(), set()
+    found = {}  # the items that have been found, and the room each was found in
+    blocked = {}  # the locked rooms next to visited rooms, and the room each was found from
+    waiting = {}  # the ids of keys that have not been found, and the containers waiting for them
+    placed = {}  # the rooms that have not been visited, and the items that interactions have put in them
+    by_room = {}
+    for interaction in interactions:
+        by_room.setdefault(interaction[2], []).append(interaction)
+    pending = []  # the interactions in visited rooms that have not happened yet
+    sets = {'has': found, 'visited': visited, 'unlocked': opened, 'unlocked_room': unlocked_rooms,
+            'triggered': triggered}
+
+    def find(item_ids: Iterable[int], room_id: int) -> None:
+        stack = list(item_ids)
+        while stack:
+            item_id = stack.pop()
+            item = items.get(item_id)
+            if item is None or item_id in found:
+                continue
+            found[item_id] = room_id
+            _, _, container, contents, locked, key, portable = item
+            if container and (not locked or (key in found and items[key][6])):
+                opened.add(item_id)
+                stack.extend(contents)
+            elif container:
+                waiting.setdefault(key, []).append(item_id)
+            if portable and item_id in waiting:
+                for container_id in waiting.pop(item_id):
+                    opened.add(container_id)
+                    stack.extend(items[container_id][3])
+
+    def visit(room_id: int) -> None:
+        frontier = [room_id]
+        visited.add(room_id)
+        while frontier:
+            room_id = frontier.pop()
+            for item_id in rooms[room_id][2]:
+                item = items.get(item_id)
+                if item is not None and not item[2] and item_id not in waiting and item_id not in found:
+                    found[item_id] = room_id  # most items are not containers or keys, so skip calling find
+                else:
+                    find((item_id,), room_id)
+            if room_id in placed:
+                find(placed.pop(room_id), room_id)
+            if room_id in by_room:
+                pending.extend(by_room[room_id])
+            for neighbour in neighbours.get(room_id, ()):
+                if neighbour not in visited and neighbour in rooms:
+                    if rooms[neighbour][3] and neighbour not in unlocked_rooms:
+                        blocked.setdefault(neighbour, room_id)
+                    else:
+                        visited.add(neighbour)
+                        frontier.append(neighbour)
+
+    def holds(condition: tuple | None) -> bool:
+        if condition is None:
+            return True
+        kind, value = condition
+        if kind == 'all':
+            return all(holds(part) for part in value)
+        elif kind == 'any':
+            return any(holds(part) for part in value)
+        elif kind == 'not':
+            return True
+        return value in sets[kind]
+
+    def trigger(interaction: tuple) -> bool:
+        interaction_id, _, room_id, item_id, condition, effects = interaction
+        if item_id not in found or not (items[item_id][6] or found[item_id] == room_id) or not holds(condition):
+            return False
+        triggered.add(interaction_id)
+        for kind, target, target_room in effects:
+            if kind == 'unlock_room':
+                unlocked_rooms.add(target)
+                if target in blocked:
+                    del blocked[target]
+                    visit(target)
+            elif kind == 'unlock' and target in items and target not in opened:
+                opened.add(target)
+                if target in found:
+                    find(items[target][3], found[target])
+            elif kind == 'add_item':
+                if target_room in visited:
+                    find([target], target_room)
+                else:
+                    placed.setdefault(target_room, []).append(target)
+        return True
+
+    visit(start)
+    while pending:
+        current = pending[:]
+        pending.clear()
+        remaining = [interaction for interaction in current if not trigger(interaction)]
+        if len(remaining) == len(current):
+            break  # nothing happened, so nothing more can happen
+        pending.extend(remaining)
+
+    problems = []
+    for room_id, found_from in blocked.items():
+        problems.append(Problem('error', 'solvability', f'room {rooms[room_id][0]!r}, which is locked, can never '
+                                                        f'be opened from room {rooms[found_from][0]!r}',
+                                rooms[room_id][1]))
+    for item_id in found:
+        item = items[item_id]
+        if item[2] and item_id not in opened:
+            problems.append(Problem('error', 'solvability', f'container {item[0]!r}, which is locked, can never be '
+                                                            f'opened: its key is never found, or is not portable',
+                                    item[1]))
+
+    # a room that was not visited, but can be reached if locks are ignored, is reached through a blocked room
+    if len(visited) < len(rooms):
+        behind = set(blocked)
+        frontier = list(blocked)
+        while frontier:
+            frontier = [neighbour for room_id in frontier for neighbour in neighbours.get(room_id, ())
+                        if neighbour in rooms and neighbour not in visited and neighbour not in behind
+                        and not behind.add(neighbour)]
+        for room_id in rooms.keys() - visited - behind:
+            problems.append(Problem('warning', 'reachability', f'room {rooms[room_id][0]!r} cannot be reached from '
+                                                               f'the starting room', rooms[room_id][1]))
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('world', help='the world data file to validate')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='the number of processes')
+    parser.add_argument('--limit', type=int, default=10,
+                        help='the number of problems of each kind to print; the rest are only counted')
+    args = parser.parse_args()
+
+    problems = validate_file(args.world, args.processes)
+    problems.sort(key=lambda problem: (problem.severity, problem.check, problem.line or 0))
+    counts = Counter((problem.severity, problem.check) for problem in problems)
+    printed = Counter()
+    for problem in problems:
+        kind = (problem.severity, problem.check)
+        printed[kind] += 1
+        if printed[kind] <= args.limit:
+            print(problem)
+        elif printed[kind] == args.limit + 1:
+            print(f'... and {counts[kind] - args.limit} more {problem.severity}s [{problem.check}]')
+    errors = sum(count for (severity, _), count in counts.items() if severity == 'error')
+    print(f'{errors} errors, {len(problems) - errors} warnings')
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
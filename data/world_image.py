@@ -0,0 +1,173 @@
+"""Saves worlds to, and loads worlds from, world images: pre-built worlds that load much faster than world data files.
+
+A world image holds the state of every room and item of a built world, pickled, so loading it creates the rooms and
+items directly instead of parsing JSON records and running the WorldBuilder. The image is flat (see save_image):
+pickle never has to follow the map from room to room, however large it is. An image can also hold the structures
+that are compiled from the world when a server starts (such as its RoomGraph and Parser), so that they are loaded
+rather than compiled again.
+
+An image is built from a world data file, and records the SHA-256 hash of that file. load_world_fast only loads the
+image if it was built from the current contents of the data file by the same version of this module, and otherwise
+loads the data file, so a stale image makes startup slower but never changes the world.
+
+The web server's image is built by running app/game_factory.py (see GAME_WORLD_IMAGE there).
+"""
+import copyreg
+import gc
+import hashlib
+import itertools
+import logging
+import os
+import pickle
+import tempfile
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable
+
+from data.loader import load_world
+from entities.item import EMPTY, Item, Container
+from entities.room import Room
+from entities.world import World
+
+# the version of the image format, which changes whenever the slots of rooms or items change, or the attributes of
+# the structures compiled from worlds
+FORMAT = 4
+SUFFIX = '.image'
+
+logger = logging.getLogger(__name__)
+
+
+def _slots(cls: type) -> tuple[str, ...]:
+    """Return the names of the slots of a class, including those of its base classes."""
+    return tuple(name for klass in reversed(cls.__mro__) for name in vars(klass).get('__slots__', ()))
+
+
+# the classes that can be stored in an image, and the slots whose values are stored for each of their instances
+_CLASSES = (Room, Item, Container)
+_SLOTS = {cls: _slots(cls) for cls in _CLASSES}
+
+
+class WorldImageError(Exception):
+    """Raised when a world image cannot be loaded."""
+
+
+class _ImagePickler(pickle.Pickler):
+    """Pickles rooms and items without their state, and the EMPTY dictionary by reference."""
+
+    def reducer_override(self, obj):
+        if obj is EMPTY:
+            return 'EMPTY'  # the name of the module global, so that every room and item shares it again
+        elif type(obj) in _SLOTS:
+            return copyreg.__newobj__, (type(obj),)
+        return NotImplemented
+
+
+def file_hash(path: str | Path) -> str:
+    """Return the SHA-256 hash of the contents of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_path(world_file: str | Path) -> Path:
+    """Return the default path of the image of a world data file, which is next to it."""
+    world_file = Path(world_file)
+    return world_file.with_name(world_file.name + SUFFIX)
+
+
+def save_image(world: World, path: str | Path, source_hash: str | None = None,
+               compiled: dict[str, Any] | None = None) -> None:
+    """Save a world to a world image. source_hash is the hash of the world data file it was loaded from, if any, and
+    compiled is a dictionary of names and structures compiled from the world, which are saved with it.
+
+    The rooms and items are pickled twice with the same pickler. The first time, they are pickled without their
+    state, so that pickle memoizes them; the second time, the values of their slots are pickled as a column per slot,
+    in which every reference to a room or item is a reference to the memo. Nothing is pickled recursively, and when
+    the image is loaded, each column is assigned to the slot of every room or item with a single call to map.
+
+    The image is written to a temporary file of its own that replaces path once it is complete, so a server
+    starting at the same time never reads half an image, and servers that rebuild the image at the same time never
+    write to the same file.
+    """
+    objects = {cls: [] for cls in _CLASSES}
+    for entity in itertools.chain(world.rooms.values(), world.items.values()):
+        objects[type(entity)].append(entity)
+    columns = [[[getattr(entity, name) for entity in objects[cls]] for name in _SLOTS[cls]] for cls in _CLASSES]
+
+    path = Path(path)
+    descriptor, temporary = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=path.parent)
+    try:
+        with open(descriptor, 'wb') as file:
+            pickle.dump({'format': FORMAT, 'source': source_hash}, file, pickle.HIGHEST_PROTOCOL)
+            pickler = _ImagePickler(file, pickle.HIGHEST_PROTOCOL)
+            pickler.dump(([objects[cls] for cls in _CLASSES], list(world.rooms.values()),
+                          list(world.items.values()), world.start))
+            pickler.dump((columns, compiled or {}))
+        os.chmod(temporary, 0o644)  # mkstemp makes the file readable only by its owner, unlike open
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def load_image(path: str | Path, source_hash: str | None = None) -> tuple[World, dict[str, Any]]:
+    """Load a world, and the structures compiled from it, from a world image. If source_hash is given, the image
+    must have been built from a world data file with that hash.
+
+    Raises WorldImageError if the image is in an old format, or was built from a different world data file.
+    """
+    # every object in the image outlives the load, so the garbage collector would only waste time looking at them
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, 'rb') as file:
+            header = pickle.load(file)
+            if not isinstance(header, dict) or header.get('format') != FORMAT:
+                raise WorldImageError(f'{path} is not a world image in format {FORMAT}')
+            elif source_hash is not None and header.get('source') != source_hash:
+                raise WorldImageError(f'{path} was built from a different world data file')
+
+            unpickler = pickle.Unpickler(file)
+            objects, rooms, items, start = unpickler.load()
+            columns, compiled = unpickler.load()
+
+        for cls, instances, class_columns in zip(_CLASSES, objects, columns):
+            for name, column in zip(_SLOTS[cls], class_columns):
+                deque(map(getattr(cls, name).__set__, instances, column), maxlen=0)
+    finally:
+        if collecting:
+            gc.enable()
+
+    world = World()
+    world.rooms = {room.room_id: room for room in rooms}
+    world.items = {item.item_id: item for item in items}
+    world.start = start
+    return world, compiled
+
+
+def load_world_fast(world_file: str | Path, image: str | Path | None = None,
+                    compile_world: Callable[[World], dict[str, Any]] | None = None,
+                    build: bool = False) -> tuple[World, dict[str, Any]]:
+    """Load a world from its image if the image is up to date, and from its world data file otherwise, and return
+    it along with the structures compiled from it by compile_world. image is the path of the image, which defaults to
+    image_path(world_file). If build is True, a missing or stale image is rebuilt from the data file, so that the next
+    load is fast.
+    """
+    image = image_path(world_file) if image is None else Path(image)
+    source_hash = file_hash(world_file)
+    if image.exists():
+        try:
+            return load_image(image, source_hash)
+        except (WorldImageError, pickle.UnpicklingError, EOFError, AttributeError, ValueError) as error:
+            logger.warning('Loading %s instead of its image: %s', world_file, error)
+
+    world = load_world(world_file)
+    compiled = compile_world(world) if compile_world is not None else {}
+    if build:
+        try:
+            save_image(world, image, source_hash, compiled)
+        except OSError as error:
+            logger.warning('Could not save the image of %s: %s', world_file, error)
+    return world, compiled
@@ -0,0 +1,42 @@
+"""The commands that the player can use, and every word that can be used to refer to each command.
+
+The Controller dispatches commands by name, and the engine's Parser compiles the aliases into its vocabulary, so a
+command is resolved from the first words of the player's input with a dictionary lookup per word, no matter how many
+commands and aliases the game defines.
+"""
+# a dictionary of direction aliases and the direction they refer to
+DIRECTION_ALIASES = {'n': 'north', 'e': 'east', 's': 'south', 'w': 'west', 'u': 'up', 'd': 'down',
+                     'north': 'north', 'east': 'east', 'south': 'south', 'west': 'west', 'up': 'up', 'down': 'down'}
+
+# a dictionary of command names and the words that can be used to refer to them
+COMMANDS = {'quit': frozenset({'quit', 'q'}),
+            'move': frozenset({'move', 'go', 'walk'}).union(DIRECTION_ALIASES),  # directions work as move
+            'goto': frozenset({'goto', 'travel'}),
+            'inventory': frozenset({'inventory', 'i'}),
+            'room': frozenset({'room', 'look', 'l'}),
+            'take': frozenset({'take', 'grab', 'get'}),
+            'drop': frozenset({'drop'}),
+            'use': frozenset({'use'}),
+            'unlock': frozenset({'unlock', 'open'}),
+            'inspect': frozenset({'inspect', 'examine', 'describe'}),
+            'help': frozenset({'help', 'h'})
+            }
+
+# a dictionary of every alias and the name of the command it refers to
+VERBS = {alias: command for command, aliases in COMMANDS.items() for alias in aliases}
+
+
+def direction_of(words: list[str]) -> str | None:
+    """Given the words of a move command, return the full name of the direction to move in, or None if no
+    direction was given. The direction is either the verb itself ("n") or the word after it ("go north").
+
+    Preconditions:
+     - len(words) >= 1
+     - VERBS[words[0]] == 'move'
+    """
+    if words[0] in DIRECTION_ALIASES:
+        return DIRECTION_ALIASES[words[0]]
+    elif len(words) > 1:
+        return DIRECTION_ALIASES.get(words[1], words[1])
+    else:
+        return None
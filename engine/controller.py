@@ -1,68 +1,131 @@
 """Interprets player input into valid input data for the GameInteractor."""
-from engine.gameinteractor import GameInteractor
+from typing import Callable
 
-VALID_COMMANDS = {'help', 'go', 'inventory', 'room'}  # TODO: define allowed commands
+from engine.commands import VERBS
+from engine.gameinteractor import GameInteractor
+from engine.interactor_input_data import InteractorData
+from engine.parser import VERB_PHRASES, Parser
 
 
 class Controller:
     """Interprets player input into valid input data for the GameInteractor.
 
     interactor: the game interactor.
+    parser: the parser of the player's input. Parsers can be shared between players in the same world.
     """
     interactor: GameInteractor
+    parser: Parser
 
-    def __init__(self, interactor: GameInteractor):
+    def __init__(self, interactor: GameInteractor, parser: Parser | None = None):
         self.interactor = interactor
+        self.parser = Parser() if parser is None else parser
 
-    def parse_input(self, user_input: str) -> list[str] | None:
+    def parse_input(self, user_input: str) -> list[str]:
         """Given an input string by the player, parse it and execute the associated
-        command.
+        command. In a shared world, the output starts with the news of what other players have done near the player
+        since their last command.
         """
-        words = user_input.lower().strip().split()
+        data = self.parser.parse(user_input, self.interactor.find_items)
+        output = DISPATCH.get(data.command, Controller._invalid)(self, data)
+        messages = self.interactor.messages()
+        return messages + output if messages else output
 
-        if len(words) < 1:
-            return self.interactor.handle_invalid_event()
-        elif words[0] in VALID_COMMANDS:
-            return self.parse_command(words)
-        else:
-            return self.interactor.handle_invalid_event()
+    def suggest(self, user_input: str) -> list[str]:
+        """Given the player's partial input, return the commands it could be completed to, or the commands it may be
+        a misspelling of, for the player to choose from as they type.
+        """
+        return self.parser.suggest(user_input, self.interactor.item_names)
 
     def parse_command(self, words: list[str]) -> list[str]:
-        """Given a valid command, process the given words and execute the corresponding
-        GameInteractor method.
-        TODO: finish handling for each interaction
+        """Given the words of a command, execute it in the same way as parse_input, and return its output.
 
         Preconditions:
          - len(words) >= 1
-         - words[0] in VALID_COMMANDS
+         - words starts with one of VALID_COMMANDS, some of which are more than one word ('pick up')
         """
-        verb = words[0]
-
-        if verb == 'help':
-            return self.interactor.get_help()
-        elif verb == 'inventory':
-            return self.interactor.open_inventory()
-        elif verb == 'room':
-            return self.interactor.describe_room()
-        elif len(words) > 1:
-            match verb:
-                case 'go':
-                    return self.interactor.move_rooms(words[1])
-                case 'take':
-                    ...
-                case 'drop':
-                    ...
-                case 'open':
-                    ...
-                case 'inspect':
-                    ...
-                case 'use':
-                    ...
-        else:
-            return self.interactor.handle_invalid_event()
+        return self.parse_input(' '.join(words))
 
     def announce_room(self) -> list[str]:
         """Call the appropriate GameInteractor function to return the name and description of the room
         when first initialising the game.
         """
         return self.interactor.announce_room()
+
+    def news(self) -> list[str]:
+        """In a shared world, return the news of what other players have done near the player that has arrived
+        since the player's last command, and clear it, so that it can be sent to the player before their next command.
+        """
+        return self.interactor.messages()
+
+    def listen(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """In a shared world, call listener whenever news arrives for the player (see GameInteractor.listen). Return
+        a function that stops calling it.
+        """
+        return self.interactor.listen(listener)
+
+    def _help(self, data: InteractorData) -> list[str]:
+        """Handle the help command."""
+        return self.interactor.get_help()
+
+    def _inventory(self, data: InteractorData) -> list[str]:
+        """Handle the inventory command."""
+        return self.interactor.open_inventory()
+
+    def _room(self, data: InteractorData) -> list[str]:
+        """Handle the room command."""
+        return self.interactor.describe_room()
+
+    def _move(self, data: InteractorData) -> list[str]:
+        """Handle the move command."""
+        return self.interactor.move_rooms(data.direction)
+
+    def _goto(self, data: InteractorData) -> list[str]:
+        """Handle the goto command."""
+        return self.interactor.goto(data.room_name)
+
+    def _take(self, data: InteractorData) -> list[str]:
+        """Handle the take command."""
+        return self.interactor.pickup_item(data.item_ids[0])
+
+    def _drop(self, data: InteractorData) -> list[str]:
+        """Handle the drop command."""
+        return self.interactor.drop_item(data.item_ids[0])
+
+    def _inspect(self, data: InteractorData) -> list[str]:
+        """Handle the inspect command."""
+        return self.interactor.inspect_item(data.item_ids[0])
+
+    def _use(self, data: InteractorData) -> list[str]:
+        """Handle the use command."""
+        return self.interactor.use_item(data.item_ids[0])
+
+    def _unlock(self, data: InteractorData) -> list[str]:
+        """Handle the unlock command, whose items are the container and the key."""
+        return self.interactor.unlock_container(data.item_ids[0], data.item_ids[1])
+
+    def _unknown_item(self, data: InteractorData) -> list[str]:
+        """Handle a command naming an item that is not in reach, or that could be one of several items."""
+        return self.interactor.handle_unknown_item([self.interactor.find_item(item_id)[0]
+                                                    for item_id in data.item_ids])
+
+    def _invalid(self, data: InteractorData) -> list[str]:
+        """Handle input that is not a valid command."""
+        return self.interactor.handle_invalid_event()
+
+
+# a dictionary of the name of every command the player can use, and the Controller method that handles it
+DISPATCH = {'help': Controller._help,
+            'inventory': Controller._inventory,
+            'room': Controller._room,
+            'move': Controller._move,
+            'goto': Controller._goto,
+            'take': Controller._take,
+            'drop': Controller._drop,
+            'inspect': Controller._inspect,
+            'unlock': Controller._unlock,
+            'use': Controller._use,
+            'unknown_item': Controller._unknown_item,
+            'invalid': Controller._invalid}
+# every verb and verb phrase the player can start a command with, which refer to the commands in DISPATCH. DISPATCH
+# also handles the results of parsing that are not commands ('unknown_item' and 'invalid'), which have no verbs.
+VALID_COMMANDS = frozenset(verb for verb, command in (VERBS | VERB_PHRASES).items() if command in DISPATCH)
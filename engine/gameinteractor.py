@@ -3,19 +3,75 @@
 This contains the GameInteractor that contains the needed logic to manipulate entities, and output the relevant data
 to the Presenter to be shown to the player.
 """
+from contextlib import AbstractContextManager, nullcontext
+from typing import TYPE_CHECKING, Callable
+
+from engine.item_index import ItemIndex
+from engine.navigation import RoomGraph
+from engine.rendering import Renderer
+from engine.suggestions import Vocabulary
 from entities.player import Player
 from entities.item import Item, Container
 
+if TYPE_CHECKING:  # only needed by games that use them, so not imported when the server starts
+    from data.regions import RegionMap
+    from engine.journal import SessionJournal
+    from engine.shared_world import Occupant, SharedWorld
+
+MAX_NAMES = 5  # the most other players named when describing a room in a shared world
+
+_UNLOCKED = nullcontext()  # the lock of a room in a world that is not shared, which is no lock at all
+
 
 class GameInteractor:
-    """TODO: write docstring
+    """The game of a single session, which carries out the commands of one player.
 
-    TODO: change all command methods to return a list of strings instead
+    Every session has its own GameInteractor and Player, but they share the world template, which is never changed:
+    the player's changes to the world are recorded in their WorldState (player.world), so one session never sees
+    another's. A GameInteractor is not thread-safe, and is only used by one thread at a time, which holds the lock of
+    its session (see SessionManager.session). In a shared world, where the views of every player share one WorldState
+    (see engine/shared_world.py), a command also holds the lock of the player's location while it reads or changes
+    the contents of the room (see _lock).
+
+    player: the player.
+    index: an index of the items within the player's reach.
+    regions: the regions of the map if the world is split into regions that are loaded as the player moves into
+             them; otherwise None.
+    graph: the compiled map used to find paths between rooms, or None if paths cannot be found.
+    journal: the journal that records the changes the player makes to the game, or None if they are not recorded.
+    renderer: renders and caches the output that lists the contents of rooms and containers.
+    shared: the shared world that the player is playing in with other players, or None if they are playing alone.
+    occupant: the player as the other players in the shared world see them, or None if they are playing alone.
     """
     player: Player
+    index: ItemIndex
+    regions: 'RegionMap | None'
+    graph: RoomGraph | None
+    journal: 'SessionJournal | None'
+    renderer: Renderer
+    shared: 'SharedWorld | None'
+    occupant: 'Occupant | None'
+    _generation: int  # the generation of the player's location when the index was last built in a shared world
 
-    def __init__(self, player: Player) -> None:
+    def __init__(self, player: Player, regions: 'RegionMap | None' = None, graph: RoomGraph | None = None,
+                 journal: 'SessionJournal | None' = None, shared: 'SharedWorld | None' = None,
+                 occupant: 'Occupant | None' = None) -> None:
+        """Preconditions:
+         - shared is None or (occupant is not None and player.world is a view of shared)
+        """
         self.player = player
+        self.regions = regions
+        self.graph = graph
+        self.journal = journal
+        self.renderer = Renderer(player.world)
+        self.shared = shared
+        self.occupant = occupant
+        if regions is not None:
+            regions.enter(player.location)
+        if shared is not None:
+            shared.enter(occupant, player.location)
+        with self._lock():
+            self._reindex()
 
     def get_help(self) -> list[str]:
         """Return the help command.
@@ -37,73 +93,328 @@ class GameInteractor:
             return output
 
     def describe_room(self) -> list[str]:
-        """Return the description of the room."""
-        return [self.player.location.description]
+        """Return the description of the room, and the other players in it in a shared world."""
+        return [self.player.location.description] + self._company()
 
     def announce_room(self) -> list[str]:
         """Return the name of the room. If it is the first time visiting this room, return the description
         of the room as well.
         """
-        if self.player.location.visited:
-            return [self.player.location.name]
+        if self.player.world.has_visited(self.player.location):
+            return [self.player.location.name] + self._company()
         else:
-            self.player.location.visited = True
-            return [self.player.location.name, self.player.location.description]
+            self.player.world.visit(self.player.location)
+            self._record('visited')
+            return [self.player.location.name, self.player.location.description] + self._company()
 
     def move_rooms(self, direction: str) -> list[str]:
-        """Attempt to move the player into a neighbouring room."""
-        neighbouring_rooms = self.player.location.neighbours
-        if direction in neighbouring_rooms:
-            self.player.location = neighbouring_rooms[direction]
-            if not self.player.location.visited:
+        """Attempt to move the player into a neighbouring room. If the room is in a region that is not loaded, it
+        is loaded first. In a shared world, the players in the rooms the player leaves and enters are told.
+        """
+        location = self.player.location
+        if direction in location.neighbours:
+            room = location.neighbours[direction]
+        elif direction in location.portals and self.regions is not None:
+            room = self.regions.room(*location.portals[direction])
+        else:
+            room = None
+
+        if room is not None and self.player.world.is_locked(room):
+            return ["That way is locked."]
+        elif room is not None:
+            if self.shared is None:
+                self.index.remove_contents(location)
+                self.player.location = room
+                self.index.add_contents(room)
+            else:
+                self.player.location = room
+                self.shared.move(self.occupant, location, room, direction)
+                with self._lock():
+                    self._reindex()
+            if self.regions is not None:
+                self.regions.enter(room)
+                self.regions.leave(location)
+            self._record('moved', direction=direction)
+            if not self.player.world.has_visited(self.player.location):
                 return self.announce_room()
             else:
-                return [self.player.location.name]
+                return [self.player.location.name] + self._company()
         else:
             return ["You can't move that way!"]
 
+    def goto(self, room_name: str) -> list[str]:
+        """Attempt to move the player along the shortest path to a room they have visited before."""
+        if self.graph is None:
+            return ["You can't do that here."]
+
+        destinations = [room for room in self.graph.find(room_name) if self.player.world.has_visited(room)]
+        if len(destinations) == 0:
+            return ["You don't know the way there."]
+
+        start = self.graph.number(self.player.location)
+        blocked = self.graph.blocked(self.player.world)
+        paths = [self.graph.shortest_path(start, self.graph.number(room), blocked) for room in destinations]
+        paths = [path for path in paths if path is not None]
+        if len(paths) == 0:
+            return ["You can't find a way there."]
+
+        directions = self.graph.path_directions(min(paths, key=len))
+        if len(directions) == 0:
+            return ["You're already there."]
+
+        output = []
+        for direction in directions:
+            output = self.move_rooms(direction)
+        return [f"You walk {', '.join(directions)}."] + output
+
     def pickup_item(self, item_id: int) -> list[str]:
         """Pick an item up from the player's location and place it in the player's inventory.
         """
+        with self._lock():
+            return self._pickup_item(item_id)
+
+    def _pickup_item(self, item_id: int) -> list[str]:
+        """Pick an item up, while holding the lock of the player's location."""
         item, in_inventory = self.find_item(item_id)
         if item is None:  # item not found
             return ["I can't find that item."]
         elif in_inventory:  # item is already in the inventory
             return ["You already have that."]
-        elif not item[0].portable:  # cannot pick up that item
+        elif isinstance(item, Container):  # take the contents of a Container instead of the Container itself
+            if self.player.world.is_locked(item):
+                return ["You can't pick that up."]
+            output = []
+            for subitem in list(self.player.world.contents(item).values()):
+                output.extend(self._pickup_item(subitem.item_id))
+            return output or [f"The {item.name.lower()} is empty."]
+        elif not item.portable:  # cannot pick up that item
             return ["You can't pick that up."]
         else:
-            item = self.player.location.pop_item(item_id)
-            if isinstance(item, Container):  # different behaviour if item is a Container
-                output = []
-                for subitem in item.contents:
-                    output.extend(self.pickup_item(subitem.item_id))
-                return output
-            else:
-                self.player.add_item(item)
-                return [f"Picked up {item.name}."]
+            self.player.world.pop_item(self.index.owner(item_id), item_id)
+            self.player.add_item(item)
+            self.index.move(item, None)
+            self._record('took', item=item_id)
+            self._changed(f'takes the {item.name.lower()}')
+            return [f"Picked up {item.name}."]
 
     def drop_item(self, item_id: int) -> list[str]:
         """Attempt to drop an item from the player's inventory. If the player does not have it, do nothing and
         inform the player.
         """
-        if self.player.has_item(item_id):
+        if not self.player.has_item(item_id):
+            return [f"You don't have that."]
+        with self._lock():
+            self._sync()
             item = self.player.inventory[item_id]
             self.player.drop_item(item)
+            self.index.move(item, self.player.location)
+            self._record('dropped', item=item_id)
+            self._changed(f'drops the {item.name.lower()}')
             return [f"Dropped {item.name}."]
+
+    def inspect_item(self, item_id: int) -> list[str]:
+        """Return the description of an item in the player's vicinity. If the item is an unlocked Container, list
+        its contents as well.
+        """
+        with self._lock():
+            item, _ = self.find_item(item_id)
+            if item is None:
+                return ["I can't find that item."]
+            elif not isinstance(item, Container):
+                return [item.description]
+            elif self.player.world.is_locked(item):
+                return [item.description, "It is locked."]
+            else:
+                return [item.description, *self.list_contents(item)]
+
+    def unlock_container(self, container_id: int, key_id: int) -> list[str]:
+        """Attempt to unlock a Container in the player's vicinity with a key in the player's inventory. If it
+        unlocks, list its contents.
+        """
+        with self._lock():
+            return self._unlock_container(container_id, key_id)
+
+    def _unlock_container(self, container_id: int, key_id: int) -> list[str]:
+        """Attempt to unlock a Container, while holding the lock of the player's location."""
+        container, _ = self.find_item(container_id)
+        key, key_in_inventory = self.find_item(key_id)
+        if container is None or key is None:
+            return ["I can't find that item."]
+        elif not isinstance(container, Container):
+            return ["You can't unlock that."]
+        elif not self.player.world.is_locked(container):
+            return ["It doesn't seem to be locked."]
+        elif not key_in_inventory:
+            return [f"You aren't holding the {key.name.lower()}."]
+        elif container.key_id != key.item_id:
+            return ["The key doesn't seem to fit."]
         else:
-            return [f"You don't have that."]
+            self.player.world.unlock(container)
+            self.index.add_contents(container)
+            self._record('unlocked', container=container_id, key=key_id)
+            self._changed(f'unlocks the {container.name.lower()}')
+            return [f"The {container.name.lower()} unlocks.", *self.list_contents(container)]
+
+    def use_item(self, item_id: int) -> list[str]:
+        """Attempt to use an item in the player's vicinity in the player's location. If it triggers an interaction,
+        return its message; otherwise, inform the player that nothing happened.
+
+        In a shared world, interactions are run one at a time, as their effects can change any room.
+        """
+        if self.shared is None:
+            return self._use_item(item_id)
+        with self.shared.interactions, self._lock():
+            return self._use_item(item_id)
+
+    def _use_item(self, item_id: int) -> list[str]:
+        """Attempt to use an item, while holding the lock of the player's location."""
+        item, _ = self.find_item(item_id)
+        if item is None:
+            return ["I can't find that item."]
+
+        triggered, message = self.player.location.execute_interaction(item, self.player)
+        if not triggered:
+            return ["Nothing happens."]
+        self._record('used', item=item_id)
+
+        # the interaction may have changed anything within reach, so index the player's surroundings again
+        self._reindex()
+        self._changed(f'uses the {item.name.lower()}')
+        return [message]
+
+    def list_contents(self, container: Container) -> tuple[str, ...]:
+        """Return the names of the items in a Container. If it is empty, inform the player."""
+        return self.renderer.contents(container)
 
     def handle_invalid_event(self) -> list[str]:
         """Return a string informing the player that they have entered an invalid command."""
         return ["I don't know you're trying to say."]
 
+    def handle_unknown_item(self, items: list[Item]) -> list[str]:
+        """Return a string informing the player that the item they named could not be found, or asking which item
+        they meant if the name refers to more than one item.
+        """
+        if len(items) == 0:
+            return ["I can't find that item."]
+        else:
+            return ["Which do you mean: " + ", ".join(item.name for item in items) + "?"]
+
     def find_item(self, item_id: int) -> tuple[Item, bool] | tuple[None, None]:
         """Find the given item in the player's vicinity (location or inventory). If found, return the item and
         if it is in the player's inventory as a tuple. Otherwise, return None."""
+        self._sync()
         if self.player.has_item(item_id):
             return (self.player.inventory[item_id], True)
-        elif self.player.location.contains(item_id):
-            return (self.player.location.contents[item_id], False)
+        elif item_id in self.index:
+            return (self.index.item(item_id), False)
         else:
             return None, None
+
+    def find_items(self, name: str) -> list[Item]:
+        """Return the items in the player's vicinity (location or inventory) that the given name refers to.
+
+        In a shared world, other players may have changed the player's surroundings since they were indexed, in which
+        case they are indexed again first.
+        """
+        self._sync()
+        return self.index.find(name)
+
+    def item_names(self) -> Vocabulary:
+        """Return the keywords of the items in the player's vicinity (location or inventory), for suggesting how to
+        complete the player's input.
+        """
+        self._sync()
+        return self.index.vocabulary()
+
+    def messages(self) -> list[str]:
+        """Return the news of what other players have done near the player since the player's last command in a
+        shared world, and clear it.
+        """
+        return [] if self.occupant is None else self.occupant.take_messages()
+
+    def listen(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """In a shared world, call listener whenever news of what other players have done near the player arrives,
+        for example to wake the task that sends it to the player (see messages). Return a function that stops
+        calling it, which may be called from any thread, even after the session has ended.
+
+        listener is called from the thread of the player whose command made the news, while holding the lock of a
+        room, so it must return at once.
+        """
+        occupant = self.occupant
+        if occupant is None:
+            return _ignore
+        occupant.listener = listener
+
+        def stop() -> None:
+            if occupant.listener is listener:
+                occupant.listener = None
+        return stop
+
+    def _build_index(self) -> ItemIndex:
+        """Return a new index of the items within the player's reach."""
+        index = ItemIndex(self.player.world)
+        for item in self.player.inventory.values():
+            index.add(item, None)
+        index.add_contents(self.player.location)
+        return index
+
+    def _lock(self) -> AbstractContextManager:
+        """Return the lock to hold while reading or changing the contents of the player's location."""
+        return _UNLOCKED if self.shared is None else self.shared.lock(self.player.location)
+
+    def _reindex(self) -> None:
+        """Index the player's surroundings again, while holding the lock of the player's location."""
+        if self.shared is not None:
+            self._generation = self.shared.generation(self.player.location)
+        self.index = self._build_index()
+
+    def _sync(self) -> None:
+        """In a shared world, index the player's surroundings again if other players have changed them since they
+        were last indexed.
+        """
+        if self.shared is not None and self._generation != self.shared.generation(self.player.location):
+            with self._lock():
+                self._reindex()
+
+    def _changed(self, action: str) -> None:
+        """In a shared world, tell the other players in the player's location that the player has done something
+        that changed it, while holding its lock.
+        """
+        if self.shared is not None:
+            self._generation = self.shared.changed(self.player.location, self.occupant, action)
+
+    def _company(self) -> list[str]:
+        """Return a line naming the other players in the player's location in a shared world, if there are any."""
+        if self.shared is None:
+            return []
+        names = self.shared.names(self.player.location, self.occupant)
+        if len(names) > MAX_NAMES:
+            return [f"Also here: {', '.join(names[:MAX_NAMES])} and {len(names) - MAX_NAMES} others."]
+        return [f"Also here: {', '.join(names)}."] if names else []
+
+    def _record(self, event: str, **fields) -> None:
+        """Record a change the player made to the game in the journal, if there is one."""
+        if self.journal is not None:
+            self.journal.record(self.player, event, **fields)
+
+    def close(self) -> None:
+        """End the game, so that the region the player is in can be evicted, and save a snapshot of the player's
+        progress if it is being journaled. In a shared world, the player leaves everything they are carrying behind
+        for the other players.
+        """
+        if self.shared is not None:
+            with self._lock():
+                for item in list(self.player.inventory.values()):
+                    self.player.drop_item(item)
+                self.shared.changed(self.player.location)
+            self.shared.leave(self.occupant, self.player.location)
+            self.shared = None
+        if self.journal is not None:
+            self.journal.checkpoint(self.player)
+        if self.regions is not None:
+            self.regions.leave(self.player.location)
+            self.regions = None
+
+
+def _ignore() -> None:
+    """Do nothing; what GameInteractor.listen returns when there is no news to stop listening for."""
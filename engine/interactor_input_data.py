@@ -4,12 +4,15 @@ from dataclasses import dataclass
 
 @dataclass
 class InteractorData:
-    """Defines the valid input data for GameInteractor"""
+    """Defines the valid input data for GameInteractor
+
+    command: the name of the command (see engine/commands.py), 'invalid', or 'unknown_item'.
+    item_ids: the ids of the items the command acts on, in the order they were named. For 'unknown_item', the ids of
+              the items that the name could refer to.
+    direction: the direction to move in, for the move command.
+    room_name: the name of the room to go to, for the goto command.
+    """
     command: str
     item_ids: list[int]
-    direction: str
-
-    def __int__(self, command: str, item_ids: list[int], direction: str):
-        self.command = command
-        self.item_ids = item_ids
-        self.direction = direction
+    direction: str | None
+    room_name: str = ''
@@ -0,0 +1,121 @@
+"""An index of the items within the player's reach.
+
+The index maps every keyword of every item the player can currently reach (the items in their inventory, the items
+in their location, and the items inside unlocked containers in either) to those items, so that resolving a name
+such as "key" or "rusty key" is a single dictionary lookup no matter how deeply containers are nested. The
+GameInteractor keeps the index in sync as items are taken, dropped and unlocked, and as the player moves.
+
+Once the player has asked for suggestions, the keywords within reach are also kept in a Vocabulary (see
+engine/suggestions.py), which is updated as keywords come into and go out of reach.
+"""
+from engine.suggestions import Vocabulary
+from entities.item import Item, Container
+from entities.room import Room
+from entities.world_state import WorldState
+
+
+class ItemIndex:
+    """An index of the items within the player's reach.
+
+    keywords: a dictionary of keywords and the items within reach that have that keyword, as a dictionary of
+              item ids and items.
+    items: a dictionary of the ids of the items within reach and the items.
+    owners: a dictionary of the ids of the items within reach and the room or container directly holding each
+            item, or None if the item is in the player's inventory.
+    world: the player's changes to the world.
+    names: the keywords within reach, for suggestions, or None until suggestions are first asked for.
+    """
+    keywords: dict[str: dict[int: Item]]
+    items: dict[int: Item]
+    owners: dict[int: Room | Container | None]
+    world: WorldState
+    names: Vocabulary | None
+
+    def __init__(self, world: WorldState) -> None:
+        self.keywords = {}
+        self.items = {}
+        self.owners = {}
+        self.world = world
+        self.names = None
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self.owners
+
+    def find(self, name: str) -> list[Item]:
+        """Return the items within reach that the given name refers to."""
+        return list(self.keywords.get(name.lower().strip(), {}).values())
+
+    def vocabulary(self) -> Vocabulary:
+        """Return the keywords within reach as a Vocabulary, which is kept up to date from then on."""
+        if self.names is None:
+            self.names = Vocabulary(self.keywords, corrects=False)
+        return self.names
+
+    def item(self, item_id: int) -> Item:
+        """Return the item with the given id.
+
+        Preconditions:
+         - item_id in self
+        """
+        return self.items[item_id]
+
+    def owner(self, item_id: int) -> Room | Container | None:
+        """Return the room or container directly holding the item, or None if it is in the player's inventory.
+
+        Preconditions:
+         - item_id in self
+        """
+        return self.owners[item_id]
+
+    def add(self, item: Item, owner: Room | Container | None) -> None:
+        """Add an item that is now within reach to the index. If the item is an unlocked container, its contents
+        are added as well.
+        """
+        self.items[item.item_id] = item
+        self.owners[item.item_id] = owner
+        for keyword in item.keywords:
+            items = self.keywords.get(keyword)
+            if items is None:
+                items = self.keywords[keyword] = {}
+                if self.names is not None:
+                    self.names.add(keyword)
+            items[item.item_id] = item
+
+        if isinstance(item, Container) and not self.world.is_locked(item):
+            self.add_contents(item)
+
+    def add_contents(self, owner: Room | Container) -> None:
+        """Add every item in a room or container to the index."""
+        for item in self.world.contents(owner).values():
+            self.add(item, owner)
+
+    def remove(self, item: Item) -> None:
+        """Remove an item that is no longer within reach from the index, along with anything inside it."""
+        if self.items.pop(item.item_id, None) is None:
+            return
+        del self.owners[item.item_id]
+
+        for keyword in item.keywords:
+            items = self.keywords[keyword]
+            del items[item.item_id]
+            if not items:
+                del self.keywords[keyword]
+                if self.names is not None:
+                    self.names.remove(keyword)
+
+        if isinstance(item, Container):
+            self.remove_contents(item)
+
+    def remove_contents(self, owner: Room | Container) -> None:
+        """Remove every item in a room or container from the index."""
+        for item in self.world.contents(owner).values():
+            self.remove(item)
+
+    def move(self, item: Item, owner: Room | Container | None) -> None:
+        """Record that an item within reach has moved to a different room or container, or into the player's
+        inventory (if owner is None).
+
+        Preconditions:
+         - item.item_id in self
+        """
+        self.owners[item.item_id] = owner
@@ -0,0 +1,243 @@
+"""An event journal that lets game sessions survive a restart of the server.
+
+Every change a player makes to the game is recorded as an event, and appended to a log kept for their session.
+Events are recorded in terms of the GameInteractor method that made the change, with the ids it was given:
+ - {"event": "visited"}: the player saw their location for the first time (announce_room).
+ - {"event": "moved", "direction": <direction>}: the player moved to another room (move_rooms).
+ - {"event": "took", "item": <item id>}: the player picked an item up (pickup_item).
+ - {"event": "dropped", "item": <item id>}: the player dropped an item (drop_item).
+ - {"event": "unlocked", "container": <item id>, "key": <item id>}: the player unlocked a container
+   (unlock_container).
+ - {"event": "used", "item": <item id>}: the player triggered an interaction by using an item (use_item).
+Since the game is deterministic, calling the same methods again in the same order replays the session exactly.
+
+Every event is numbered, and every snapshot_every events a snapshot of the session (see engine/snapshot.py) is
+saved, after which the log is emptied. A session is restored by loading its latest snapshot and replaying the
+events after it, so restoring never replays more than snapshot_every events, however long the session has lasted.
+Events numbered before the snapshot are skipped, in case the server stopped between saving a snapshot and emptying
+the log.
+
+Commands never wait for the disk: events are handed to a background thread, which writes every event that has
+queued up since its last write and then calls fsync once per log (a group commit). An event is therefore durable
+shortly after the command that caused it, rather than before the command returns.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+from pathlib import Path
+from typing import Any, Iterable
+
+from engine.snapshot import Snapshot, take_snapshot
+
+Event = dict[str, Any]
+
+logger = logging.getLogger(__name__)
+
+SESSION_ID = re.compile(r'[0-9A-Za-z_-]+')
+
+
+class Journal:
+    """The logs and snapshots of every session, stored as files in a directory, and the background thread that
+    writes them.
+
+    directory: the directory that holds the files. Each session has a log <session id>.log of events as JSON Lines,
+               and a snapshot <session id>.snapshot.
+    """
+    directory: Path
+    _queue: queue.SimpleQueue
+    _thread: threading.Thread
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='journal-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)  # write the events still queued when the server stops
+
+    def append(self, session_id: str, event: Event) -> None:
+        """Queue an event to be appended to a session's log."""
+        self._queue.put(('event', session_id, event))
+
+    def save_snapshot(self, session_id: str, seq: int, snapshot: Snapshot) -> None:
+        """Queue a snapshot of a session taken after its event numbered seq. Once the snapshot is saved, the events
+        before it are discarded.
+        """
+        self._queue.put(('snapshot', session_id, (seq, snapshot)))
+
+    def flush(self) -> None:
+        """Wait until everything queued so far has been written and synced to disk."""
+        done = threading.Event()
+        self._queue.put(('flush', None, done))
+        done.wait()
+
+    def close(self) -> None:
+        """Write everything queued so far, and stop the background thread."""
+        self._queue.put(('close', None, None))
+        self._thread.join()
+
+    def load(self, session_id: str) -> tuple[Snapshot | None, int, list[Event]] | None:
+        """Return a session's latest snapshot (or None if it has none), the number of the last event included in
+        the snapshot, and the events recorded after it. Return None if nothing has been recorded for the session.
+
+        Everything queued is written first, so that a session can be restored straight after it was closed.
+        """
+        if SESSION_ID.fullmatch(session_id) is None:
+            return None
+        self.flush()
+
+        snapshot_path, log_path = self._path(session_id, '.snapshot'), self._path(session_id, '.log')
+        if not snapshot_path.exists() and not log_path.exists():
+            return None
+
+        snapshot, seq = None, 0
+        if snapshot_path.exists():
+            with open(snapshot_path, encoding='utf-8') as file:
+                saved = json.load(file)
+            snapshot, seq = saved['state'], saved['seq']
+
+        events = []
+        if log_path.exists():
+            with open(log_path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:  # the last line was only partly written when the server stopped
+                        break
+                    if event['seq'] > seq:
+                        events.append(event)
+        return snapshot, seq, events
+
+    def _path(self, session_id: str, suffix: str) -> Path:
+        """Return the path of one of a session's files."""
+        return self.directory / (session_id + suffix)
+
+    def _run(self) -> None:
+        """Write batches of queued events and snapshots until the journal is closed."""
+        closing = False
+        while not closing:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = {}  # session ids and the lines to append to their logs
+            snapshots = {}  # session ids and the latest snapshot queued for them
+            waiting = []
+            for kind, session_id, value in batch:
+                if kind == 'event':
+                    lines.setdefault(session_id, []).append(json.dumps(value, separators=(',', ':')) + '\n')
+                elif kind == 'snapshot':
+                    lines.pop(session_id, None)  # the snapshot includes every event queued before it
+                    snapshots[session_id] = value
+                elif kind == 'flush':
+                    waiting.append(value)
+                else:
+                    closing = True
+
+            try:
+                for session_id, (seq, snapshot) in snapshots.items():
+                    self._write_snapshot(session_id, seq, snapshot)
+                for session_id, session_lines in lines.items():
+                    with open(self._path(session_id, '.log'), 'a', encoding='utf-8') as file:
+                        file.writelines(session_lines)
+                        file.flush()
+                        os.fsync(file.fileno())
+            except OSError:
+                # keep the thread running, so that later events are still written and flush does not wait forever
+                logger.exception('could not write to the journal in %s', self.directory)
+            finally:
+                for done in waiting:
+                    done.set()
+
+    def _write_snapshot(self, session_id: str, seq: int, snapshot: Snapshot) -> None:
+        """Save a snapshot in place of the previous one, then empty the session's log. The snapshot is written to a
+        temporary file first, so a snapshot is never left half written.
+        """
+        path = self._path(session_id, '.snapshot')
+        temporary = self._path(session_id, '.snapshot.tmp')
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({'seq': seq, 'state': snapshot}, file, separators=(',', ':'))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+        _fsync_directory(self.directory)
+        open(self._path(session_id, '.log'), 'w').close()
+
+
+class SessionJournal:
+    """Records the events of a single session in a Journal.
+
+    journal: the journal that the events are written to.
+    session_id: the id of the session.
+    snapshot_every: the number of events recorded between snapshots.
+    seq: the number of the last event recorded.
+    since_snapshot: the number of events recorded since the last snapshot.
+    """
+    journal: Journal
+    session_id: str
+    snapshot_every: int
+    seq: int
+    since_snapshot: int
+
+    def __init__(self, journal: Journal, session_id: str, snapshot_every: int = 100, seq: int = 0,
+                 since_snapshot: int = 0) -> None:
+        self.journal = journal
+        self.session_id = session_id
+        self.snapshot_every = snapshot_every
+        self.seq = seq
+        self.since_snapshot = since_snapshot
+
+    def record(self, player, event: str, **fields: Any) -> None:
+        """Record an event that has just happened to the player, and take a snapshot if one is due."""
+        self.seq += 1
+        self.journal.append(self.session_id, {'seq': self.seq, 'event': event, **fields})
+        self.since_snapshot += 1
+        if self.since_snapshot >= self.snapshot_every:
+            self.checkpoint(player)
+
+    def checkpoint(self, player) -> None:
+        """Take a snapshot of the player's progress if anything has happened since the last snapshot."""
+        if self.since_snapshot > 0:
+            self.journal.save_snapshot(self.session_id, self.seq, take_snapshot(player))
+            self.since_snapshot = 0
+
+
+def replay(interactor, events: Iterable[Event]) -> None:
+    """Replay recorded events by calling the GameInteractor methods that caused them.
+
+    Preconditions:
+     - interactor.journal is None, so the events are not recorded again
+    """
+    for event in events:
+        _REPLAY[event['event']](interactor, event)
+
+
+_REPLAY = {
+    'visited': lambda interactor, event: interactor.announce_room(),
+    'moved': lambda interactor, event: interactor.move_rooms(event['direction']),
+    'took': lambda interactor, event: interactor.pickup_item(event['item']),
+    'dropped': lambda interactor, event: interactor.drop_item(event['item']),
+    'unlocked': lambda interactor, event: interactor.unlock_container(event['container'], event['key']),
+    'used': lambda interactor, event: interactor.use_item(event['item']),
+}
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Sync a directory, so that a file renamed within it survives a crash. Not every platform allows this."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
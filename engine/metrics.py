@@ -0,0 +1,191 @@
+"""Metrics about the commands players send, exposed in the Prometheus text format.
+
+Instrumentation is opt-in: instrument wraps each command handler in the Controller's dispatch table and each public
+GameInteractor method with a function that records how long it took, and whether it raised an exception. Until it
+is called, nothing is wrapped, so the engine runs exactly as fast as it does without metrics. When it is called, each
+call costs two clock reads and a few additions.
+
+Gauges are read from callbacks when the metrics are rendered, so they never slow commands down either.
+
+A server made of several processes (see app/cluster.py) renders the metrics of each process, and reports them all
+at once with combine, which labels each sample with the process it came from.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable
+
+from engine import controller
+from engine.gameinteractor import GameInteractor
+
+# the upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0)
+
+# the original command handlers and GameInteractor methods, while they are instrumented
+_originals: dict[str, Callable] = {}
+
+# a sample in the Prometheus text format: the metric's name, its labels (if it has any) and its value
+_SAMPLE = re.compile(r'([^{\s]+)(?:\{(.*)\})? (.*)')
+
+
+class Histogram:
+    """A histogram of durations, and the number of calls that raised an exception.
+
+    counts: for each bucket in BUCKETS, and a final bucket for anything longer, the number of durations that fell
+            into it.
+    total: the sum of every duration.
+    errors: the number of calls that raised an exception.
+    """
+    counts: list[int]
+    total: float
+    errors: int
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, failed: bool = False) -> None:
+        """Record a duration."""
+        bucket = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += seconds
+            self.errors += failed
+
+    def read(self) -> tuple[list[int], float, int]:
+        """Return a consistent copy of the bucket counts, the sum of the durations, and the number of errors."""
+        with self._lock:
+            return list(self.counts), self.total, self.errors
+
+
+class Metrics:
+    """The metrics of a server.
+
+    commands: a dictionary of command names (see engine/commands.py) and their histograms.
+    methods: a dictionary of GameInteractor method names and their histograms.
+    gauges: a dictionary of gauge names, and their descriptions and the functions that return their values.
+    """
+    commands: dict[str, Histogram]
+    methods: dict[str, Histogram]
+    gauges: dict[str, tuple[str, Callable[[], float]]]
+
+    def __init__(self) -> None:
+        self.commands = {}
+        self.methods = {}
+        self.gauges = {}
+
+    def gauge(self, name: str, description: str, value: Callable[[], float]) -> None:
+        """Add a gauge whose value is read from a function whenever the metrics are rendered."""
+        self.gauges[name] = (description, value)
+
+    def render(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+        _render_histograms(lines, 'game_command_duration_seconds', 'The time taken to execute each command.',
+                           'command', self.commands)
+        _render_errors(lines, 'game_command_errors_total', 'The number of commands that raised an exception.',
+                       'command', self.commands)
+        _render_histograms(lines, 'game_interactor_duration_seconds', 'The time taken by each GameInteractor method.',
+                           'method', self.methods)
+        _render_errors(lines, 'game_interactor_errors_total',
+                       'The number of GameInteractor method calls that raised an exception.', 'method', self.methods)
+        for name, (description, value) in self.gauges.items():
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} gauge', f'{name} {value()}']
+        return '\n'.join(lines) + '\n'
+
+
+def combine(rendered: dict[str, str], label: str) -> str:
+    """Combine metrics rendered by several processes into one set of metrics in the Prometheus text format.
+    rendered gives the metrics of each process by the value of label that identifies it, which is added to each of
+    its samples. The samples of each metric are kept together, under a single HELP and TYPE.
+    """
+    families = {}  # the name of each metric, and its HELP and TYPE lines and its samples
+    for value, text in rendered.items():
+        family = None
+        for line in text.splitlines():
+            if line.startswith('# '):
+                family = families.setdefault(line.split(' ', 3)[2], ([], []))
+                if line not in family[0]:
+                    family[0].append(line)
+            elif line and family is not None:
+                name, labels, sample = _SAMPLE.fullmatch(line).groups()
+                labels = f'{label}="{value}"' + (f',{labels}' if labels else '')
+                family[1].append(f'{name}{{{labels}}} {sample}')
+    return ''.join('\n'.join(headers + samples) + '\n' for headers, samples in families.values())
+
+
+def instrument(metrics: Metrics) -> None:
+    """Record the duration of every command and GameInteractor method call in metrics, until uninstrument is
+    called.
+    """
+    uninstrument()
+    for command, handler in controller.DISPATCH.items():
+        _originals[f'command:{command}'] = handler
+        controller.DISPATCH[command] = _timed(handler, metrics.commands.setdefault(command, Histogram()))
+    for name, method in vars(GameInteractor).items():
+        if callable(method) and not name.startswith('_'):
+            _originals[f'method:{name}'] = method
+            setattr(GameInteractor, name, _timed(method, metrics.methods.setdefault(name, Histogram())))
+
+
+def uninstrument() -> None:
+    """Put back the original command handlers and GameInteractor methods."""
+    for key, original in _originals.items():
+        kind, name = key.split(':', 1)
+        if kind == 'command':
+            controller.DISPATCH[name] = original
+        else:
+            setattr(GameInteractor, name, original)
+    _originals.clear()
+
+
+def _timed(function: Callable, histogram: Histogram) -> Callable:
+    """Return a function that calls function, and records the time it took in histogram. The histogram is updated
+    inline rather than with Histogram.observe, which saves a method call on every call.
+    """
+    clock = time.perf_counter
+    counts, lock = histogram.counts, histogram._lock
+
+    @wraps(function)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        except BaseException:
+            with lock:
+                histogram.errors += 1
+            raise
+        finally:
+            elapsed = clock() - start
+            with lock:
+                counts[bisect_left(BUCKETS, elapsed)] += 1
+                histogram.total += elapsed
+    return timed
+
+
+def _render_histograms(lines: list[str], name: str, description: str, label: str,
+                       histograms: dict[str, Histogram]) -> None:
+    """Add a family of histograms to lines of the exposition format."""
+    lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+    for key, histogram in sorted(histograms.items()):
+        counts, total, _ = histogram.read()
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {total}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {cumulative}')
+
+
+def _render_errors(lines: list[str], name: str, description: str, label: str,
+                   histograms: dict[str, Histogram]) -> None:
+    """Add a family of error counters to lines of the exposition format."""
+    lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+    for key, histogram in sorted(histograms.items()):
+        lines.append(f'{name}{{{label}="{key}"}} {histogram.read()[2]}')
@@ -0,0 +1,223 @@
+"""Path finding and reachability queries over the map of rooms.
+
+A RoomGraph is compiled once from the rooms of a world: each room is numbered, and its exits are stored as lists of
+room numbers, so that searches only deal with integers and lists rather than Room objects and dictionaries. Since
+every passage takes one move, shortest paths are found with a breadth-first search that grows from both ends at
+once, which only visits a small part of a large map. For maps that never change, a NextHopTable can precompute the
+first step of the shortest path from every room to a set of destinations.
+
+Locked rooms cannot be entered. Each query takes the set of room numbers that are blocked, which RoomGraph.blocked
+calculates for a player from the rooms that are locked in the world and the rooms the player has unlocked.
+"""
+from array import array
+from collections import deque
+from typing import Collection, Iterable
+
+from entities.room import Room
+from entities.world_state import WorldState
+
+NO_ROOM = -1
+
+
+class RoomGraph:
+    """The map of a world, compiled into numbered rooms and lists of exits.
+
+    rooms: the rooms of the world, where the number of each room is its position in the list.
+    numbers: a dictionary of room ids and the number of each room.
+    exits: for each room number, a list of the numbers of the rooms it leads to.
+    directions: for each room number, a list of the direction of each exit, in the same order as exits.
+    locked: the numbers of the rooms that are locked when the game starts.
+    names: a dictionary of lowercase room names and the numbers of the rooms with that name.
+    """
+    rooms: list[Room]
+    numbers: dict[int: int]
+    exits: list[list[int]]
+    directions: list[list[str]]
+    locked: list[int]
+    names: dict[str: list[int]]
+
+    def __init__(self, rooms: Iterable[Room]) -> None:
+        self.rooms = list(rooms)
+        self.numbers = {room.room_id: number for number, room in enumerate(self.rooms)}
+        self.exits = []
+        self.directions = []
+        self.locked = []
+        self.names = {}
+        for number, room in enumerate(self.rooms):
+            exits = [(direction, self.numbers[neighbour.room_id]) for direction, neighbour in room.neighbours.items()
+                     if neighbour.room_id in self.numbers]
+            self.exits.append([neighbour for _, neighbour in exits])
+            self.directions.append([direction for direction, _ in exits])
+            if room.locked:
+                self.locked.append(number)
+            self.names.setdefault(room.name.lower(), []).append(number)
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+    def number(self, room: Room) -> int:
+        """Return the number of a room."""
+        return self.numbers[room.room_id]
+
+    def find(self, name: str) -> list[Room]:
+        """Return the rooms with the given name, ignoring case."""
+        return [self.rooms[number] for number in self.names.get(name.lower().strip(), ())]
+
+    def blocked(self, world: WorldState | None = None) -> set[int]:
+        """Return the numbers of the rooms that are locked for a player with the given WorldState, or the rooms that
+        are locked when the game starts if no WorldState is given.
+        """
+        if world is None:
+            return set(self.locked)
+        return {number for number in self.locked if world.is_locked(self.rooms[number])}
+
+    def shortest_path(self, start: int, goal: int, blocked: Collection[int] = ()) -> list[int] | None:
+        """Return the numbers of the rooms on a shortest path from start to goal, including both, or None if goal
+        cannot be reached from start. The path does not pass through blocked rooms, although it may start in one.
+
+        The search alternates between growing a breadth-first search from each end, always growing the smaller
+        one, until they meet. Every passage leads both ways, so the search from the goal can follow exits.
+        """
+        if start == goal:
+            return [start]
+        elif goal in blocked:
+            return None
+
+        exits = self.exits
+        parents = {start: NO_ROOM}  # rooms reached from start, and the room they were reached from
+        children = {goal: NO_ROOM}  # rooms reached from goal, and the next room on the way to goal
+        forward, backward = [start], [goal]
+        while forward and backward:
+            if len(forward) <= len(backward):
+                frontier, found, other = [], parents, children
+                for room in forward:
+                    for neighbour in exits[room]:
+                        if neighbour not in found and neighbour not in blocked:
+                            found[neighbour] = room
+                            if neighbour in other:
+                                return self._join(parents, children, neighbour)
+                            frontier.append(neighbour)
+                forward = frontier
+            else:
+                frontier, found, other = [], children, parents
+                for room in backward:
+                    for neighbour in exits[room]:
+                        if neighbour not in found and (neighbour not in blocked or neighbour == start):
+                            found[neighbour] = room
+                            if neighbour in other:
+                                return self._join(parents, children, neighbour)
+                            frontier.append(neighbour)
+                backward = frontier
+        return None
+
+    @staticmethod
+    def _join(parents: dict[int: int], children: dict[int: int], middle: int) -> list[int]:
+        """Join the two halves of a path found by shortest_path where they meet."""
+        path = []
+        room = middle
+        while room != NO_ROOM:
+            path.append(room)
+            room = parents[room]
+        path.reverse()
+        room = children[middle]
+        while room != NO_ROOM:
+            path.append(room)
+            room = children[room]
+        return path
+
+    def path_directions(self, path: list[int]) -> list[str]:
+        """Return the directions to move in to follow a path.
+
+        Preconditions:
+         - every room in path is connected to the next room in path
+        """
+        return [self.directions[room][self.exits[room].index(next_room)] for room, next_room in zip(path, path[1:])]
+
+    def reachable(self, start: int, blocked: Collection[int] = ()) -> set[int]:
+        """Return the numbers of the rooms that can be reached from start, including start."""
+        exits = self.exits
+        found = {start}
+        pending = deque([start])
+        while pending:
+            for neighbour in exits[pending.popleft()]:
+                if neighbour not in found and neighbour not in blocked:
+                    found.add(neighbour)
+                    pending.append(neighbour)
+        return found
+
+    def connected_components(self, blocked: Collection[int] = ()) -> list[list[int]]:
+        """Return the groups of rooms that are connected to each other, ignoring blocked rooms, from largest to
+        smallest. Every room that is not blocked is in exactly one group.
+        """
+        exits = self.exits
+        component = array('l', [NO_ROOM]) * len(self.rooms)
+        groups = []
+        for first in range(len(self.rooms)):
+            if component[first] != NO_ROOM or first in blocked:
+                continue
+            component[first] = len(groups)
+            group = [first]
+            for room in group:  # the group grows as it is iterated over, making this a breadth-first search
+                for neighbour in exits[room]:
+                    if component[neighbour] == NO_ROOM and neighbour not in blocked:
+                        component[neighbour] = len(groups)
+                        group.append(neighbour)
+            groups.append(group)
+        groups.sort(key=len, reverse=True)
+        return groups
+
+
+class NextHopTable:
+    """The first step of the shortest path from every room to each of a set of destinations, for maps that do not
+    change while the game is running. Building the table takes one breadth-first search per destination, and each
+    destination costs one array entry per room.
+
+    graph: the map.
+    hops: a dictionary of destination room numbers and, for each room, the number of the next room on a shortest
+          path to the destination (or NO_ROOM if the destination cannot be reached).
+    """
+    graph: RoomGraph
+    hops: dict[int: array]
+
+    def __init__(self, graph: RoomGraph, destinations: Iterable[int] | None = None,
+                 blocked: Collection[int] = ()) -> None:
+        self.graph = graph
+        self.hops = {}
+        for destination in range(len(graph)) if destinations is None else destinations:
+            self.hops[destination] = self._search(destination, blocked)
+
+    def _search(self, destination: int, blocked: Collection[int]) -> array:
+        """Search outwards from a destination, recording the room each room was reached from, which is the next
+        room on the way back to the destination.
+        """
+        exits = self.graph.exits
+        hops = array('l', [NO_ROOM]) * len(self.graph)
+        hops[destination] = destination
+        pending = deque([destination])
+        while pending:
+            room = pending.popleft()
+            for neighbour in exits[room]:
+                if hops[neighbour] == NO_ROOM and neighbour not in blocked:
+                    hops[neighbour] = room
+                    pending.append(neighbour)
+        return hops
+
+    def next_hop(self, room: int, destination: int) -> int:
+        """Return the number of the next room on a shortest path from room to destination, or NO_ROOM if the
+        destination cannot be reached.
+
+        Preconditions:
+         - destination in self.hops
+        """
+        return self.hops[destination][room]
+
+    def path(self, room: int, destination: int) -> list[int] | None:
+        """Return a shortest path from room to destination, or None if the destination cannot be reached."""
+        hops = self.hops[destination]
+        if hops[room] == NO_ROOM:
+            return None
+        path = [room]
+        while room != destination:
+            room = hops[room]
+            path.append(room)
+        return path
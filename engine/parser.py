@@ -0,0 +1,271 @@
+"""Parses the player's input into InteractorData for the GameInteractor.
+
+The input is split into lowercase words once. The command is the longest verb phrase that the input starts with
+("pick up" as well as "take"), and the rest of the input is split at prepositions ("with", "using", ...) into noun
+phrases, from which articles ("the", "a", ...) are dropped. Each noun phrase is matched against the names and
+keywords of the items in the world ("rusty key", "old chest", "key"), and resolved to the items in the player's
+reach that it refers to.
+
+The verbs and item names are compiled into tries of words when the world is loaded, so each word of the input is
+looked up in a dictionary, and parsing takes time proportional to the length of the input, whatever the size of
+the vocabulary. A noun phrase may start with words that are not in the vocabulary ("the shiny rusty key"), in which
+case the longest item name that it ends with is used.
+
+The parser also suggests how to complete the player's input as they type it (see Parser.suggest), from the
+vocabulary of whatever can be typed at that point in the command.
+"""
+import re
+from functools import cache
+from typing import Callable, Generic, Iterable, Sequence, TypeVar
+
+from engine.commands import DIRECTION_ALIASES, VERBS, direction_of
+from engine.interactor_input_data import InteractorData
+from engine.suggestions import Vocabulary
+from entities.item import Item
+from entities.room import DIRECTIONS
+
+Value = TypeVar('Value')
+
+ARTICLES = frozenset({'the', 'a', 'an', 'some', 'my'})
+PREPOSITIONS = frozenset({'with', 'using', 'on', 'onto', 'in', 'into', 'at', 'to', 'from'})
+TOKEN = re.compile(r"[a-z0-9']+")
+
+# verbs of more than one word, and the name of the command each refers to
+VERB_PHRASES = {'pick up': 'take', 'put down': 'drop', 'look at': 'inspect', 'look around': 'room',
+                'go to': 'goto', 'walk to': 'goto', 'travel to': 'goto'}
+# the commands whose verb is followed by the names of items
+ITEM_COMMANDS = frozenset({'take', 'drop', 'inspect', 'use', 'unlock'})
+
+_END = ''  # the key of a phrase's value in the node of its last word; no word is empty, so it never clashes
+
+
+class PhraseTrie(Generic[Value]):
+    """A trie of phrases, where each node is a dictionary of the words that can follow and their nodes, and a
+    phrase that ends at a node has its value stored under _END.
+    """
+    root: dict
+
+    def __init__(self, phrases: Iterable[tuple[Sequence[str], Value]] = ()) -> None:
+        self.root = {}
+        for words, value in phrases:
+            self.add(words, value)
+
+    def add(self, words: Sequence[str], value: Value) -> None:
+        """Add a phrase and its value, replacing the value of the phrase if it was already added."""
+        node = self.root
+        for word in words:
+            node = node.setdefault(word, {})
+        node[_END] = value
+
+    def values(self) -> Iterable[Value]:
+        """Yield the value of every phrase."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            for word, child in node.items():
+                if word == _END:
+                    yield child
+                else:
+                    stack.append(child)
+
+    def longest_prefix(self, words: Sequence[str], start: int = 0) -> tuple[Value, int] | None:
+        """Return the value of the longest phrase that words[start:] begins with, and the position of the first
+        word after the phrase; or None if words[start:] does not begin with any phrase.
+        """
+        node = self.root
+        found = None
+        for position in range(start, len(words)):
+            node = node.get(words[position])
+            if node is None:
+                break
+            if _END in node:
+                found = (node[_END], position + 1)
+        return found
+
+    def longest_suffix(self, words: Sequence[str]) -> Value | None:
+        """Return the value of the longest phrase that words ends with, or None if it does not end with a phrase."""
+        for start in range(len(words)):
+            node = self.root
+            for word in words[start:]:
+                node = node.get(word)
+                if node is None:
+                    break
+            else:
+                if _END in node:
+                    return node[_END]
+        return None
+
+
+class Parser:
+    """Parses the player's input into InteractorData.
+
+    verbs: the verbs and verb phrases, and the name of the command each refers to.
+    names: the names and keywords of items, as words, and the keyword each refers to in the player's ItemIndex.
+    """
+    verbs: PhraseTrie[str]
+    names: PhraseTrie[str]
+    _keywords: Vocabulary | None  # every keyword of the items, for correcting misspellings, once it is first needed
+
+    def __init__(self, items: Iterable[Item] = ()) -> None:
+        self.verbs = PhraseTrie(([verb], command) for verb, command in VERBS.items())
+        for phrase, command in VERB_PHRASES.items():
+            self.verbs.add(phrase.split(), command)
+        self.names = PhraseTrie()
+        self._keywords = None
+        self.add_items(items)
+
+    def add_items(self, items: Iterable[Item]) -> None:
+        """Add the names and keywords of items to the vocabulary, for example when a region of the map is loaded."""
+        for item in items:
+            for keyword in item.keywords:
+                self.names.add(TOKEN.findall(keyword), keyword)
+                if self._keywords is not None:
+                    self._keywords.add(keyword)
+
+    def parse(self, text: str, find_items: Callable[[str], list[Item]]) -> InteractorData:
+        """Parse the player's input. find_items is given a keyword, and returns the items in the player's reach that
+        it refers to.
+
+        The command of the result is the name of a command (see engine/commands.py), or:
+         - 'invalid' if the input is not a valid command.
+         - 'unknown_item' if a noun phrase does not refer to exactly one item in reach, in which case item_ids holds
+           the ids of the items it refers to.
+        """
+        text = text.lower()
+        words = TOKEN.findall(text)
+        verb = self.verbs.longest_prefix(words)
+        if verb is None:
+            return InteractorData('invalid', [], None)
+        command, position = verb
+        rest = words[position:]
+
+        if command == 'move':
+            direction = direction_of(words)
+            return InteractorData('move' if direction is not None else 'invalid', [], direction)
+        elif command == 'goto':  # room names are matched as typed from their first word, punctuation and all
+            room_name = ' '.join(text[_word_start(text, position):].split())
+            return InteractorData('goto' if room_name else 'invalid', [], None, room_name)
+        elif command in ITEM_COMMANDS:
+            phrases = self._noun_phrases(rest)
+            if len(phrases) == 0:
+                return InteractorData('invalid', [], None)
+            elif command == 'inspect' and phrases == [(None, ['room'])]:
+                return InteractorData('room', [], None)
+            elif command == 'unlock':  # unlock <container> with <key>
+                if len(phrases) < 2 or phrases[1][0] not in ('with', 'using'):
+                    return InteractorData('invalid', [], None)
+                phrases = phrases[:2]
+            else:  # anything after a preposition ("take key from chest") is ignored
+                phrases = phrases[:1]
+
+            item_ids = []
+            for _, phrase in phrases:
+                if len(phrase) == 0:
+                    return InteractorData('invalid', [], None)
+                items = find_items(self._keyword(phrase))
+                if len(items) != 1:
+                    return InteractorData('unknown_item', [item.item_id for item in items], None)
+                item_ids.append(items[0].item_id)
+            return InteractorData(command, item_ids, None)
+        else:
+            return InteractorData(command, [], None)
+
+    def suggest(self, text: str, item_names: Callable[[], Vocabulary]) -> list[str]:
+        """Return the ways to complete the player's partial input, as whole commands, or if there are none, the
+        commands that it may be a misspelling of. item_names returns the keywords of the items in the player's reach.
+
+        The last word of the input is completed along with the words before it that belong with it: the verb
+        ("pick u" to "pick up"), the direction after a move command ("go no" to "go north"), or the noun phrase after
+        a command that names items ("take the rusty k" to "take the rusty key").
+        """
+        text = text.lower().lstrip()
+        words = text.split()
+        if len(words) == 0:
+            return []
+        typed = words if text[-1].isspace() else words[:-1]  # the words that the player has finished typing
+        fragment = '' if text[-1].isspace() else words[-1]
+
+        verb = self.verbs.longest_prefix(typed)
+        if verb is None:
+            suggestions = _complete('', ' '.join(typed + [fragment]), _verb_names())
+            if suggestions or len(words) == 1:
+                return suggestions
+            rest = text[len(words[0]):]  # correct the verb, and keep what follows it as it was typed
+            return [verb + rest for verb in _verb_names().correct(words[0])]
+
+        command, position = verb
+        if command == 'move' and len(typed) == position and typed[0] not in DIRECTION_ALIASES:
+            return _complete(' '.join(typed) + ' ', fragment, _direction_names())
+        elif command not in ITEM_COMMANDS:
+            return []
+
+        start = position  # the first word of the noun phrase being typed, after any preposition and articles
+        for i in range(len(typed) - 1, position - 1, -1):
+            if typed[i] in PREPOSITIONS:
+                start = i + 1
+                break
+        while start < len(typed) and typed[start] in ARTICLES:
+            start += 1
+        return _complete(' '.join(typed[:start]) + ' ', ' '.join(typed[start:] + [fragment]), item_names(),
+                         self._item_keywords())
+
+    def _item_keywords(self) -> Vocabulary:
+        """Return every keyword of the items, which is indexed when it is first needed."""
+        if self._keywords is None:
+            self._keywords = Vocabulary(self.names.values())
+        return self._keywords
+
+    def _keyword(self, phrase: list[str]) -> str:
+        """Return the keyword that a noun phrase refers to."""
+        keyword = self.names.longest_suffix(phrase)
+        return keyword if keyword is not None else ' '.join(phrase)
+
+    @staticmethod
+    def _noun_phrases(words: list[str]) -> list[tuple[str | None, list[str]]]:
+        """Split words into noun phrases at prepositions, and drop the articles from each phrase. Return each phrase
+        with the preposition before it, which is None for the first phrase. The first phrase may be empty, and there
+        are no phrases if there are no words.
+        """
+        if len(words) == 0:
+            return []
+        phrases = [(None, [])]
+        for word in words:
+            if word in PREPOSITIONS:
+                phrases.append((word, []))
+            elif word not in ARTICLES:
+                phrases[-1][1].append(word)
+        return phrases
+
+
+def _word_start(text: str, position: int) -> int:
+    """Return the index in text of the word at the given position of TOKEN.findall(text), or the length of text if
+    there are not that many words.
+    """
+    for number, match in enumerate(TOKEN.finditer(text)):
+        if number == position:
+            return match.start()
+    return len(text)
+
+
+def _complete(head: str, phrase: str, vocabulary: Vocabulary, spelling: Vocabulary | None = None) -> list[str]:
+    """Return the commands made by following head with each word in a vocabulary that completes a phrase, or if
+    there are none, with each word that the phrase may be a misspelling of. If the vocabulary can't correct
+    misspellings, they are corrected with the spelling vocabulary instead, to the words in the vocabulary.
+    """
+    if spelling is None:
+        words = vocabulary.complete(phrase) or (vocabulary.correct(phrase) if phrase else [])
+    else:
+        words = vocabulary.complete(phrase) or (spelling.correct(phrase, vocabulary) if phrase else [])
+    return [head + word for word in words]
+
+
+@cache
+def _verb_names() -> Vocabulary:
+    """Return the verbs and verb phrases, as a Vocabulary shared by every player."""
+    return Vocabulary([*VERBS, *VERB_PHRASES])
+
+
+@cache
+def _direction_names() -> Vocabulary:
+    """Return the names of the directions, as a Vocabulary shared by every player."""
+    return Vocabulary(DIRECTIONS)
@@ -0,0 +1,51 @@
+"""Renders the output that describes rooms and containers, and caches it.
+
+The lines that list the contents of a room or container are cached for each player, along with the revision of the
+contents they were rendered from (see WorldState.revision_of). A cached rendering is used until the contents change,
+so inspecting a crowded room or container again costs the same however much it holds. The cached lines are returned
+as they are, as a tuple that the callers can't modify, rather than as a copy.
+
+The descriptions of rooms (see GameInteractor.describe_room and announce_room) are not cached: the game never lists
+the contents of a room, so a room is described by its name and description alone, which are used as they are, and
+in a shared world by the other players in it, which change from one command to the next.
+"""
+from collections import OrderedDict
+
+from entities.item import Container
+from entities.room import Room
+from entities.world_state import WorldState
+
+
+class Renderer:
+    """Renders output for a single player, caching the renderings of the rooms and containers they have looked in.
+
+    world: the player's WorldState.
+    max_cached: the maximum number of renderings kept, after which the least recently used are dropped.
+    """
+    world: WorldState
+    max_cached: int
+    _contents: OrderedDict[Room | Container, tuple[int, tuple[str, ...]]]
+
+    def __init__(self, world: WorldState, max_cached: int = 64) -> None:
+        self.world = world
+        self.max_cached = max_cached
+        self._contents = OrderedDict()  # owners, and the revision and lines of their rendered contents
+
+    def contents(self, owner: Room | Container) -> tuple[str, ...]:
+        """Return the lines that list the contents of a room or container."""
+        revision = self.world.revision_of(owner)
+        cached = self._contents.get(owner)
+        if cached is not None and cached[0] == revision:
+            self._contents.move_to_end(owner)
+            return cached[1]
+
+        contents = self.world.contents(owner)
+        if len(contents) == 0:
+            lines = ("It is empty.",)
+        else:
+            lines = (f"The {owner.name.lower()} contains:", *(item.name for item in contents.values()))
+        self._contents[owner] = (revision, lines)
+        self._contents.move_to_end(owner)
+        if len(self._contents) > self.max_cached:
+            self._contents.popitem(last=False)
+        return lines
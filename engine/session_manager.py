@@ -0,0 +1,268 @@
+"""Manages the game sessions hosted by a single server process.
+
+Each session owns its own Controller, GameInteractor and Player, so players connected to the same server do not
+share any game state. The number of sessions is bounded: sessions that have been idle for too long are evicted, and
+when the pool is full or over its memory budget the least recently used sessions are evicted first.
+
+If sessions are saved somewhere that outlives the server (see engine/journal.py), a session that is not in the pool
+is restored from there when its client next uses it, so evicted sessions and sessions from before a restart carry on.
+
+Sessions are closed (see SessionManager.on_close) outside the lock of the pool, so a session that is slow to close,
+for example because it is still executing a command, never holds up the other sessions. A session that is closed
+after it was looked up but before its lock was taken is looked up again.
+"""
+import gc
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from engine.controller import Controller
+
+
+def session_size(controller: Controller) -> int:
+    """Return an estimate of the number of bytes used by a session's Controller. The world template that every
+    session shares is not counted, so this is proportional to the number of changes the player has made to the world.
+    """
+    player = controller.interactor.player
+    return (sys.getsizeof(controller) + sys.getsizeof(controller.interactor) + sys.getsizeof(player)
+            + sys.getsizeof(player.inventory) + player.world.size())
+
+
+def deep_sizeof(obj: object) -> int:
+    """Return an estimate of the number of bytes used by obj and every object reachable from it.
+
+    Classes, functions and modules are shared between sessions, so they are not counted.
+    """
+    seen = set()
+    pending = [obj]
+    size = 0
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        pending.extend(gc.get_referents(current))
+    return size
+
+
+class Session:
+    """A single player's connection to the game.
+
+    session_id: the id that the client uses to identify the session.
+    controller: the controller that runs the session's game.
+    last_access: the time (from time.monotonic) that the session was last used.
+    size: the estimated memory used by the session in bytes.
+    lock: a lock that serialises the commands executed in this session.
+    closed: whether the session has been evicted or removed, which is only changed while holding its lock.
+    """
+    session_id: str
+    controller: Controller
+    last_access: float
+    size: int
+    lock: threading.Lock
+    closed: bool
+
+    def __init__(self, session_id: str, controller: Controller, size: int) -> None:
+        self.session_id = session_id
+        self.controller = controller
+        self.last_access = time.monotonic()
+        self.size = size
+        self.lock = threading.Lock()
+        self.closed = False
+
+
+class SessionManager:
+    """A bounded pool of game sessions.
+
+    factory: a function that creates the Controller of a new session, given the session's id.
+    max_sessions: the maximum number of sessions that can be alive at once.
+    idle_timeout: the number of seconds a session can be unused before it is evicted.
+    max_memory: the maximum estimated memory in bytes used by all sessions, or None if there is no limit.
+    sizeof: a function that estimates the memory in bytes used by a session's Controller. The default only counts the
+            player's own changes to the world (see session_size); deep_sizeof counts everything the Controller
+            refers to, including the world template.
+    on_close: a function that is called with a session's Controller when the session is evicted or removed.
+    restore: a function that restores the Controller of a session that is not in the pool, given its id, or returns
+             None if it cannot be restored; or None if sessions are never restored.
+    new_id: a function that returns the id of a new session.
+    """
+    factory: Callable[[str], Controller]
+    max_sessions: int
+    idle_timeout: float
+    max_memory: int | None
+    sizeof: Callable[[Controller], int]
+    on_close: Callable[[Controller], None] | None
+    restore: Callable[[str], Controller | None] | None
+    new_id: Callable[[], str]
+    _sessions: OrderedDict[str, Session]
+    _memory: int
+    _lock: threading.Lock
+    _stopped: threading.Event
+
+    def __init__(self, factory: Callable[[str], Controller],
+                 max_sessions: int = 10000,
+                 idle_timeout: float = 1800.0,
+                 max_memory: int | None = None,
+                 sizeof: Callable[[Controller], int] = session_size,
+                 on_close: Callable[[Controller], None] | None = None,
+                 restore: Callable[[str], Controller | None] | None = None,
+                 new_id: Callable[[], str] = lambda: os.urandom(16).hex()) -> None:
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_memory = max_memory
+        self.sizeof = sizeof
+        self.on_close = on_close
+        self.restore = restore
+        self.new_id = new_id
+        self._sessions = OrderedDict()  # ordered from least to most recently used
+        self._memory = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    @property
+    def memory(self) -> int:
+        """The estimated memory in bytes used by all sessions."""
+        return self._memory
+
+    def create(self) -> Session:
+        """Create a new session, evicting old sessions if the pool is full."""
+        session_id = self.new_id()
+        return self.add(session_id, self.factory(session_id))
+
+    def get(self, session_id: str | None) -> Session:
+        """Return the session with the given id and mark it as recently used. If the session is not in the pool,
+        restore it, or create a new session if it cannot be restored.
+
+        The session may be closed by the time it is used; session() checks for that while holding its lock.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id is not None else None
+            if session is not None:
+                session.last_access = time.monotonic()
+                self._sessions.move_to_end(session_id)
+                return session
+
+        if session_id is not None and self.restore is not None:
+            controller = self.restore(session_id)
+            if controller is not None:
+                return self.add(session_id, controller)
+        return self.create()
+
+    def add(self, session_id: str, controller: Controller) -> Session:
+        """Add a session with a given id to the pool, for example one moved from another process, evicting old
+        sessions if the pool is full. If a session with the same id is already in the pool, for example because it
+        was restored at the same time by another thread, return that session instead.
+        """
+        session = Session(session_id, controller, self.sizeof(controller))
+        with self._lock:
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                existing.last_access = time.monotonic()
+                self._sessions.move_to_end(session_id)
+                return existing
+            self._sessions[session_id] = session
+            self._memory += session.size
+            evicted = self._evict(time.monotonic())
+        self._close(evicted)
+        return session
+
+    @contextmanager
+    def session(self, session_id: str | None) -> Iterator[Session]:
+        """Use the session with the given id (see get) while holding its lock. The memory used by the session is
+        measured again afterwards, since executing commands may have changed it.
+        """
+        while True:
+            session = self.get(session_id)
+            session.lock.acquire()
+            if not session.closed:
+                break
+            # the session was evicted after it was looked up, so look it up again, which restores it if it can be
+            session.lock.release()
+            session_id = session.session_id
+        try:
+            yield session
+            size = self.sizeof(session.controller)
+        finally:
+            session.lock.release()
+        with self._lock:
+            if self._sessions.get(session.session_id) is session:
+                self._memory += size - session.size
+            session.size = size
+            evicted = self._evict(time.monotonic())
+        self._close(evicted)
+
+    def remove(self, session_id: str) -> None:
+        """End the session with the given id. Do nothing if it does not exist."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._memory -= session.size
+        if session is not None:
+            self._close([session])
+
+    def evict_idle(self) -> int:
+        """Evict every session that has been idle for longer than idle_timeout, and return how many were evicted."""
+        with self._lock:
+            evicted = self._evict(time.monotonic(), keep=0)
+        self._close(evicted)
+        return len(evicted)
+
+    def sweep(self, interval: float = 60.0) -> threading.Thread:
+        """Start a background thread that evicts idle sessions every interval seconds, until stop is called, so
+        that idle sessions are evicted even when no other session is being used. Return the thread.
+        """
+        def run() -> None:
+            while not self._stopped.wait(interval):
+                self.evict_idle()
+        thread = threading.Thread(target=run, name='session-sweeper', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        """Stop the thread started by sweep."""
+        self._stopped.set()
+
+    def _evict(self, now: float, keep: int = 1) -> list[Session]:
+        """Remove the least recently used sessions from the pool while they are idle, or while the pool is over its
+        limits, and return them so that they can be closed once the lock is released. The keep most recently used
+        sessions are never evicted.
+
+        Preconditions:
+         - self._lock is held by the caller
+        """
+        evicted = []
+        while len(self._sessions) > keep:
+            session = next(iter(self._sessions.values()))
+            if not (now - session.last_access > self.idle_timeout
+                    or len(self._sessions) > self.max_sessions
+                    or (self.max_memory is not None and self._memory > self.max_memory)):
+                break
+            self._sessions.popitem(last=False)
+            self._memory -= session.size
+            evicted.append(session)
+        return evicted
+
+    def _close(self, sessions: list[Session]) -> None:
+        """Close sessions that have been evicted or removed, once each has finished executing any command, and call
+        on_close for each.
+
+        Preconditions:
+         - self._lock is not held by the caller
+        """
+        for session in sessions:
+            with session.lock:
+                session.closed = True
+                if self.on_close is not None:
+                    self.on_close(session.controller)
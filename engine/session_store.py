@@ -0,0 +1,181 @@
+"""Storage for game sessions that is shared between server processes.
+
+A SessionStore saves and loads snapshots of players' progress (see engine/snapshot.py): their location, their
+inventory, and the changes they have made to the contents of rooms and containers. SQLiteSessionStore stores them in
+an SQLite database, which every worker process of a server can open at the same time.
+
+StoredSessions serves sessions straight from a store, and keeps nothing in memory between commands: each command
+loads the session's snapshot, runs, and saves the snapshot again. Any worker can therefore serve any session, so a
+server can run as many worker processes as it needs. If two workers run commands for the same session at the same
+time, the command that finishes last wins.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+from engine.controller import Controller
+from engine.session_manager import Session
+from engine.snapshot import Snapshot
+
+
+class SessionStore(ABC):
+    """Saves and loads snapshots of sessions, by session id."""
+
+    def save(self, session_id: str, snapshot: Snapshot) -> None:
+        """Save a snapshot of a session, replacing any snapshot saved before."""
+        self.save_many([(session_id, snapshot)])
+
+    @abstractmethod
+    def save_many(self, snapshots: Iterable[tuple[str, Snapshot]]) -> None:
+        """Save snapshots of many sessions at once."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def load(self, session_id: str) -> Snapshot | None:
+        """Return the snapshot of a session, or None if it has not been saved."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Delete the snapshot of a session. Do nothing if it has not been saved."""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Write any snapshots that have been saved but not written yet."""
+
+    def close(self) -> None:
+        """Write any snapshots that have not been written yet, and release the store."""
+        self.flush()
+
+
+class SQLiteSessionStore(SessionStore):
+    """A SessionStore kept in an SQLite database.
+
+    The database is opened in WAL mode, so that readers in any process do not block the writer, and with
+    synchronous=NORMAL, so that a transaction only waits for the disk at checkpoints. Each snapshot is a row of the
+    sessions table, which holds the player's location and inventory as columns, and the rest of the snapshot as
+    JSON. Every statement is a fixed string with parameters, so sqlite3 prepares it once and reuses it from its
+    statement cache.
+
+    Writes can be batched: if batch_size is more than 1, save holds snapshots in memory and writes them in a single
+    transaction once batch_size of them are waiting, or when flush is called. load always sees the latest snapshot
+    saved by this store, including those that are waiting.
+
+    path: the path of the database file.
+    batch_size: the number of snapshots that are written together.
+    """
+    path: str
+    batch_size: int
+    _connection: sqlite3.Connection
+    _pending: dict[str, Snapshot]
+    _lock: threading.Lock
+
+    def __init__(self, path: str, batch_size: int = 1) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS sessions ('
+                                 'session_id TEXT PRIMARY KEY, location INTEGER NOT NULL, inventory TEXT NOT NULL, '
+                                 'progress TEXT NOT NULL, updated REAL NOT NULL) WITHOUT ROWID')
+        self._pending = {}  # snapshots that have been saved but not written yet
+        self._lock = threading.Lock()
+
+    def save(self, session_id: str, snapshot: Snapshot) -> None:
+        with self._lock:
+            self._pending[session_id] = snapshot
+            if len(self._pending) >= self.batch_size:
+                self._write()
+
+    def save_many(self, snapshots: Iterable[tuple[str, Snapshot]]) -> None:
+        with self._lock:
+            self._pending.update(snapshots)
+            self._write()
+
+    def load(self, session_id: str) -> Snapshot | None:
+        with self._lock:
+            if session_id in self._pending:
+                return self._pending[session_id]
+            row = self._connection.execute('SELECT location, inventory, progress FROM sessions WHERE session_id = ?',
+                                           (session_id,)).fetchone()
+        if row is None:
+            return None
+        location, inventory, progress = row
+        return {'location': location, 'inventory': json.loads(inventory)} | json.loads(progress)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._pending.pop(session_id, None)
+            self._connection.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write()
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def _write(self) -> None:
+        """Write the waiting snapshots in a single transaction.
+
+        Preconditions:
+         - self._lock is held by the caller
+        """
+        if not self._pending:
+            return
+        now = time.time()
+        rows = [(session_id, snapshot['location'], json.dumps(snapshot['inventory'], separators=(',', ':')),
+                 json.dumps({key: value for key, value in snapshot.items() if key not in ('location', 'inventory')},
+                            separators=(',', ':')), now)
+                for session_id, snapshot in self._pending.items()]
+        with self._connection:
+            self._connection.execute('BEGIN')
+            self._connection.executemany('INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)', rows)
+        self._pending.clear()
+
+
+class StoredSessions:
+    """Sessions that are loaded from a SessionStore for every command and saved again afterwards, in place of a
+    SessionManager. Its session method can be used in the same way as SessionManager.session.
+
+    store: the store that holds the sessions.
+    factory: a function that creates the Controller of a new session, given the session's id.
+    restore: a function that creates the Controller of a session from its snapshot.
+    snapshot: a function that takes a snapshot of the session run by a Controller.
+
+    If several processes share the store, it must write every snapshot as soon as it is saved (for
+    SQLiteSessionStore, batch_size must be 1), so that the other processes see it.
+    """
+    store: SessionStore
+    factory: Callable[[str], Controller]
+    restore: Callable[[Snapshot], Controller]
+    snapshot: Callable[[Controller], Snapshot]
+
+    def __init__(self, store: SessionStore, factory: Callable[[str], Controller],
+                 restore: Callable[[Snapshot], Controller], snapshot: Callable[[Controller], Snapshot]) -> None:
+        self.store = store
+        self.factory = factory
+        self.restore = restore
+        self.snapshot = snapshot
+
+    @contextmanager
+    def session(self, session_id: str | None) -> Iterator[Session]:
+        """Load the session with the given id, or create a new session if it has not been saved, and save it again
+        once it has been used.
+        """
+        saved = self.store.load(session_id) if session_id is not None else None
+        if saved is None:
+            session_id = uuid.uuid4().hex
+            controller = self.factory(session_id)
+        else:
+            controller = self.restore(saved)
+        session = Session(session_id, controller, 0)
+        yield session
+        self.store.save(session.session_id, self.snapshot(session.controller))
@@ -0,0 +1,210 @@
+"""Worlds that many players play in at once, seeing each other and each other's changes.
+
+In a shared world, the changes that players make to the contents of rooms and containers, and to locks and
+interactions, are recorded in a single WorldState that the views of every player share (see SharedView), so an item
+that one player takes is gone for everyone. Only the rooms that each player has visited are their own.
+
+The world keeps a presence index of the players in each room, which the GameInteractor updates as players move, so
+that the news of a player moving or changing something ("Alice enters from the south.") is only sent to the players
+in the rooms it happens in, however many players there are. The news waits in each player's Occupant until their
+next command, whose output it is sent with. A player connected by a WebSocket is also sent the news as soon as it
+arrives: the Occupant's listener is called whenever news arrives for them (see asgi.py).
+
+Every change to the contents of a room, or of the containers in it, is made while holding that room's lock, so
+players in different rooms never wait for each other, and two players taking the same item can't both get it. A
+player only holds the lock of the room they are in, apart from interactions, whose effects can change other rooms:
+they are run one at a time, so no two players can each hold a lock that the other is waiting for. Each change also
+advances the room's generation, which tells the other players in the room that the items within their reach have
+changed (see GameInteractor.find_items).
+"""
+import itertools
+import sys
+import threading
+from collections import deque
+from typing import Callable
+
+from entities.item import Item, Container
+from entities.room import Room
+from entities.world import World
+from entities.world_state import WorldState
+
+MAX_MESSAGES = 50  # the most messages kept for a player between commands, after which the oldest are dropped
+
+# how a player moving in a direction is described to the players in the room they leave and the room they enter
+LEAVING = {'north': 'leaves to the north', 'east': 'leaves to the east', 'south': 'leaves to the south',
+           'west': 'leaves to the west', 'up': 'goes up', 'down': 'goes down'}
+ARRIVING = {'north': 'enters from the south', 'east': 'enters from the west', 'south': 'enters from the north',
+            'west': 'enters from the east', 'up': 'comes up from below', 'down': 'comes down from above'}
+
+
+class Occupant:
+    """A player in a shared world, as the other players see them.
+
+    name: the name that other players know the player by.
+    messages: the news of what other players have done near the player since the player's last command.
+    listener: a function that is called whenever news arrives for the player, or None. It is called from the thread
+              of the player whose command made the news, while holding the lock of a room, so it must return at once.
+    """
+    name: str
+    messages: deque[str]
+    listener: Callable[[], None] | None
+
+    __slots__ = ('name', 'messages', 'listener')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.messages = deque(maxlen=MAX_MESSAGES)
+        self.listener = None
+
+    def take_messages(self) -> list[str]:
+        """Return the messages waiting for the player, and clear them."""
+        messages = self.messages
+        return [messages.popleft() for _ in range(len(messages))]
+
+
+class SharedWorld:
+    """A world that many players play in at once.
+
+    world: the world template.
+    state: the changes that the players have made to the world, which every player's view shares.
+    occupants: the ids of the rooms that players are in, and the Occupants of the players in each.
+    revisions: the source of the revisions of the contents of rooms and containers, and of the generations of rooms,
+               which is shared so that no two changes are given the same number.
+    interactions: the lock held while an interaction is run.
+    """
+    world: World
+    state: WorldState
+    occupants: dict[int, set[Occupant]]
+    revisions: itertools.count
+    interactions: threading.Lock
+    _locks: dict[int, threading.RLock]
+    _generations: dict[int, int]
+
+    def __init__(self, world: World) -> None:
+        self.world = world
+        self.state = WorldState()
+        self.occupants = {}
+        self.revisions = itertools.count(1)
+        self.interactions = threading.Lock()
+        self._locks = {}
+        self._generations = {}
+
+    def view(self) -> 'SharedView':
+        """Return the view of the world of a new player."""
+        return SharedView(self)
+
+    def lock(self, room: Room) -> threading.RLock:
+        """Return the lock that is held while the contents of a room, or of the containers in it, or the players in
+        it, are read or changed.
+        """
+        lock = self._locks.get(room.room_id)
+        if lock is None:  # setdefault is atomic, so two players entering a room at once are given the same lock
+            lock = self._locks.setdefault(room.room_id, threading.RLock())
+        return lock
+
+    def generation(self, room: Room) -> int:
+        """Return a number that changes whenever something within reach in a room changes."""
+        return self._generations.get(room.room_id, 0)
+
+    def changed(self, room: Room, occupant: Occupant | None = None, action: str | None = None) -> int:
+        """Record that something within reach in a room has changed, and return the room's new generation. If an
+        action is given, tell the other players in the room that the occupant did it.
+
+        Must be called while holding the room's lock.
+        """
+        generation = self._generations[room.room_id] = next(self.revisions)
+        if action is not None:
+            self._broadcast(room, f'{occupant.name} {action}.', occupant)
+        return generation
+
+    def enter(self, occupant: Occupant, room: Room, direction: str | None = None) -> None:
+        """Add a player to the players in a room, and tell the others there. direction is the direction the player
+        moved in to get there, or None if they have just joined the game.
+        """
+        with self.lock(room):
+            self._broadcast(room, f'{occupant.name} {ARRIVING[direction] if direction else "appears"}.', occupant)
+            self.occupants.setdefault(room.room_id, set()).add(occupant)
+
+    def leave(self, occupant: Occupant, room: Room, direction: str | None = None) -> None:
+        """Remove a player from the players in a room, and tell the others there. direction is the direction the
+        player is moving in, or None if they are leaving the game.
+        """
+        with self.lock(room):
+            occupants = self.occupants.get(room.room_id)
+            if occupants is not None:
+                occupants.discard(occupant)
+                if not occupants:
+                    del self.occupants[room.room_id]
+            self._broadcast(room, f'{occupant.name} {LEAVING[direction] if direction else "vanishes"}.', occupant)
+
+    def move(self, occupant: Occupant, source: Room, destination: Room, direction: str) -> None:
+        """Move a player from one room to the next, telling the players in each. Only one room's lock is held at a
+        time.
+        """
+        self.leave(occupant, source, direction)
+        self.enter(occupant, destination, direction)
+
+    def names(self, room: Room, occupant: Occupant | None = None) -> list[str]:
+        """Return the names of the players in a room, apart from the given occupant."""
+        with self.lock(room):
+            return sorted(other.name for other in self.occupants.get(room.room_id, ()) if other is not occupant)
+
+    def _broadcast(self, room: Room, message: str, sender: Occupant | None) -> None:
+        """Send a message to every player in a room but the sender. Must be called while holding the room's lock."""
+        for occupant in self.occupants.get(room.room_id, ()):
+            if occupant is not sender:
+                occupant.messages.append(message)
+                if occupant.listener is not None:
+                    occupant.listener()
+
+
+class SharedView(WorldState):
+    """A player's view of a shared world. Every change is recorded in the world's shared state, apart from the
+    rooms that the player has visited, which are the player's own.
+
+    shared: the shared world.
+    """
+    shared: SharedWorld
+
+    __slots__ = ('shared',)
+
+    def __init__(self, shared: SharedWorld) -> None:
+        super().__init__()
+        self.shared = shared
+        self.unlocked = shared.state.unlocked
+        self.unlocked_rooms = shared.state.unlocked_rooms
+        self.triggered = shared.state.triggered
+        self.room_deltas = shared.state.room_deltas
+        self.container_deltas = shared.state.container_deltas
+
+    def add_item(self, owner: Room | Container, item: Item) -> None:
+        """Add an item to the contents of a room or container. A room is changed while holding its lock, as the
+        effects of interactions change rooms other than the player's.
+        """
+        if isinstance(owner, Room):
+            with self.shared.lock(owner):
+                super().add_item(owner, item)
+                self.shared.changed(owner)
+        else:
+            super().add_item(owner, item)
+
+    def pop_item(self, owner: Room | Container, item_id: int) -> Item:
+        """Remove an item from the contents of a room or container and return it."""
+        if isinstance(owner, Room):
+            with self.shared.lock(owner):
+                item = super().pop_item(owner, item_id)
+                self.shared.changed(owner)
+                return item
+        return super().pop_item(owner, item_id)
+
+    def changes(self) -> int:
+        """Return the number of changes recorded in this view that are the player's own."""
+        return len(self.visited)
+
+    def size(self) -> int:
+        """Return an estimate of the number of bytes used by the parts of this view that are the player's own."""
+        return sys.getsizeof(self) + sys.getsizeof(self.visited)
+
+    def _next_revision(self) -> int:
+        self.revision = next(self.shared.revisions)
+        return self.revision
@@ -0,0 +1,62 @@
+"""Snapshots of a player's progress through the game.
+
+A snapshot holds the player's location and inventory, and every change they have made to the world (see
+WorldState), as a dictionary of plain JSON-compatible values. Rooms and items are referred to by their ids, so a
+snapshot is restored against the same world that it was taken in, possibly in another process.
+"""
+from typing import Any
+
+from entities.player import Player
+from entities.world import World
+from entities.world_state import ContentsDelta, WorldState
+
+Snapshot = dict[str, Any]
+
+
+def take_snapshot(player: Player) -> Snapshot:
+    """Return a snapshot of the player's progress."""
+    world = player.world
+    return {'location': player.location.room_id,
+            'inventory': list(player.inventory),
+            'visited': list(world.visited),
+            'unlocked': list(world.unlocked),
+            'unlocked_rooms': list(world.unlocked_rooms),
+            'triggered': list(world.triggered),
+            'rooms': _deltas_snapshot(world.room_deltas),
+            'containers': _deltas_snapshot(world.container_deltas)}
+
+
+def restore_snapshot(snapshot: Snapshot, world: World) -> Player:
+    """Return a player whose progress is restored from a snapshot taken in the given world."""
+    state = WorldState()
+    state.visited.update(snapshot['visited'])
+    state.unlocked.update(snapshot['unlocked'])
+    state.unlocked_rooms.update(snapshot['unlocked_rooms'])
+    state.triggered.update(snapshot['triggered'])
+    state.room_deltas.update(_restore_deltas(snapshot['rooms'], world))
+    state.container_deltas.update(_restore_deltas(snapshot['containers'], world))
+    for delta in (*state.room_deltas.values(), *state.container_deltas.values()):
+        state.revision += 1
+        delta.revision = state.revision
+
+    player = Player(world.room(snapshot['location']), state)
+    for item_id in snapshot['inventory']:
+        player.add_item(world.item(item_id))
+    return player
+
+
+def _deltas_snapshot(deltas: dict[int: ContentsDelta]) -> list[list]:
+    """Return the changes to the contents of rooms or containers as lists of the owner's id, the ids of the added
+    items, and the ids of the removed items. (JSON objects can only have string keys, so lists are used.)
+    """
+    return [[owner_id, list(delta.added), list(delta.removed)] for owner_id, delta in deltas.items()]
+
+
+def _restore_deltas(snapshot: list[list], world: World) -> dict[int: ContentsDelta]:
+    """Return the changes to the contents of rooms or containers saved by _deltas_snapshot."""
+    deltas = {}
+    for owner_id, added, removed in snapshot:
+        delta = deltas[owner_id] = ContentsDelta()
+        delta.added.update((item_id, world.item(item_id)) for item_id in added)
+        delta.removed.update(removed)
+    return deltas
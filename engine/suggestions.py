@@ -0,0 +1,157 @@
+"""Suggests how to complete a partial command, and how to correct a misspelt one, as the player types.
+
+A Vocabulary holds the words that can be typed in one place in a command: the verbs, the directions, or the names
+and keywords of items. Its words are kept in a trie of characters, so completing a prefix only visits the words that
+start with it. Misspellings are corrected with the symmetric delete method: every string that can be made by
+deleting up to MAX_DISTANCE characters from a word is indexed, so the words within MAX_DISTANCE edits of the player's
+input are found among the words that share a deletion with it, with a dictionary lookup per deletion of the input,
+however many words there are.
+
+Words can be added and removed at any time. The player's ItemIndex keeps a vocabulary of the keywords in the
+player's reach up to date as items come into and go out of reach, so a suggestion never requires a vocabulary to be
+built again. As indexing the deletions of a word takes far longer than adding it to the trie, that vocabulary does
+not index them: misspellings are corrected with the vocabulary of every keyword in the world, which the Parser
+keeps, and only the words in the player's reach are suggested.
+"""
+from typing import Iterable
+
+MAX_SUGGESTIONS = 8  # the most suggestions returned for an input
+MAX_DISTANCE = 2  # the most edits between a misspelt word and the words suggested for it
+SHORT_WORD = 4  # words of up to this many characters are only corrected to words one edit away
+MAX_CORRECTED = 30  # inputs longer than this are not corrected, as they have too many deletions to look up
+
+_END = ''  # the key in a node of the trie that marks the end of a word; every other key is a single character
+
+
+class Vocabulary:
+    """The words that can be typed in one place in a command.
+
+    root: the trie of the words, where each node is a dictionary of the characters that can follow and their nodes,
+          and the node of the last character of a word has the key _END.
+    deletions: every string made by deleting up to MAX_DISTANCE characters from a word (including the word itself),
+               and the words it can be made from; or None if the vocabulary can't correct misspellings.
+    """
+    root: dict
+    deletions: dict[str, set[str]] | None
+
+    def __init__(self, words: Iterable[str] = (), corrects: bool = True) -> None:
+        self.root = {}
+        self.deletions = {} if corrects else None
+        for word in words:
+            self.add(word)
+
+    def __contains__(self, word: str) -> bool:
+        return _END in self._node(word, {})
+
+    def add(self, word: str) -> None:
+        """Add a word, if it is not already in the vocabulary."""
+        node = self.root
+        for character in word:
+            node = node.setdefault(character, {})
+        if _END not in node:
+            node[_END] = True
+            if self.deletions is None:
+                return
+            for deletion in _deletions(word, MAX_DISTANCE):
+                self.deletions.setdefault(deletion, set()).add(word)
+
+    def remove(self, word: str) -> None:
+        """Remove a word, if it is in the vocabulary."""
+        path = []
+        node = self.root
+        for character in word:
+            path.append((node, character))
+            node = node.get(character)
+            if node is None:
+                return
+        if _END not in node:
+            return
+
+        del node[_END]
+        for parent, character in reversed(path):  # remove the nodes that no longer lead to any word
+            if parent[character]:
+                break
+            del parent[character]
+        if self.deletions is None:
+            return
+        for deletion in _deletions(word, MAX_DISTANCE):
+            words = self.deletions[deletion]
+            words.discard(word)
+            if not words:
+                del self.deletions[deletion]
+
+    def complete(self, prefix: str, limit: int = MAX_SUGGESTIONS) -> list[str]:
+        """Return the shortest words that start with a prefix, in alphabetical order if they are the same length."""
+        level = [(self._node(prefix, None), prefix)]
+        if level[0][0] is None:
+            return []
+        words = []
+        while level and len(words) < limit:  # breadth first, so that shorter words are found first
+            words += sorted(text for node, text in level if _END in node)
+            level = [(child, text + character) for node, text in level for character, child in node.items()
+                     if character != _END]
+        return words[:limit]
+
+    def correct(self, word: str, within: 'Vocabulary | None' = None, limit: int = MAX_SUGGESTIONS) -> list[str]:
+        """Return the words that a misspelt word may have been meant to be, closest first. If another vocabulary is
+        given, only the words that are also in it are returned.
+
+        Preconditions:
+         - self.deletions is not None
+        """
+        if len(word) > MAX_CORRECTED:
+            return []
+        max_distance = 1 if len(word) <= SHORT_WORD else MAX_DISTANCE
+        candidates = set()
+        for deletion in _deletions(word, max_distance):
+            candidates.update(self.deletions.get(deletion, ()))
+        if within is not None:
+            candidates = [candidate for candidate in candidates if candidate in within]
+        # words that share a deletion can be up to twice the distance apart, so the distance of each is checked
+        distances = ((edit_distance(word, candidate, max_distance), candidate) for candidate in candidates)
+        return [candidate for distance, candidate in sorted(distances) if distance <= max_distance][:limit]
+
+    def _node(self, prefix: str, default: dict | None) -> dict | None:
+        """Return the node of the last character of a prefix, or default if no word starts with it."""
+        node = self.root
+        for character in prefix:
+            node = node.get(character)
+            if node is None:
+                return default
+        return node
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """Return the number of insertions, deletions, substitutions and swaps of adjacent characters that turn one
+    string into the other, or limit + 1 if it is more than limit.
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(second) + 1))
+    for i, a in enumerate(first, 1):
+        current = [i]
+        for j, b in enumerate(second, 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a != b))
+            if i > 1 and j > 1 and a == second[j - 2] and first[i - 2] == b:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def _deletions(word: str, distance: int) -> set[str]:
+    """Return every string made by deleting up to distance characters from a word, including the word itself."""
+    found = {word}
+    level = [word]
+    for _ in range(distance):
+        next_level = []
+        for text in level:
+            for i in range(len(text)):
+                deletion = text[:i] + text[i + 1:]
+                if deletion not in found:
+                    found.add(deletion)
+                    next_level.append(deletion)
+        level = next_level
+    return found
@@ -0,0 +1,12 @@
+"""Stable ids for rooms and items.
+
+Python's built-in hash is randomised for strings each time the interpreter starts, so ids created with it change
+between processes. These ids are derived from a cryptographic digest instead, so the same name always produces the
+same id, which lets ids be saved to disk and shared between processes.
+"""
+from hashlib import blake2b
+
+
+def stable_id(name: str) -> int:
+    """Return a stable 64-bit id for the given name."""
+    return int.from_bytes(blake2b(name.encode(), digest_size=8).digest(), 'big', signed=True)
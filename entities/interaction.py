@@ -1,36 +1,206 @@
-"""Defines the abstract class Interaction.
+"""Defines the class Interaction.
 
 An interaction occurs between a specific item and the environment. When the player attempts to use the
 item in the correct room and all conditions are met, a script is run which modifies the game environment,
 and a message is returned that informs the player of what happened.
 
-TODO: figure out interactions and how to execute them
+Interactions are usually written as data (see data/loader.py), and their conditions and effects are compiled into
+Python functions when the world is loaded, so checking a condition does not involve interpreting the data again.
+Effects can change any room in the world, not only the room the interaction takes place in.
+
+Conditions are given as dictionaries with a single key:
+ - {"has": <item id>}: the player is holding the item.
+ - {"visited": <room id>}: the player has visited the room.
+ - {"unlocked": <item id>}: the player has unlocked the container.
+ - {"unlocked_room": <room id>}: the player has unlocked the room.
+ - {"triggered": <interaction id>}: the player has already triggered the interaction.
+ - {"all": [<condition>, ...]}, {"any": [<condition>, ...]} and {"not": <condition>} combine conditions.
+
+Effects are also given as dictionaries:
+ - {"unlock": <item id>} unlocks a container.
+ - {"unlock_room": <room id>} unlocks a room.
+ - {"add_item": <item id>, "room": <room id>} places an item in a room, taking it from wherever it is: the
+   player's inventory, the room it was dropped in, or the room or container it starts in.
+ - {"remove_item": <item id>} takes an item out of the player's inventory.
 """
-from typing import Callable
-from abc import ABC, abstractmethod
+from functools import partial
+from typing import Any, Callable, Iterable, Mapping
 
 from entities.item import Item
 
+# the player is passed to conditions and effects as an argument rather than imported, since entities.player
+# depends on this module
+Condition = Callable[[Any], bool]
+Effect = Callable[[Any], None]
+
 
-class Interaction(ABC):
-    """An abstract class that represents an arbitrary interaction between the player,
-    the item, and the environment.
+class Interaction:
+    """An interaction between the player, the item, and the environment.
 
-    key_item: the item that is used in order to initiate this interaction.
-    interaction: a function that defines the interaction.
+    interaction_id: the id of the interaction which the engine uses to keep track of the interaction.
+    key_id: the id of the item that is used in order to initiate this interaction. Like the keys of containers and
+            rooms, the item is referred to by id, so that it can be defined in another region of the world (see
+            data/regions.py).
+    message: the message shown to the player when the interaction happens.
+    condition: a function that is given the player and returns whether the interaction can happen.
+    effects: functions that are given the player, and change the game state when the interaction happens.
+    repeatable: whether the interaction can happen more than once.
+    source: the data that the interaction was compiled from, or None if it was not written as data.
     """
-    key_item: Item
-    interaction: Callable
+    interaction_id: int
+    key_id: int
+    message: str
+    condition: Condition
+    effects: list[Effect]
+    repeatable: bool
+    source: dict[str, Any] | None
 
-    def __int__(self, item1: Item, interaction: Callable):
-        self.key_item = item1
-        self.interaction = interaction
+    def __init__(self, interaction_id: int, key_id: int, message: str,
+                 condition: Condition | None = None,
+                 effects: Iterable[Effect] = (),
+                 repeatable: bool = False,
+                 source: dict[str, Any] | None = None):
+        self.interaction_id = interaction_id
+        self.key_id = key_id
+        self.message = message
+        self.condition = condition
+        self.effects = list(effects)
+        self.repeatable = repeatable
+        self.source = source
 
     def __contains__(self, item):
-        # use is since there should be no duplicates of items
-        return self.key_item is item
+        return self.key_id == item.item_id
+
+    def is_available(self, player) -> bool:
+        """Returns whether the interaction can happen for the given player."""
+        if not self.repeatable and self.interaction_id in player.world.triggered:
+            return False
+        return self.condition is None or self.condition(player)
+
+    def execute_interaction(self, player) -> str:
+        """Execute the interaction and return its message.
+
+        Preconditions:
+         - self.is_available(player)
+        """
+        player.world.triggered.add(self.interaction_id)
+        for effect in self.effects:
+            effect(player)
+        return self.message
+
+
+def compile_condition(spec: dict[str, Any], ids: Callable[[Any], int] = lambda value: value) -> Condition:
+    """Compile a condition written as data into a function that is given the player. ids converts the ids written
+    in the condition into the ids used by the engine.
+
+    The compiled functions are partial applications of module-level functions, so that they can be pickled.
+    """
+    if len(spec) != 1:
+        raise ValueError(f'a condition must have exactly one key: {spec!r}')
+    (kind, value), = spec.items()
+
+    if kind == 'all':
+        return partial(_all, tuple(compile_condition(part, ids) for part in value))
+    elif kind == 'any':
+        return partial(_any, tuple(compile_condition(part, ids) for part in value))
+    elif kind == 'not':
+        return partial(_not, compile_condition(value, ids))
+    elif kind in _CONDITIONS:
+        return partial(_CONDITIONS[kind], ids(value))
+    else:
+        raise ValueError(f'unknown condition {kind!r}')
+
+
+def compile_effect(spec: dict[str, Any], rooms: Mapping[int, Any], items: Mapping[int, Item],
+                   ids: Callable[[Any], int] = lambda value: value,
+                   owners: Mapping[int, Any] | None = None) -> Effect:
+    """Compile an effect written as data into a function that is given the player. rooms and items are the rooms
+    and items of the world, by id, and ids converts the ids written in the effect into the ids used by the engine.
+    owners is a dictionary of the ids of the items that add_item effects place, and the room or container that
+    each starts in, if it starts in one.
+    """
+    if 'unlock' in spec:
+        return partial(_unlock, ids(spec['unlock']))
+    elif 'unlock_room' in spec:
+        return partial(_unlock_room, ids(spec['unlock_room']))
+    elif 'add_item' in spec:
+        item = items[ids(spec['add_item'])]
+        start = None if owners is None else owners.get(item.item_id)
+        return partial(_add_item, rooms[ids(spec['room'])], item, start, rooms)
+    elif 'remove_item' in spec:
+        return partial(_remove_item, ids(spec['remove_item']))
+    else:
+        raise ValueError(f'unknown effect {spec!r}')
+
+
+def _all(conditions: tuple[Condition, ...], player) -> bool:
+    return all(condition(player) for condition in conditions)
+
+
+def _any(conditions: tuple[Condition, ...], player) -> bool:
+    return any(condition(player) for condition in conditions)
+
+
+def _not(condition: Condition, player) -> bool:
+    return not condition(player)
+
+
+def _has(item_id: int, player) -> bool:
+    return item_id in player.inventory
+
+
+def _visited(room_id: int, player) -> bool:
+    return room_id in player.world.visited
+
+
+def _unlocked(item_id: int, player) -> bool:
+    return item_id in player.world.unlocked
+
+
+def _unlocked_room(room_id: int, player) -> bool:
+    return room_id in player.world.unlocked_rooms
+
+
+def _triggered(interaction_id: int, player) -> bool:
+    return interaction_id in player.world.triggered
+
+
+_CONDITIONS = {'has': _has, 'visited': _visited, 'unlocked': _unlocked, 'unlocked_room': _unlocked_room,
+               'triggered': _triggered}
+
+
+def _unlock(item_id: int, player) -> None:
+    player.world.unlocked.add(item_id)
+
+
+def _unlock_room(room_id: int, player) -> None:
+    player.world.unlocked_rooms.add(room_id)
+
+
+def _add_item(room, item: Item, start, rooms: Mapping[int, Any], player) -> None:
+    """Move an item into a room from wherever it is in the player's game, so that it is never in two places."""
+    world = player.world
+    if world.contains(room, item.item_id):
+        return
+    if player.inventory.pop(item.item_id, None) is None:
+        owner = _owner(world, item.item_id, start, rooms)
+        if owner is not None:
+            world.pop_item(owner, item.item_id)
+    world.add_item(room, item)
+
+
+def _owner(world, item_id: int, start, rooms: Mapping[int, Any]):
+    """Return the room or container that holds an item in a player's WorldState, or None if it is in none of
+    them. Players only put items down in rooms, so an item is either in a room it was dropped in or placed in, or
+    still in the room or container it starts in.
+    """
+    for room_id, delta in world.room_deltas.items():
+        if item_id in delta.added and room_id in rooms:
+            return rooms[room_id]
+    if start is not None and world.contains(start, item_id):
+        return start
+    return None
+
 
-    @abstractmethod
-    def execute_interaction(self):
-        """Execute the interaction."""
-        raise NotImplementedError
+def _remove_item(item_id: int, player) -> None:
+    player.inventory.pop(item_id, None)
@@ -1,7 +1,40 @@
-"""Defines the item entity and its subclasses."""
+"""Defines the item entity and its subclasses.
+
+Worlds can contain a very large number of entities, so the entity classes use __slots__ instead of a per-instance
+__dict__, their names are interned, and the dictionaries that hold their contents are only created once something
+is put in them. Until then, they share the read-only EMPTY dictionary.
+"""
+import sys
+from functools import lru_cache
 from typing import Iterable
 
 
+class _EmptyDict(dict):
+    """An empty dictionary that cannot be modified, so that a single instance can be shared."""
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('EMPTY cannot be modified')
+
+    __setitem__ = setdefault = update = __ior__ = _read_only
+
+    def __reduce__(self) -> str:
+        # pickle and copy the shared instance by reference
+        return 'EMPTY'
+
+
+EMPTY = _EmptyDict()
+
+
+@lru_cache(maxsize=4096)
+def keywords_for(name: str) -> frozenset[str]:
+    """Return the default keywords that the player can use to refer to an item with the given name: its full name,
+    and the last word of its name (for example, "rusty key" and "key").
+    """
+    words = name.lower().split()
+    return frozenset({' '.join(words), words[-1]}) if words else frozenset()
+
+
 class Item:
     """An item in the game.
 
@@ -9,42 +42,57 @@ class Item:
     name: the name of the item.
     description: a description of the item.
     portable: if the player can pick the item up or not.
+    keywords: the lowercase names that the player can use to refer to the item.
     events: a collection of events associated with this item that can occur.
     """
     item_id: int
     name: str
     description: str
     portable: bool
+    keywords: frozenset[str]
+
+    __slots__ = ('item_id', 'name', 'description', 'interactable', 'portable', 'keywords')
 
-    def __init__(self, item_id: int, name: str, description: str, interactable: bool, portable: bool):
+    def __init__(self, item_id: int, name: str, description: str, interactable: bool, portable: bool,
+                 keywords: Iterable[str] | None = None):
         self.item_id = item_id
-        self.name = name
+        self.name = sys.intern(name)
         self.description = description
         self.interactable = interactable
         self.portable = portable
+        self.keywords = keywords_for(name) if keywords is None else frozenset(word.lower() for word in keywords)
 
 
 class Container(Item):
     """An item that can contain other items.
 
     contents: items that the Container contains, represented as a dictionary mapping from item_id to the Item.
-    locked: whether the Container is locked or not.
-    key: the corresponding key if the Container is locked; otherwise None.
+    locked: whether the Container is locked when the game starts. The player unlocking it is recorded in their
+            WorldState.
+    key_id: the item id of the corresponding key if the Container is locked; otherwise None.
     """
     contents: dict[int: Item]
     locked: bool
+    key_id: int | None
+
+    __slots__ = ('contents', 'locked', 'key_id')
 
     def __init__(self, item_id: int,
                  name: str,
                  description: str,
                  interactable: bool,
-                 locked: bool):
-        super().__init__(item_id, name, description, interactable, False)
-        self.contents = {}
+                 locked: bool,
+                 key_id: int | None = None,
+                 keywords: Iterable[str] | None = None):
+        super().__init__(item_id, name, description, interactable, False, keywords)
+        self.contents = EMPTY
         self.locked = locked
+        self.key_id = key_id
 
     def insert_item(self, item: Item) -> None:
         """Insert the given item into the Container."""
+        if self.contents is EMPTY:
+            self.contents = {}
         self.contents[item.item_id] = item
 
     def insert_items(self, items: Iterable[Item]) -> None:
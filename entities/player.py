@@ -2,6 +2,7 @@
 """
 from entities.item import Item
 from entities.room import Room
+from entities.world_state import WorldState
 
 
 class Player:
@@ -11,13 +12,18 @@ class Player:
     inventory: the player's inventory. This is represented as a dictionary of the item id, and the item. inventory
                cannot contain Containers.
     location: the player's current location.
+    world: the changes the player has made to the world.
     """
     inventory: dict[int: Item]
     location: Room
+    world: WorldState
 
-    def __init__(self, room: Room):
+    __slots__ = ('location', 'inventory', 'world')
+
+    def __init__(self, room: Room, world: WorldState | None = None):
         self.location = room
         self.inventory = {}
+        self.world = WorldState() if world is None else world
 
     def add_item(self, item: Item) -> None:
         """Add an item into the player's inventory."""
@@ -31,7 +37,7 @@ class Player:
         - item in self.inventory
         """
         self.inventory.pop(item.item_id)
-        self.location.contents[item.item_id] = Item
+        self.world.add_item(self.location, item)
 
     def has_item(self, item_id: int) -> bool:
         """Returns if the player has the item."""
@@ -2,8 +2,11 @@
 
 This class is an entity that serves as the building blocks for the map of the game.
 """
+import sys
+
+from entities.ids import stable_id
 from entities.interaction import Interaction
-from entities.item import Item
+from entities.item import Item, EMPTY
 
 DIRECTIONS = {"north": "south", "east": "west", "south": "north", "west": "east",
               "up": "down", "down": "up"}
@@ -12,28 +15,52 @@ DIRECTIONS = {"north": "south", "east": "west", "south": "north", "west": "east"
 class Room:
     """A room that the player can traverse and interact with.
 
+    room_id: the id of the room which the engine uses to keep track of the room.
     name: the name of the room.
     description: a description of the room.
-    visited: whether if the player has already visited this room or not.
-    contents: a dictionary of item ids and the item that it contains.
+    contents: a dictionary of item ids and the item that the room initially contains.
     neighbours: a dictionary of directions and a connected room in that direction that the player can move to.
-    interactions: a collection of Interactions associated with the room that updates the game state after
-                  certain conditions are fulfilled.
+    region: the name of the region of the map that the room belongs to, or None if the map is not split into
+            regions.
+    portals: a dictionary of directions and the connected room in that direction, for connected rooms that are in
+             a different region. Each room is given as a tuple of its region and its room id, since the region
+             may not be loaded.
+    locked: whether the room is locked when the game starts, so that the player cannot enter it.
+    key_id: the item id of the key that unlocks the room if it is locked; otherwise None.
+    interactions: the Interactions associated with the room that update the game state after certain conditions
+                  are fulfilled, as a dictionary of the item ids of their key items and the interactions using that
+                  item, in the order they were added.
+
+    Rooms are shared by every player, so they are not modified once the world has been built: the changes each
+    player makes to a room are recorded in their WorldState instead.
     """
+    room_id: int
     name: str
     description: str
-    visited: bool
     contents: dict[int: Item]
     neighbours: dict[str: 'Room']
-    interactions: set[Interaction]
-
-    def __init__(self, name: str, description: str):
-        self.name = name
+    region: str | None
+    portals: dict[str: tuple[str, int]]
+    locked: bool
+    key_id: int | None
+    interactions: dict[int: list[Interaction]]
+
+    # like items, rooms are slotted and only create their dictionaries once they are needed (see entities/item.py)
+    __slots__ = ('room_id', 'name', 'description', 'contents', 'neighbours', 'region', 'portals', 'locked', 'key_id',
+                 'interactions')
+
+    def __init__(self, name: str, description: str, room_id: int | None = None, region: str | None = None,
+                 locked: bool = False, key_id: int | None = None):
+        self.room_id = stable_id(name) if room_id is None else room_id
+        self.name = sys.intern(name)
         self.description = description
-        self.visited = False
-        self.contents = {}
-        self.neighbours = {}
-        self.interactions = set()
+        self.contents = EMPTY
+        self.neighbours = EMPTY
+        self.region = region if region is None else sys.intern(region)
+        self.portals = EMPTY
+        self.locked = locked
+        self.key_id = key_id
+        self.interactions = EMPTY
 
     def contains(self, item_id: int) -> bool:
         """Returns whether an item is in the room."""
@@ -41,6 +68,8 @@ class Room:
 
     def add_item(self, item: Item) -> None:
         """Adds an item to the contents of the room."""
+        if self.contents is EMPTY:
+            self.contents = {}
         self.contents[item.item_id] = item
 
     def pop_item(self, item_id: int) -> Item:
@@ -55,9 +84,25 @@ class Room:
         - direction not in self.neighbours
         - DIRECTIONS[direction] not in neighbour.neighbours
         """
+        if self.neighbours is EMPTY:
+            self.neighbours = {}
+        if neighbour.neighbours is EMPTY:
+            neighbour.neighbours = {}
         self.neighbours[direction] = neighbour
         neighbour.neighbours[DIRECTIONS[direction]] = self
 
+    def add_portal(self, region: str, room_id: int, direction: str) -> None:
+        """Attach a neighbour in a different region to this room. Unlike add_neighbour, this only connects this
+        room to the neighbour: the neighbour's region must add the portal back to this room.
+
+        Preconditions
+        - direction in DIRECTIONS
+        - direction not in self.neighbours and direction not in self.portals
+        """
+        if self.portals is EMPTY:
+            self.portals = {}
+        self.portals[direction] = (sys.intern(region), room_id)
+
     def add_neighbours(self, neighbours: dict['Room': str]) -> None:
         """Attach a collection of neighbours to this room.
 
@@ -68,15 +113,20 @@ class Room:
 
     def add_interaction(self, interaction: Interaction) -> None:
         """Add an interaction that takes place in this room."""
-        self.interactions.add(interaction)
+        if self.interactions is EMPTY:
+            self.interactions = {}
+        self.interactions.setdefault(interaction.key_id, []).append(interaction)
 
-    def execute_interaction(self, item: Item) -> tuple[bool, str | None]:
+    def execute_interaction(self, item: Item, player) -> tuple[bool, str | None]:
         """Given an item, try to use the item in the room by finding a valid interaction. If found,
         execute it and return a tuple containing True and its output message. Otherwise, return a tuple
         containing False and None.
+
+        Only the interactions that use the given item are checked, so this does not get slower as more
+        interactions are added to the room.
         """
-        for interaction in self.interactions:
-            if item in interaction:
-                return True, interaction.execute_interaction()
+        for interaction in self.interactions.get(item.item_id, ()):
+            if interaction.is_available(player):
+                return True, interaction.execute_interaction(player)
 
         return False, None
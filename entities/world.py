@@ -0,0 +1,49 @@
+"""The world that the game takes place in: every room and item in the game, and where the player starts.
+
+The world is a template that is shared by every player. See WorldState for the changes each player makes to it.
+"""
+from entities.item import Item
+from entities.room import Room
+
+
+class World:
+    """Every room and item in the game.
+
+    rooms: a dictionary of room ids and rooms.
+    items: a dictionary of item ids and items, including the items inside containers.
+    start: the room that players start in.
+    """
+    rooms: dict[int: Room]
+    items: dict[int: Item]
+    start: Room | None
+
+    def __init__(self) -> None:
+        self.rooms = {}
+        self.items = {}
+        self.start = None
+
+    def add_room(self, room: Room) -> None:
+        """Add a room to the world. The first room added is the starting room, unless start is changed.
+
+        Preconditions:
+         - room.room_id not in self.rooms
+        """
+        self.rooms[room.room_id] = room
+        if self.start is None:
+            self.start = room
+
+    def add_item(self, item: Item) -> None:
+        """Add an item to the world.
+
+        Preconditions:
+         - item.item_id not in self.items
+        """
+        self.items[item.item_id] = item
+
+    def room(self, room_id: int) -> Room:
+        """Return the room with the given id."""
+        return self.rooms[room_id]
+
+    def item(self, item_id: int) -> Item:
+        """Return the item with the given id."""
+        return self.items[item_id]
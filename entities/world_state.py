@@ -0,0 +1,192 @@
+"""The state of the world as seen by a single player.
+
+The rooms and items that make up the world are a template that is shared by every player, and are never modified
+while the game is running. Instead, every change a player makes to the world (visiting a room, moving an item,
+unlocking a container) is recorded in that player's WorldState, which is layered over the template. A WorldState
+only stores these changes, so its size is proportional to how much the player has changed the world, and not to
+the size of the world.
+"""
+import sys
+from typing import Mapping
+
+from entities.item import Item, Container
+from entities.room import Room
+
+
+class ContentsDelta:
+    """The changes made to the contents of a single room or container.
+
+    added: a dictionary of the ids and items that were added to the contents.
+    removed: the ids of the items in the template's contents that were removed.
+    revision: the revision of the WorldState when the contents last changed.
+    """
+    added: dict[int: Item]
+    removed: set[int]
+    revision: int
+
+    __slots__ = ('added', 'removed', 'revision')
+
+    def __init__(self) -> None:
+        self.added = {}
+        self.removed = set()
+        self.revision = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.added) or bool(self.removed)
+
+
+class WorldState:
+    """The changes a single player has made to the shared world template.
+
+    visited: the ids of the rooms the player has visited.
+    unlocked: the ids of the containers the player has unlocked.
+    unlocked_rooms: the ids of the locked rooms the player has unlocked.
+    triggered: the ids of the interactions the player has triggered.
+    room_deltas: a dictionary of room ids and the changes made to the contents of that room.
+    container_deltas: a dictionary of container item ids and the changes made to the contents of that container.
+    revision: the number of times the contents of a room or container have changed, used to tell whether something
+              calculated from the contents is out of date (see revision_of).
+    """
+    visited: set[int]
+    unlocked: set[int]
+    unlocked_rooms: set[int]
+    triggered: set[int]
+    room_deltas: dict[int: ContentsDelta]
+    container_deltas: dict[int: ContentsDelta]
+    revision: int
+
+    __slots__ = ('visited', 'unlocked', 'unlocked_rooms', 'triggered', 'room_deltas', 'container_deltas', 'revision')
+
+    def __init__(self) -> None:
+        self.visited = set()
+        self.unlocked = set()
+        self.unlocked_rooms = set()
+        self.triggered = set()
+        self.room_deltas = {}
+        self.container_deltas = {}
+        self.revision = 0
+
+    def has_visited(self, room: Room) -> bool:
+        """Returns whether the player has visited the room."""
+        return room.room_id in self.visited
+
+    def visit(self, room: Room) -> None:
+        """Mark the room as visited."""
+        self.visited.add(room.room_id)
+
+    def is_locked(self, owner: Room | Container) -> bool:
+        """Returns whether the room or container is locked."""
+        if isinstance(owner, Room):
+            return owner.locked and owner.room_id not in self.unlocked_rooms
+        return owner.locked and owner.item_id not in self.unlocked
+
+    def unlock(self, owner: Room | Container) -> None:
+        """Unlock the room or container."""
+        if owner.locked and isinstance(owner, Room):
+            self.unlocked_rooms.add(owner.room_id)
+        elif owner.locked:
+            self.unlocked.add(owner.item_id)
+
+    def contents(self, owner: Room | Container) -> Mapping[int, Item]:
+        """Return the current contents of a room or container as a mapping of item ids and items.
+
+        The returned mapping must not be modified: use add_item and pop_item instead.
+        """
+        delta = self._deltas(owner).get(self._owner_id(owner))
+        if delta is None:
+            return owner.contents
+
+        contents = {item_id: item for item_id, item in owner.contents.items() if item_id not in delta.removed}
+        contents.update(delta.added)
+        return contents
+
+    def revision_of(self, owner: Room | Container) -> int:
+        """Return a number that changes whenever the contents of a room or container change, and is 0 whenever they
+        are the same as in the template.
+        """
+        delta = self._deltas(owner).get(self._owner_id(owner))
+        return 0 if delta is None else delta.revision
+
+    def contains(self, owner: Room | Container, item_id: int) -> bool:
+        """Returns whether an item is currently in a room or container."""
+        delta = self._deltas(owner).get(self._owner_id(owner))
+        if delta is None:
+            return item_id in owner.contents
+        return item_id in delta.added or (item_id in owner.contents and item_id not in delta.removed)
+
+    def add_item(self, owner: Room | Container, item: Item) -> None:
+        """Add an item to the contents of a room or container.
+
+        Preconditions:
+         - not self.contains(owner, item.item_id)
+        """
+        deltas = self._deltas(owner)
+        owner_id = self._owner_id(owner)
+        delta = deltas.get(owner_id)
+        if delta is None:
+            delta = deltas[owner_id] = ContentsDelta()
+
+        if owner.contents.get(item.item_id) is item:  # the item is being put back where it started
+            delta.removed.discard(item.item_id)
+        else:
+            delta.added[item.item_id] = item
+
+        delta.revision = self._next_revision()
+        if not delta:
+            del deltas[owner_id]
+
+    def pop_item(self, owner: Room | Container, item_id: int) -> Item:
+        """Remove an item from the contents of a room or container and return it.
+
+        Preconditions:
+         - self.contains(owner, item_id)
+        """
+        deltas = self._deltas(owner)
+        owner_id = self._owner_id(owner)
+        delta = deltas.get(owner_id)
+        if delta is None:
+            delta = deltas[owner_id] = ContentsDelta()
+
+        if item_id in delta.added:
+            item = delta.added.pop(item_id)
+        else:
+            item = owner.contents[item_id]
+            delta.removed.add(item_id)
+
+        delta.revision = self._next_revision()
+        if not delta:
+            del deltas[owner_id]
+        return item
+
+    def changes(self) -> int:
+        """Return the number of changes recorded in this state."""
+        return (len(self.visited) + len(self.unlocked) + len(self.unlocked_rooms) + len(self.triggered)
+                + sum(len(delta.added) + len(delta.removed) for delta in self.room_deltas.values())
+                + sum(len(delta.added) + len(delta.removed) for delta in self.container_deltas.values()))
+
+    def size(self) -> int:
+        """Return an estimate of the number of bytes used by this state. The items and rooms themselves belong to
+        the shared template, so only the references to them are counted.
+        """
+        size = sys.getsizeof(self)
+        for collection in (self.visited, self.unlocked, self.unlocked_rooms, self.triggered,
+                           self.room_deltas, self.container_deltas):
+            size += sys.getsizeof(collection)
+        for deltas in (self.room_deltas, self.container_deltas):
+            for delta in deltas.values():
+                size += sys.getsizeof(delta) + sys.getsizeof(delta.added) + sys.getsizeof(delta.removed)
+        return size
+
+    def _next_revision(self) -> int:
+        """Count a change to the contents of a room or container, and return the new revision."""
+        self.revision += 1
+        return self.revision
+
+    def _deltas(self, owner: Room | Container) -> dict[int: ContentsDelta]:
+        """Return the dictionary that records the changes to the owner's contents."""
+        return self.room_deltas if isinstance(owner, Room) else self.container_deltas
+
+    @staticmethod
+    def _owner_id(owner: Room | Container) -> int:
+        """Return the id that the owner's changes are recorded under."""
+        return owner.room_id if isinstance(owner, Room) else owner.item_id
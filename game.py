@@ -1,62 +1,122 @@
-"""This is the main module that runs the game."""
-import system
-from system import DIRECTIONS, COMMANDS
+"""This is the main module that runs the game in a terminal.
 
+The game is played with the same engine as the web server (see engine/controller.py), in the world loaded from a
+world data file.
 
-from data import test_data
-# from data import rooms
-# from data import items
+In batch mode, the commands are read from a file (or standard input, given as -), one per line, and nothing is
+prompted for. The output of each command is written as a line of JSON, {"input": <command>, "output": [<line>, ...]},
+preceded by the description of the starting room, whose input is null. Input and output are read and written in
+large blocks rather than line by line, so long scripted runs are not slowed down by the terminal. A quit command ends
+the run.
 
-player = system.Player(location=test_data.test_room1)
+Usage: python game.py [--world PATH] [--batch FILE [--output PATH]]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Iterable, TextIO
 
+from data.loader import load_world
+from engine.commands import VERBS
+from engine.controller import Controller
+from engine.gameinteractor import GameInteractor
+from engine.navigation import RoomGraph
+from engine.parser import Parser
+from entities.player import Player
 
-def game_loop() -> bool:
-    """The main game loop. Given an input by the player, respond to the input according to what command was given.
+DEFAULT_WORLD = Path(__file__).parent / 'data' / 'test_world.jsonl'
+BUFFER_SIZE = 1 << 20
+
+
+def new_game(world_file: str | Path) -> Controller:
+    """Return a new game in the world loaded from a world data file."""
+    world = load_world(world_file)
+    interactor = GameInteractor(Player(world.start), graph=RoomGraph(world.rooms.values()))
+    return Controller(interactor, Parser(world.items.values()))
+
+
+def is_quit(command: str) -> bool:
+    """Return whether a command asks to quit the game."""
+    words = command.lower().split()
+    return bool(words) and VERBS.get(words[0]) == 'quit'
+
+
+def play(controller: Controller) -> None:
+    """Play the game in the terminal until the player quits, or input ends."""
+    print('\n'.join(controller.announce_room()))
+    while True:
+        try:
+            command = input('> ')
+        except EOFError:
+            return
+        if not is_quit(command):
+            print('\n'.join(controller.parse_input(command)))
+        elif confirm_quit(controller):
+            return
+
+
+def confirm_quit(controller: Controller) -> bool:
+    """Ask the player if they want to quit or not, and return whether they confirm that they do."""
+    while True:
+        print('Are you sure you want to quit?')
+        try:
+            answer = input('> ').lower().strip()
+        except EOFError:
+            return True
+        if answer in ('yes', 'y'):
+            print('Ending the game...')
+            return True
+        elif answer in ('no', 'n'):
+            print('\n'.join(controller.interactor.describe_room()))
+            return False
+
+
+def play_batch(controller: Controller, commands: Iterable[str], output: TextIO) -> int:
+    """Send every command to the game until a quit command, writing the output of each as a line of JSON. Blank
+    lines are skipped. Return the number of commands sent.
     """
-    user_input = input('> ').lower().split(' ')
-
-    # TODO: implement function for processing input before response
-
-    # respond to user input
-    if user_input[0] in COMMANDS['quit']:
-        return system.game_quit(player)
-    elif user_input[0] in COMMANDS['inventory']:
-        player.open_inventory()
-    elif user_input[0] in COMMANDS['move']:
-        if len(user_input) != 1:
-            direction = user_input[1]
-        elif user_input[0] in DIRECTIONS:
-            direction = user_input[0]
-        else:
-            print('Move where?')
-            direction = input('> ')
-
-        player.move(direction)
-    elif user_input[0] in COMMANDS['take']:
-        item_name = user_input[1]
-        print(player.take_item(item_name))
-    elif user_input[0] in COMMANDS['interact']:
-        # TODO: implement solution for interacting with items
-        ...
-        raise NotImplementedError
-    elif user_input[0] in COMMANDS['unlock']:
-        container_name = user_input[1]
-        key_name = user_input[3]
-
-        print(player.unlock_with_key(key_name, container_name))
-
-    elif user_input[0] in COMMANDS['inspect']:
-        item_name = user_input[1]
-        print(player.inspect_item(item_name))
-    elif user_input[0] in COMMANDS['help']:
-        system.game_help()
-    else:
-        print("I don't understand.")
-
-    return True
+    encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+    write = output.write
+    parse_input = controller.parse_input
+    write(encode({'input': None, 'output': controller.announce_room()}))
+    write('\n')
+    sent = 0
+    for line in commands:
+        command = line.strip()
+        if not command:
+            continue
+        if is_quit(command):
+            break
+        write(encode({'input': command, 'output': parse_input(command)}))
+        write('\n')
+        sent += 1
+    return sent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--world', default=str(DEFAULT_WORLD), help='the world file to play in')
+    parser.add_argument('--batch', metavar='FILE',
+                        help='read commands from this file (or standard input, given as -) and write their output as '
+                             'JSON Lines, instead of playing interactively')
+    parser.add_argument('--output', help='the file to write the output of batch mode to, instead of standard output')
+    args = parser.parse_args()
+    if args.output is not None and args.batch is None:
+        parser.error('--output can only be used with --batch')
+
+    controller = new_game(args.world)
+    if args.batch is None:
+        play(controller)
+        return
+
+    commands = (open(sys.stdin.fileno(), encoding='utf-8', buffering=BUFFER_SIZE, closefd=False)
+                if args.batch == '-' else open(args.batch, encoding='utf-8', buffering=BUFFER_SIZE))
+    output = (open(sys.stdout.fileno(), 'w', encoding='utf-8', buffering=BUFFER_SIZE, closefd=False)
+              if args.output is None else open(args.output, 'w', encoding='utf-8', buffering=BUFFER_SIZE))
+    with commands, output:
+        play_batch(controller, commands, output)
 
 
 if __name__ == '__main__':
-    print(player.location.describe_room())
-    while game_loop():
-        pass
+    main()
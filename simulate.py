@@ -0,0 +1,266 @@
+"""A headless harness that plays the game with many bots at once, for load testing and for fuzzing world data.
+
+Each agent plays its own game by sending commands straight to a Controller, as the web server would, without any
+web framework or terminal in the way. A RandomAgent wanders the world, picking up, dropping, inspecting, unlocking and
+using whatever it finds, and occasionally types nonsense. A ScriptedAgent sends a fixed list of commands. The agents
+are split between a pool of processes, each of which loads the world once.
+
+Every command is timed, and the harness reports the number of commands per second, the latency percentiles of each
+kind of command, and every exception raised by the engine, along with the agent and step that raised it so that it
+can be reproduced. A command that returns anything other than a list of strings is reported as an exception too.
+
+A generated world (see data/generator.py) of any size can be played in place of a world file, with --rooms.
+
+Usage: python simulate.py [--agents N] [--steps N] [--processes N] [--world PATH | --rooms N] [--script PATH]
+                          [--seed N]
+"""
+import argparse
+import math
+import os
+import random
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from data.generator import generate_world
+from data.loader import load_world
+from engine.controller import Controller
+from engine.gameinteractor import GameInteractor
+from engine.navigation import RoomGraph
+from engine.parser import Parser
+from entities.player import Player
+from entities.world import World
+
+DEFAULT_WORLD = Path(__file__).parent / 'data' / 'test_world.jsonl'
+NONSENSE = ['', 'xyzzy', 'take', 'unlock', 'unlock with', 'go', 'go nowhere', 'drop everything', 'use', 'goto',
+            'inspect', 'take the', 'unlock chest with', '!!!', 'north north', 'pick up', 'look at the', 'go to',
+            'unlock the with the', 'take key from']
+BUCKETS_PER_DOUBLING = 8  # latencies are counted in buckets that are each about 9% wider than the last
+
+# the world, its map and its parser, loaded once in each process of the pool
+_world: World | None = None
+_graph: RoomGraph | None = None
+_parser: Parser | None = None
+
+
+class RandomAgent:
+    """An agent that plays by picking a random command that makes sense in its current situation.
+
+    rng: the random number generator that the agent uses, seeded so that the agent's game can be replayed.
+    nonsense: the probability of sending a malformed or meaningless command instead.
+    """
+    rng: random.Random
+    nonsense: float
+
+    def __init__(self, seed: int, nonsense: float = 0.05) -> None:
+        self.rng = random.Random(seed)
+        self.nonsense = nonsense
+
+    def next_command(self, controller: Controller) -> str:
+        """Return the next command to send."""
+        rng = self.rng
+        if rng.random() < self.nonsense:
+            return rng.choice(NONSENSE)
+
+        interactor = controller.interactor
+        player = interactor.player
+        nearby = [item.name.lower() for item_id, item in interactor.index.items.items() if item_id not in
+                  player.inventory]
+        held = [item.name.lower() for item in player.inventory.values()]
+        exits = list(player.location.neighbours) + list(player.location.portals)
+
+        choices = ['room', 'inventory', 'help']
+        if exits:
+            choices += [f'go {rng.choice(exits)}'] * 4
+        if nearby:
+            choices += [f'take {rng.choice(nearby)}'] * 2 + [f'inspect {rng.choice(nearby)}']
+        if held:
+            choices += [f'drop {rng.choice(held)}', f'use {rng.choice(held)}']
+        if nearby and held:
+            choices.append(f'unlock {rng.choice(nearby)} with {rng.choice(held)}')
+        if interactor.graph is not None and player.world.visited:
+            room = interactor.graph.rooms[rng.randrange(len(interactor.graph))]
+            choices.append(f'goto {room.name.lower()}')
+        return rng.choice(choices)
+
+
+class ScriptedAgent:
+    """An agent that sends a fixed list of commands, starting again from the top when it reaches the end.
+
+    commands: the commands to send.
+    step: the position of the next command in commands.
+    """
+    commands: list[str]
+    step: int
+
+    def __init__(self, commands: list[str]) -> None:
+        if not commands:
+            raise ValueError('a script must have at least one command')
+        self.commands = commands
+        self.step = 0
+
+    def next_command(self, controller: Controller) -> str:
+        """Return the next command to send."""
+        command = self.commands[self.step % len(self.commands)]
+        self.step += 1
+        return command
+
+
+class Results:
+    """The measurements taken while agents played.
+
+    commands: the number of commands sent.
+    seconds: the total time spent executing commands.
+    latencies: for the name of each command that the parser found (see engine/commands.py), a Counter of latency
+               buckets and the number of commands that fell in each.
+    errors: for each distinct error, the number of times it happened.
+    examples: for each distinct error, a description of the first time it happened.
+    """
+    commands: int
+    seconds: float
+    latencies: dict[str, Counter]
+    errors: Counter
+    examples: dict[str, str]
+
+    def __init__(self) -> None:
+        self.commands = 0
+        self.seconds = 0.0
+        self.latencies = {}
+        self.errors = Counter()
+        self.examples = {}
+
+    def record(self, command: str, nanoseconds: int) -> None:
+        """Record how long a command took, given the name of the command that the parser found in the input."""
+        bucket = int(math.log2(max(nanoseconds, 1)) * BUCKETS_PER_DOUBLING)
+        self.latencies.setdefault(command, Counter())[bucket] += 1
+        self.commands += 1
+        self.seconds += nanoseconds / 1e9
+
+    def record_error(self, error: str, example: str) -> None:
+        """Record an error, keeping the first example of each distinct error."""
+        self.errors[error] += 1
+        self.examples.setdefault(error, example)
+
+    def merge(self, other: 'Results') -> None:
+        """Add the measurements in other to these."""
+        self.commands += other.commands
+        self.seconds += other.seconds
+        for kind, buckets in other.latencies.items():
+            self.latencies.setdefault(kind, Counter()).update(buckets)
+        self.errors.update(other.errors)
+        for error, example in other.examples.items():
+            self.examples.setdefault(error, example)
+
+    def percentile(self, kind: str, fraction: float) -> float:
+        """Return an estimate of a percentile of the latency of a kind of command, in microseconds."""
+        buckets = self.latencies[kind]
+        target = fraction * sum(buckets.values())
+        seen = 0
+        for bucket in sorted(buckets):
+            seen += buckets[bucket]
+            if seen >= target:
+                return 2 ** ((bucket + 1) / BUCKETS_PER_DOUBLING) / 1000  # the top of the bucket
+        return 0.0
+
+
+def load(world_file: str, rooms: int | None = None) -> None:
+    """Load the world used by the agents in this process, or generate a world with the given number of rooms."""
+    global _world, _graph, _parser
+    _world = load_world(world_file) if rooms is None else generate_world(rooms)
+    _graph = RoomGraph(_world.rooms.values())
+    _parser = Parser(_world.items.values())
+
+
+def play(agents: list[tuple[str, int, list[str] | None]], steps: int) -> Results:
+    """Play a game with each agent for the given number of steps, and return the measurements. Each agent is given
+    as its name, its seed, and its script (or None for a RandomAgent).
+    """
+    results = Results()
+    for name, seed, script in agents:
+        agent = RandomAgent(seed) if script is None else ScriptedAgent(script)
+        controller = Controller(GameInteractor(Player(_world.start), graph=_graph), _parser)
+        controller.announce_room()
+        for step in range(steps):
+            command = agent.next_command(controller)
+            try:  # the input is parsed again to classify it, as parse_input does not return the command it found
+                kind = controller.parser.parse(command, controller.interactor.find_items).command
+            except Exception:  # recorded below, when parse_input raises it again
+                kind = 'invalid'
+            start = time.perf_counter_ns()
+            try:
+                output = controller.parse_input(command)
+            except Exception as error:
+                elapsed = time.perf_counter_ns() - start
+                frame = traceback.extract_tb(error.__traceback__)[-1]
+                results.record_error(f'{type(error).__name__}: {error} ({Path(frame.filename).name}:{frame.lineno})',
+                                     f'{name} (seed {seed}), step {step}: {command!r}')
+            else:
+                elapsed = time.perf_counter_ns() - start
+                if not isinstance(output, list) or not all(isinstance(line, str) for line in output):
+                    results.record_error(f'InvalidOutput: returned {type(output).__name__}',
+                                         f'{name} (seed {seed}), step {step}: {command!r} returned {output!r}')
+            results.record(kind, elapsed)
+    return results
+
+
+def simulate(agents: int, steps: int, processes: int, world_file: str, script: list[str] | None = None,
+             seed: int = 0, chunk_size: int = 50, rooms: int | None = None) -> tuple[Results, float]:
+    """Play with the given number of agents in a pool of processes, and return the combined measurements and the
+    wall-clock time taken.
+    """
+    specs = [(f'agent {i}', seed + i, script) for i in range(agents)]
+    chunks = [specs[i:i + chunk_size] for i in range(0, len(specs), chunk_size)]
+    results = Results()
+    with ProcessPoolExecutor(processes, initializer=load, initargs=(world_file, rooms)) as pool:
+        start = time.perf_counter()
+        for chunk_results in pool.map(play, chunks, [steps] * len(chunks)):
+            results.merge(chunk_results)
+        wall = time.perf_counter() - start
+    return results, wall
+
+
+def report(results: Results, wall: float, processes: int) -> None:
+    """Print the throughput, latency percentiles and errors."""
+    print(f'{results.commands:,} commands in {wall:.2f}s using {processes} processes: '
+          f'{results.commands / wall:,.0f} commands/sec '
+          f'({results.commands / results.seconds:,.0f} commands/sec per process while executing)')
+    print()
+    print(f'{"command":<12} {"count":>10} {"p50 (us)":>10} {"p90 (us)":>10} {"p99 (us)":>10} {"max (us)":>10}')
+    for kind in sorted(results.latencies, key=lambda kind: -sum(results.latencies[kind].values())):
+        count = sum(results.latencies[kind].values())
+        print(f'{kind:<12} {count:>10,} ' + ' '.join(f'{results.percentile(kind, fraction):>10.1f}'
+                                                     for fraction in (0.5, 0.9, 0.99, 1.0)))
+    print()
+    if not results.errors:
+        print('No exceptions.')
+    for error, count in results.errors.most_common():
+        print(f'{count:>8,} x {error}')
+        print(f'           first seen in {results.examples[error]}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--agents', type=int, default=1000, help='the number of agents')
+    parser.add_argument('--steps', type=int, default=200, help='the number of commands each agent sends')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='the number of processes')
+    parser.add_argument('--world', default=str(DEFAULT_WORLD), help='the world file to play in')
+    parser.add_argument('--rooms', type=int, help='play in a generated world with this many rooms instead')
+    parser.add_argument('--script', help='a file of commands, one per line, for every agent to send in place of '
+                                         'random commands')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the first random agent')
+    args = parser.parse_args()
+
+    script = None
+    if args.script is not None:
+        script = [line.strip() for line in Path(args.script).read_text().splitlines() if line.strip()]
+        if not script:
+            parser.error(f'{args.script} has no commands')
+    results, wall = simulate(args.agents, args.steps, args.processes, args.world, script, args.seed,
+                             rooms=args.rooms)
+    report(results, wall, args.processes)
+
+
+if __name__ == '__main__':
+    main()
@@ -69,18 +69,24 @@ class Container(Item):
         """Print the contents of the container to the player. If there is nothing inside the container,
         tell the player.
         """
+        parts = []
+        self._write_contents(parts)
+        return ''.join(parts)
+
+    def _write_contents(self, parts: list[str]) -> None:
+        """Append the pieces of display_contents to parts, so that nested containers are written into the same
+        list instead of building and copying a string for each level.
+        """
         if not self.contents:
-            return f'It is empty.'
+            parts.append('It is empty.')
+            return
 
-        contents_str = f'The {self.name.lower()} contains: \n'
+        parts.append(f'The {self.name.lower()} contains: \n')
         for item in self.contents:
+            parts.append(f'{item.name} \n')
             if isinstance(item, Container):
-                contents_str += f'{item.name} \n'
-                contents_str += item.display_contents() + '\n'
-            else:
-                contents_str += f'{item.name} \n'
-
-        return contents_str
+                item._write_contents(parts)
+                parts.append('\n')
 
     def unlock_container(self, key: Item) -> str:
         """Attempt to unlock the container with the given item. If it is already unlocked, tell the player. If the
@@ -102,7 +108,9 @@ class Container(Item):
             if item_name in item.keywords:
                 return (item, self)
             elif isinstance(item, Container) and item.locked is False:
-                return item.search_for_item(item_name)
+                search = item.search_for_item(item_name)
+                if search is not None:
+                    return search
 
         # if the item can't be found inside the container
         return None
@@ -0,0 +1,12 @@
+"""Configuration shared by the tests.
+
+The tests import the game's packages from the root of the repository, and the modules of the web server from app/,
+as the server itself does.
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+for path in (ROOT, ROOT / 'app'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
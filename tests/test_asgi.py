@@ -0,0 +1,65 @@
+"""Tests for the WebSocket of the ASGI application in a shared world, which sends the player news as it arrives."""
+import asyncio
+import json
+
+import asgi
+import game_factory
+import handlers
+from engine.session_manager import SessionManager
+
+
+class Client:
+    """A client of the WebSocket, which is served by the application in a task of its own."""
+
+    def __init__(self) -> None:
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        self.incoming.put_nowait({'type': 'websocket.connect'})
+        scope = {'type': 'websocket', 'path': '/ws', 'headers': []}
+        self.task = asyncio.create_task(asgi.app(scope, self.incoming.get, self.outgoing.put))
+
+    async def next(self) -> dict:
+        return await asyncio.wait_for(self.outgoing.get(), 5)
+
+    async def lines(self) -> list[str]:
+        return json.loads((await self.next())['text'])
+
+
+def test_news_is_sent_to_websockets_as_it_arrives(monkeypatch) -> None:
+    game_factory.shared_world.cache_clear()
+    sessions = SessionManager(game_factory.initialise_shared, on_close=game_factory.close)
+    monkeypatch.setattr(asgi, 'sessions', sessions)
+
+    async def main() -> None:
+        client = Client()
+        assert (await client.next())['type'] == 'websocket.accept'
+        assert (await client.lines())[0] == 'Test Room'
+
+        # another player, who plays over POST requests, joins and leaves the room
+        other, _ = await asyncio.to_thread(handlers.on_load, sessions, None)
+        name = f'Adventurer {other[:4]}'
+        assert await client.lines() == [f'{name} appears.']
+        await asyncio.to_thread(handlers.execute_command, sessions, other, {'input': 'north'})
+        assert await client.lines() == [f'{name} leaves to the north.']
+
+        # news that has already been sent is not sent again with the output of the next command
+        client.incoming.put_nowait({'type': 'websocket.receive', 'text': 'inventory'})
+        assert await client.lines() == ["You aren't carrying anything."]
+
+        # the other player still gets their news with their next command
+        await asyncio.to_thread(handlers.execute_command, sessions, other, {'input': 'south'})
+        assert await client.lines() == [f'{name} enters from the north.']
+        client.incoming.put_nowait({'type': 'websocket.receive', 'text': 'north'})
+        await client.lines()
+        _, output = await asyncio.to_thread(handlers.execute_command, sessions, other, {'input': 'inventory'})
+        assert output[0].endswith('leaves to the north.')
+
+        client.incoming.put_nowait({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(client.task, 5)
+        assert all(occupant.listener is None for occupants in game_factory.shared_world().occupants.values()
+                   for occupant in occupants)
+    try:
+        asyncio.run(main())
+    finally:
+        sessions.stop()
+        game_factory.shared_world.cache_clear()
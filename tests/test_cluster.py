@@ -0,0 +1,153 @@
+"""Tests for the cluster: routing requests to the workers that own their sessions, and surviving failures.
+
+These tests start real worker processes, each of which loads the test world.
+"""
+import asyncio
+import json
+
+import pytest
+
+import cluster
+from cluster import Cluster, WorkerError, shard_of, shard_session_id
+from handlers import BadRequest
+
+
+def run(test, workers: int = 2, monkeypatch=None) -> None:
+    """Run an async test with a cluster of workers that is started first and stopped afterwards. If monkeypatch is
+    given, the router serves HTTP requests with the cluster.
+    """
+    async def main() -> None:
+        instance = Cluster(workers)
+        if monkeypatch is not None:
+            monkeypatch.setattr(cluster, 'cluster', instance)
+        instance.start()
+        try:
+            await test(instance)
+        finally:
+            instance.stop()
+    asyncio.run(main())
+
+
+async def request(method: str, path: str, body=None, session_id: str | None = None) -> tuple[int, object]:
+    """Send an HTTP request to the router, and return the status and decoded body of its response."""
+    sent = []
+    messages = [{'type': 'http.request', 'body': b'' if body is None else json.dumps(body).encode()}]
+
+    async def receive() -> dict:
+        return messages.pop(0)
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    headers = [] if session_id is None else [(b'cookie', f'session_id={session_id}'.encode())]
+    await cluster.app({'type': 'http', 'method': method, 'path': path, 'headers': headers}, receive, send)
+    body = sent[1]['body']
+    return sent[0]['status'], json.loads(body) if dict(sent[0]['headers'])[b'content-type'] == b'application/json' \
+        else body.decode()
+
+
+def test_new_sessions_are_owned_by_the_worker_that_created_them() -> None:
+    for worker in range(3):
+        assert shard_of(shard_session_id(worker, 3), 3) == worker
+
+
+def test_shared_world_is_rejected_with_several_workers(monkeypatch) -> None:
+    monkeypatch.setattr(cluster, 'SHARED_WORLD', True)
+    with pytest.raises(ValueError):
+        Cluster(2)
+    Cluster(1)
+
+
+def test_cluster_is_created_when_the_server_starts_up(monkeypatch) -> None:
+    monkeypatch.setattr(cluster, 'SHARED_WORLD', True)
+    monkeypatch.setattr(cluster, 'WORKERS', 2)
+    assert cluster.cluster is None  # importing the module does not create it, or fail with these settings
+    sent = []
+
+    async def receive() -> dict:
+        return {'type': 'lifespan.startup'}
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    asyncio.run(cluster.app({'type': 'lifespan'}, receive, send))
+    assert sent == [{'type': 'lifespan.startup.failed', 'message': 'a shared world can only be served by one worker'}]
+    assert cluster.cluster is None
+
+
+def test_requests_are_routed_to_the_worker_that_owns_the_session(monkeypatch) -> None:
+    async def test(instance: Cluster) -> None:
+        status, _ = await request('GET', '/on_load')
+        assert status == 200
+        session_id, _ = await instance.call('on_load', None)
+        assert instance.owner(session_id) == shard_of(session_id, 2)
+
+        assert await request('POST', '/execute_command', {'input': 'north'}, session_id) == (
+            200, ['Secret Room', 'This is another room connected to the main room. There is a pendant lying on the '
+                                 'floor.'])
+        assert await request('POST', '/execute_batch', {'inputs': ['take pendant', 'inventory']}, session_id) == (
+            200, [['Picked up Ruby Pendant.'], ['Ruby Pendant']])
+        assert await request('POST', '/suggest', {'input': 'drop ru'}, session_id) == (200, ['drop ruby pendant'])
+
+        assert await instance.migrate(session_id, 1 - instance.owner(session_id))
+        assert await request('POST', '/execute_command', {'input': 'inventory'}, session_id) == (
+            200, ['Ruby Pendant'])
+    run(test, monkeypatch=monkeypatch)
+
+
+def test_failed_requests_are_answered_with_errors(monkeypatch) -> None:
+    async def test(instance: Cluster) -> None:
+        status, body = await request('POST', '/execute_command', {'command': 'north'})
+        assert status == 400 and 'BAD REQUEST' in body
+        assert (await request('GET', '/missing'))[0] == 404
+        with pytest.raises(BadRequest):
+            await instance.call('execute_batch', None, {'inputs': 'north'})
+
+        # a request that raises an exception in the worker, which carries on serving afterwards
+        with pytest.raises(WorkerError):
+            await instance.call('import', None)
+        assert (await request('GET', '/on_load'))[0] == 200
+    run(test, monkeypatch=monkeypatch)
+
+
+def test_requests_larger_than_a_pipe_buffer_are_sent(monkeypatch) -> None:
+    async def test(instance: Cluster) -> None:
+        session_id, _ = await instance.call('on_load', None)
+        inputs = ['inventory' + ' ' * 500] * 1000  # about 500KB, far more than a pipe holds at once
+        batch = asyncio.create_task(request('POST', '/execute_batch', {'inputs': inputs}, session_id))
+        other_session_id = shard_session_id(1 - instance.owner(session_id), 2)
+        assert (await request('GET', '/on_load', session_id=other_session_id))[0] == 200
+        assert await batch == (200, [["You aren't carrying anything."]] * 1000)
+    run(test, monkeypatch=monkeypatch)
+
+
+def test_metrics_of_every_worker_are_served(monkeypatch) -> None:
+    async def test(instance: Cluster) -> None:
+        status, body = await request('GET', '/metrics')
+        assert status == 200
+        assert 'game_active_sessions{worker="0"}' in body and 'game_active_sessions{worker="1"}' in body
+        assert body.count('# TYPE game_active_sessions gauge') == 1
+    run(test, monkeypatch=monkeypatch)
+
+
+def test_a_worker_that_stops_is_restarted(monkeypatch) -> None:
+    monkeypatch.setattr(cluster, 'RESTART_DELAY', 0.1)
+
+    async def test(instance: Cluster) -> None:
+        session_id, _ = await instance.call('on_load', None)
+        owner = instance.owner(session_id)
+        instance._processes[owner].kill()
+
+        with pytest.raises(ConnectionError):
+            for _ in range(100):  # until the router notices that the worker has stopped
+                await instance.call('on_load', session_id)
+                await asyncio.sleep(0.05)
+        assert (await request('GET', '/on_load', session_id=session_id))[0] == 503
+
+        for _ in range(200):
+            await asyncio.sleep(0.05)
+            if instance._requests[owner] is not None:
+                break
+        _, output = await instance.call('on_load', session_id)
+        assert output[0] == 'Test Room'
+    run(test, monkeypatch=monkeypatch)
@@ -0,0 +1,46 @@
+"""Tests for the procedural world generator."""
+import pytest
+
+from data.generator import generate_records, generate_world
+from data.validator import validate_records
+from entities.item import Container
+
+PARAMETERS = [{}, {'branching': 1, 'loops': 0.5}, {'branching': 5, 'nesting': 4, 'density': 3.0, 'containers': 0.6},
+              {'locked': 1.0, 'containers': 1.0, 'nesting': 3}]
+
+
+def test_same_arguments_generate_the_same_world() -> None:
+    assert list(generate_records(300, seed=7)) == list(generate_records(300, seed=7))
+    assert list(generate_records(300, seed=7)) != list(generate_records(300, seed=8))
+
+
+@pytest.mark.parametrize('parameters', PARAMETERS)
+def test_records_only_refer_to_records_before_them(parameters: dict) -> None:
+    rooms, items = [], set()
+    for record in generate_records(500, **parameters):
+        if record['type'] == 'room':
+            assert set(record['neighbours'].values()) <= set(rooms)
+            rooms.append(record['id'])
+        elif record['type'] == 'interaction':
+            assert record['room'] in rooms and record['item'] in items
+        elif record['type'] != 'start':
+            items.add(record['id'])
+        assert set(record.get('contents', ())) <= items
+        assert 'key' not in record or record['key'] in items
+    assert rooms == list(range(500))
+
+
+@pytest.mark.parametrize('parameters', PARAMETERS)
+def test_generated_worlds_can_be_completed(parameters: dict) -> None:
+    problems = validate_records(generate_records(2000, seed=3, **parameters))
+    # generated names repeat, so some items can't be told apart, but every room and lock can be reached and opened
+    assert [str(problem) for problem in problems if problem.check != 'keywords'] == []
+
+
+def test_generated_world_has_the_requested_shape() -> None:
+    world = generate_world(1000, seed=1, density=2.0, locked=0.5)
+    assert len(world.rooms) == 1000 and world.start.room_id == 0
+    assert 1500 < sum(len(room.contents) for room in world.rooms.values()) < 3500
+    locked_rooms = sum(room.locked for room in world.rooms.values())
+    locked_containers = sum(isinstance(item, Container) and item.locked for item in world.items.values())
+    assert 300 < locked_rooms < 700 and locked_containers > 0
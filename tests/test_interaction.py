@@ -0,0 +1,114 @@
+"""Tests for compiling interactions from data, and for running them."""
+import pytest
+
+from data.loader import WorldBuilder, load_world
+from engine.controller import Controller
+from engine.gameinteractor import GameInteractor
+from engine.parser import Parser
+from entities.ids import stable_id
+from entities.interaction import Interaction, compile_condition, compile_effect
+from entities.player import Player
+from entities.room import Room
+from entities.world import World
+
+from conftest import ROOT
+
+
+def play(world: World, commands: list[str]) -> tuple[Controller, list[list[str]]]:
+    """Play a new game in a world, and return the game and the output of each command."""
+    controller = Controller(GameInteractor(Player(world.start)), Parser(world.items.values()))
+    return controller, [controller.parse_input(command) for command in commands]
+
+
+def test_compiled_conditions_check_the_player() -> None:
+    player = Player(Room('Hall', 'A hall.', room_id=1))
+    condition = compile_condition({'all': [{'any': [{'has': 5}, {'visited': 1}]},
+                                           {'not': {'triggered': 7}}]})
+    assert not condition(player)
+    player.world.visited.add(1)
+    assert condition(player)
+    player.world.triggered.add(7)
+    assert not condition(player)
+
+    assert not compile_condition({'unlocked': 3})(player) and not compile_condition({'unlocked_room': 3})(player)
+    player.world.unlocked.add(3)
+    assert compile_condition({'unlocked': 3})(player) and not compile_condition({'unlocked_room': 3})(player)
+
+
+def test_conditions_and_effects_are_compiled_with_the_ids_of_the_engine() -> None:
+    player = Player(Room('Hall', 'A hall.', room_id=stable_id('hall')))
+    player.world.visit(player.location)
+    assert compile_condition({'visited': 'hall'}, stable_id)(player)
+
+    compile_effect({'unlock_room': 'vault'}, {}, {}, stable_id)(player)
+    assert player.world.unlocked_rooms == {stable_id('vault')}
+
+
+def test_invalid_conditions_and_effects_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        compile_condition({'has': 1, 'visited': 2})
+    with pytest.raises(ValueError):
+        compile_condition({'holding': 1})
+    with pytest.raises(ValueError):
+        compile_effect({'teleport': 1}, {}, {})
+
+
+def test_interaction_happens_once_unless_it_is_repeatable() -> None:
+    player = Player(Room('Hall', 'A hall.', room_id=1))
+    once = Interaction(1, key_id=9, message='Once.', effects=[compile_effect({'unlock': 4}, {}, {})])
+    again = Interaction(2, key_id=9, message='Again.', repeatable=True)
+
+    assert once.is_available(player) and once.execute_interaction(player) == 'Once.'
+    assert not once.is_available(player)
+    assert player.world.unlocked == {4} and player.world.triggered == {1}
+    for _ in range(2):
+        assert again.is_available(player) and again.execute_interaction(player) == 'Again.'
+
+
+def test_the_pendant_opens_the_vault() -> None:
+    world = load_world(ROOT / 'data' / 'test_world.jsonl')
+    _, output = play(world, ['use key', 'east', 'north', 'take pendant', 'use pendant', 'south', 'use pendant',
+                             'use pendant', 'east'])
+    assert output[0] == ['Nothing happens.']
+    assert output[1] == ['That way is locked.']
+    assert output[4] == ['Nothing happens.']  # the interaction only happens in the test room
+    assert output[6] == ['The ruby glows brightly, and a hidden door in the east wall grinds open.']
+    assert output[7] == ['Nothing happens.']  # and only once
+    assert output[8][0] == 'Vault'
+
+
+def make_world() -> World:
+    """Return a world where pulling the lever in the hall brings the gem, which starts in the tower, to the hall."""
+    builder = WorldBuilder()
+    builder.add_records([
+        {'type': 'item', 'id': 'lever', 'name': 'Lever', 'description': 'A lever.', 'portable': False},
+        {'type': 'item', 'id': 'gem', 'name': 'Gem', 'description': 'A gem.'},
+        {'type': 'room', 'id': 'hall', 'name': 'Hall', 'description': 'A hall.', 'contents': ['lever'],
+         'neighbours': {'north': 'tower'}},
+        {'type': 'room', 'id': 'tower', 'name': 'Tower', 'description': 'A tower.', 'contents': ['gem'],
+         'neighbours': {'south': 'hall'}},
+        {'type': 'interaction', 'id': 'pull', 'room': 'hall', 'item': 'lever', 'message': 'Click.',
+         'effects': [{'add_item': 'gem', 'room': 'hall'}], 'repeatable': True},
+    ])
+    return builder.finish()
+
+
+def test_placed_item_is_taken_from_wherever_it_is() -> None:
+    world = make_world()
+    hall, tower, gem = world.rooms[stable_id('hall')], world.rooms[stable_id('tower')], stable_id('gem')
+    controller, output = play(world, ['use lever'])
+    player = controller.interactor.player
+    assert output == [['Click.']]
+    assert player.world.contains(hall, gem) and not player.world.contains(tower, gem)
+
+    # from the player's inventory
+    controller.parse_input('take gem')
+    controller.parse_input('use lever')
+    assert player.world.contains(hall, gem) and not player.has_item(gem)
+
+    # from the room where the player dropped it
+    for command in ('take gem', 'north', 'drop gem', 'south', 'use lever'):
+        controller.parse_input(command)
+    assert player.world.contains(hall, gem) and not player.world.contains(tower, gem)
+    assert controller.parse_input('take gem') == ['Picked up Gem.']
+    assert controller.parse_input('inventory') == ['Gem']
@@ -0,0 +1,89 @@
+"""Tests for the index of the items within the player's reach, and for keeping it up to date as the player plays."""
+from data.loader import WorldBuilder
+from engine.gameinteractor import GameInteractor
+from engine.item_index import ItemIndex
+from entities.ids import stable_id
+from entities.player import Player
+from entities.world import World
+
+
+def make_world() -> World:
+    """Return a world of two rooms: a cellar with a crate that holds a box, and a locked safe, and a hall."""
+    builder = WorldBuilder()
+    builder.add_records([
+        {'type': 'item', 'id': 'brass key', 'name': 'Brass Key', 'description': 'A brass key.'},
+        {'type': 'item', 'id': 'iron key', 'name': 'Iron Key', 'description': 'An iron key.'},
+        {'type': 'item', 'id': 'ring', 'name': 'Gold Ring', 'description': 'A ring.'},
+        {'type': 'item', 'id': 'coin', 'name': 'Silver Coin', 'description': 'A coin.'},
+        {'type': 'container', 'id': 'box', 'name': 'Small Box', 'description': 'A box.', 'contents': ['ring']},
+        {'type': 'container', 'id': 'crate', 'name': 'Wooden Crate', 'description': 'A crate.', 'contents': ['box']},
+        {'type': 'container', 'id': 'safe', 'name': 'Safe', 'description': 'A safe.', 'locked': True,
+         'key': 'iron key', 'contents': ['coin']},
+        {'type': 'room', 'id': 'cellar', 'name': 'Cellar', 'description': 'A cellar.',
+         'contents': ['brass key', 'iron key', 'crate', 'safe'], 'neighbours': {'up': 'hall'}},
+        {'type': 'room', 'id': 'hall', 'name': 'Hall', 'description': 'A hall.', 'neighbours': {'down': 'cellar'}},
+        {'type': 'start', 'room': 'cellar'},
+    ])
+    return builder.finish()
+
+
+def names(items) -> set[str]:
+    return {item.name for item in items}
+
+
+def test_name_shared_by_several_items_refers_to_all_of_them() -> None:
+    world = make_world()
+    index = ItemIndex(Player(world.start).world)
+    index.add_contents(world.start)
+
+    assert names(index.find('key')) == {'Brass Key', 'Iron Key'}
+    assert names(index.find(' Iron KEY ')) == {'Iron Key'}
+    assert index.find('silver key') == []
+
+
+def test_items_in_nested_unlocked_containers_are_within_reach() -> None:
+    world = make_world()
+    index = ItemIndex(Player(world.start).world)
+    index.add_contents(world.start)
+
+    assert names(index.find('ring')) == {'Gold Ring'}
+    assert index.owner(stable_id('ring')) is world.items[stable_id('box')]
+    assert index.owner(stable_id('box')) is world.items[stable_id('crate')]
+    assert index.find('coin') == []  # the safe is locked
+
+
+def test_index_follows_the_player_as_they_play() -> None:
+    world = make_world()
+    interactor = GameInteractor(Player(world.start))
+    ring, brass_key, iron_key = stable_id('ring'), stable_id('brass key'), stable_id('iron key')
+
+    interactor.pickup_item(ring)
+    assert interactor.index.owner(ring) is None
+
+    interactor.pickup_item(iron_key)
+    interactor.unlock_container(stable_id('safe'), iron_key)
+    assert names(interactor.find_items('coin')) == {'Silver Coin'}
+
+    interactor.move_rooms('up')
+    assert interactor.find_items('coin') == [] and interactor.find_items('brass key') == []
+    assert names(interactor.find_items('ring')) == {'Gold Ring'}
+
+    interactor.drop_item(ring)
+    assert interactor.index.owner(ring) is interactor.player.location
+    interactor.move_rooms('down')
+    assert interactor.find_items('ring') == []
+    assert names(interactor.find_items('key')) == {'Brass Key', 'Iron Key'}
+    assert interactor.index.owner(brass_key) is world.start
+
+
+def test_vocabulary_follows_the_keywords_within_reach() -> None:
+    world = make_world()
+    interactor = GameInteractor(Player(world.start))
+    assert 'silver coin' not in interactor.item_names().complete('silver')
+
+    interactor.pickup_item(stable_id('iron key'))
+    interactor.unlock_container(stable_id('safe'), stable_id('iron key'))
+    assert 'silver coin' in interactor.item_names().complete('silver')
+
+    interactor.move_rooms('up')
+    assert interactor.item_names().complete('silver') == []
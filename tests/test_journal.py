@@ -0,0 +1,73 @@
+"""Tests for recording games in a journal, and restoring them from it."""
+import game_factory
+from engine.journal import Journal
+
+
+def play(controller, commands: list[str]) -> None:
+    for command in commands:
+        controller.parse_input(command)
+
+
+def state(controller) -> tuple[str, list[str], set[int]]:
+    """Return the player's location, the items they carry and the interactions they have triggered."""
+    player = controller.interactor.player
+    return (player.location.name, sorted(item.name for item in player.inventory.values()),
+            set(player.world.triggered))
+
+
+def test_restore_replays_the_recorded_events(tmp_path) -> None:
+    journal = Journal(tmp_path)
+    controller = game_factory.initialise_journaled('game', journal)
+    controller.announce_room()
+    play(controller, ['north', 'take pendant', 'south', 'use pendant', 'east', 'take coin'])
+
+    restored = game_factory.restore('game', journal)
+    assert state(restored) == state(controller)
+    assert state(restored)[:2] == ('Vault', ['Gold Coin', 'Ruby Pendant'])
+    journal.close()
+
+
+def test_restore_from_a_snapshot_and_the_events_after_it(tmp_path) -> None:
+    journal = Journal(tmp_path)
+    controller = game_factory.initialise_journaled('game', journal)
+    controller.interactor.journal.snapshot_every = 3
+    controller.announce_room()
+    play(controller, ['north', 'take pendant', 'south', 'use pendant', 'east'])
+    journal.flush()
+    assert (tmp_path / 'game.snapshot').exists()
+
+    snapshot, seq, events = journal.load('game')
+    assert snapshot is not None and all(event['seq'] > seq for event in events)
+    assert state(game_factory.restore('game', Journal(tmp_path))) == state(controller)
+    journal.close()
+
+
+def test_restore_after_a_restart_ignores_a_partly_written_event(tmp_path) -> None:
+    journal = Journal(tmp_path)
+    controller = game_factory.initialise_journaled('game', journal)
+    controller.announce_room()
+    play(controller, ['north', 'take pendant'])
+    journal.close()
+    with open(tmp_path / 'game.log', 'a', encoding='utf-8') as file:
+        file.write('{"seq": 99, "event": "mov')
+
+    assert state(game_factory.restore('game', Journal(tmp_path))) == state(controller)
+
+
+def test_closing_a_game_saves_a_snapshot(tmp_path) -> None:
+    journal = Journal(tmp_path)
+    controller = game_factory.initialise_journaled('game', journal)
+    controller.announce_room()
+    play(controller, ['north', 'take pendant'])
+    game_factory.close(controller)
+
+    snapshot, _, events = journal.load('game')
+    assert snapshot is not None and events == []
+    journal.close()
+
+
+def test_sessions_that_were_never_recorded_are_not_restored(tmp_path) -> None:
+    journal = Journal(tmp_path)
+    assert game_factory.restore('missing', journal) is None
+    assert game_factory.restore('../outside', journal) is None
+    journal.close()
@@ -0,0 +1,25 @@
+"""Tests for combining the metrics of several processes."""
+from engine.metrics import Metrics, combine
+
+
+def test_combine_labels_every_sample_with_its_process() -> None:
+    first, second = Metrics(), Metrics()
+    first.gauge('game_active_sessions', 'The number of sessions in memory.', lambda: 3)
+    second.gauge('game_active_sessions', 'The number of sessions in memory.', lambda: 5)
+
+    combined = combine({'0': first.render(), '1': second.render()}, 'worker')
+    lines = combined.splitlines()
+    assert lines.count('# TYPE game_active_sessions gauge') == 1
+    assert 'game_active_sessions{worker="0"} 3' in lines
+    assert 'game_active_sessions{worker="1"} 5' in lines
+
+
+def test_combine_keeps_the_samples_of_each_metric_together() -> None:
+    rendered = ('# HELP requests Requests.\n# TYPE requests counter\nrequests{route="/"} 1\nrequests{route="/x"} 2\n'
+                '# HELP up Up.\n# TYPE up gauge\nup 1\n')
+    combined = combine({'a': rendered, 'b': rendered}, 'process')
+    assert combined.splitlines() == [
+        '# HELP requests Requests.', '# TYPE requests counter',
+        'requests{process="a",route="/"} 1', 'requests{process="a",route="/x"} 2',
+        'requests{process="b",route="/"} 1', 'requests{process="b",route="/x"} 2',
+        '# HELP up Up.', '# TYPE up gauge', 'up{process="a"} 1', 'up{process="b"} 1']
@@ -0,0 +1,125 @@
+"""Tests for finding paths between rooms, and for the goto command that follows them."""
+from data.loader import WorldBuilder
+from engine.controller import Controller
+from engine.gameinteractor import GameInteractor
+from engine.navigation import NO_ROOM, NextHopTable, RoomGraph
+from engine.parser import Parser
+from entities.ids import stable_id
+from entities.player import Player
+from entities.world import World
+
+# the map, as each room and its exits. The gate is locked, and the only way into the vault is through it. The shed is
+# not connected to anything.
+#   hall - library         shed
+#    |        |
+#   yard    study
+#    |        |
+#    |      pond
+#    |        |
+#   gate --- garden
+#    |
+#   vault
+EXITS = {'hall': {'east': 'library', 'south': 'yard'},
+         'library': {'west': 'hall', 'south': 'study'},
+         'study': {'north': 'library', 'south': 'pond'},
+         'pond': {'north': 'study', 'south': 'garden'},
+         'yard': {'north': 'hall', 'south': 'gate'},
+         'gate': {'north': 'yard', 'east': 'garden', 'south': 'vault'},
+         'garden': {'north': 'pond', 'west': 'gate'},
+         'vault': {'north': 'gate'},
+         'shed': {}}
+
+
+def make_world() -> World:
+    builder = WorldBuilder()
+    builder.add_records([{'type': 'room', 'id': room, 'name': room.title(), 'description': f'The {room}.',
+                          'neighbours': exits, 'locked': room == 'gate'} for room, exits in EXITS.items()]
+                        + [{'type': 'start', 'room': 'hall'}])
+    return builder.finish()
+
+
+WORLD = make_world()
+GRAPH = RoomGraph(WORLD.rooms.values())
+
+
+def number(name: str) -> int:
+    return GRAPH.number(WORLD.rooms[stable_id(name)])
+
+
+def names(path: list[int] | None) -> list[str] | None:
+    return None if path is None else [GRAPH.rooms[room].name.lower() for room in path]
+
+
+def test_shortest_path_goes_through_unlocked_rooms() -> None:
+    assert names(GRAPH.shortest_path(number('hall'), number('garden'))) == ['hall', 'yard', 'gate', 'garden']
+    assert names(GRAPH.shortest_path(number('hall'), number('hall'))) == ['hall']
+    assert GRAPH.path_directions(GRAPH.shortest_path(number('hall'), number('vault'))) == ['south', 'south', 'south']
+
+
+def test_shortest_path_goes_around_locked_rooms() -> None:
+    blocked = GRAPH.blocked()
+    assert blocked == {number('gate')}
+    assert names(GRAPH.shortest_path(number('hall'), number('garden'), blocked)) == [
+        'hall', 'library', 'study', 'pond', 'garden']
+    assert GRAPH.shortest_path(number('hall'), number('vault'), blocked) is None
+    assert GRAPH.shortest_path(number('hall'), number('shed')) is None
+    # a path may start in a blocked room, as the player may be standing in it
+    assert names(GRAPH.shortest_path(number('gate'), number('vault'), blocked)) == ['gate', 'vault']
+
+
+def test_blocked_rooms_depend_on_what_the_player_has_unlocked() -> None:
+    player = Player(WORLD.start)
+    assert GRAPH.blocked(player.world) == {number('gate')}
+    player.world.unlock(WORLD.rooms[stable_id('gate')])
+    assert GRAPH.blocked(player.world) == set()
+
+
+def test_reachable_and_connected_components() -> None:
+    blocked = GRAPH.blocked()
+    assert GRAPH.reachable(number('hall')) == {number(room) for room in EXITS if room != 'shed'}
+    assert GRAPH.reachable(number('hall'), blocked) == {number(room) for room in
+                                                        ('hall', 'library', 'study', 'pond', 'yard', 'garden')}
+
+    groups = [{GRAPH.rooms[room].name.lower() for room in group} for group in GRAPH.connected_components(blocked)]
+    assert groups == [{'hall', 'library', 'study', 'pond', 'yard', 'garden'}, {'vault'}, {'shed'}] \
+        or groups == [{'hall', 'library', 'study', 'pond', 'yard', 'garden'}, {'shed'}, {'vault'}]
+
+
+def test_next_hop_table_matches_shortest_paths() -> None:
+    blocked = GRAPH.blocked()
+    destinations = [number('garden'), number('vault')]
+    table = NextHopTable(GRAPH, destinations, blocked)
+
+    for room in GRAPH.reachable(number('hall'), blocked):
+        path = table.path(room, number('garden'))
+        assert path is not None and len(path) == len(GRAPH.shortest_path(room, number('garden'), blocked))
+        assert table.next_hop(room, number('vault')) == NO_ROOM
+    assert table.next_hop(number('study'), number('garden')) == number('pond')
+    assert table.path(number('shed'), number('garden')) is None
+
+
+def test_goto_walks_to_visited_rooms_around_locked_rooms() -> None:
+    controller = Controller(GameInteractor(Player(WORLD.start), graph=GRAPH), Parser())
+    controller.announce_room()
+    assert controller.parse_input('go to garden') == ["You don't know the way there."]
+    for direction in ('east', 'south', 'south', 'south', 'north', 'north', 'north', 'west'):
+        controller.parse_input(direction)
+
+    assert controller.parse_input('go to garden') == ['You walk east, south, south, south.', 'Garden']
+    assert controller.parse_input('goto hall') == ['You walk north, north, north, west.', 'Hall']
+    assert controller.parse_input('goto hall') == ["You're already there."]
+    assert controller.parse_input('goto cellar') == ["You don't know the way there."]
+
+
+def test_goto_goes_through_a_room_once_it_is_unlocked() -> None:
+    player = Player(WORLD.start)
+    controller = Controller(GameInteractor(player, graph=GRAPH), Parser())
+    controller.announce_room()
+    player.world.visit(WORLD.rooms[stable_id('garden')])
+    player.world.visit(WORLD.rooms[stable_id('vault')])
+
+    assert controller.parse_input('goto vault') == ["You can't find a way there."]
+    assert controller.parse_input('goto garden')[0] == 'You walk east, south, south, south.'
+    player.world.unlock(WORLD.rooms[stable_id('gate')])
+    assert controller.parse_input('goto hall')[0] == 'You walk west, north, north.'
+    assert controller.parse_input('goto vault')[0] == 'You walk south, south, south.'
@@ -0,0 +1,90 @@
+"""Tests for parsing the player's input into the data of a command."""
+import pytest
+
+from engine.interactor_input_data import InteractorData
+from engine.parser import Parser
+from entities.item import Item, Container
+
+RUSTY_KEY = Item(1, 'Rusty Key', 'An old key.', True, True)
+BRASS_KEY = Item(2, 'Brass Key', 'A shiny key.', True, True)
+CHEST = Container(3, 'Old Chest', 'A chest.', True, locked=True, key_id=1)
+ROPE = Item(4, 'Rope', 'A coil of rope.', True, True, keywords=['rope', 'coil of rope'])
+ITEMS = [RUSTY_KEY, BRASS_KEY, CHEST, ROPE]
+PARSER = Parser(ITEMS)
+
+
+def find_items(keyword: str) -> list[Item]:
+    """Find the items that a keyword refers to, as if every item were within reach."""
+    return [item for item in ITEMS if keyword in item.keywords]
+
+
+def parse(text: str) -> InteractorData:
+    return PARSER.parse(text, find_items)
+
+
+@pytest.mark.parametrize('text, command, item_ids', [
+    ('take rope', 'take', [4]),
+    ('pick up rope', 'take', [4]),
+    ('Grab the rope', 'take', [4]),
+    ('put down rope', 'drop', [4]),
+    ('look at the old chest', 'inspect', [3]),
+    ('examine chest', 'inspect', [3]),
+    ('look around', 'room', []),
+    ('look at room', 'room', []),
+    ('inventory', 'inventory', []),
+])
+def test_verbs_and_verb_phrases(text: str, command: str, item_ids: list[int]) -> None:
+    assert parse(text) == InteractorData(command, item_ids, None)
+
+
+def test_articles_and_prepositions() -> None:
+    assert parse('take a coil of rope') == InteractorData('take', [4], None)  # 'of' is not a preposition
+    assert parse('take my rope from the chest') == InteractorData('take', [4], None)
+    assert parse('use the rusty key on the chest') == InteractorData('use', [1], None)
+    assert parse('take the') == InteractorData('invalid', [], None)
+
+
+def test_longest_item_name_that_a_phrase_ends_with() -> None:
+    assert parse('take the shiny rusty key') == InteractorData('take', [1], None)
+    assert parse('take the shiny key') == InteractorData('unknown_item', [1, 2], None)
+    assert parse('take brass') == InteractorData('unknown_item', [], None)
+
+
+def test_unlock_with_a_key() -> None:
+    assert parse('unlock the chest with the rusty key') == InteractorData('unlock', [3, 1], None)
+    assert parse('open chest using brass key') == InteractorData('unlock', [3, 2], None)
+    assert parse('unlock chest with rusty key from the shelf') == InteractorData('unlock', [3, 1], None)
+    for text in ('unlock chest', 'unlock chest on rusty key', 'unlock with rusty key', 'unlock chest with'):
+        assert parse(text) == InteractorData('invalid', [], None)
+
+
+def test_invalid_input_and_unknown_items() -> None:
+    for text in ('', '   ', 'dance', 'take', '!!!', 'go', 'pick'):
+        assert parse(text) == InteractorData('invalid', [], None)
+    assert parse('take key') == InteractorData('unknown_item', [1, 2], None)
+    assert parse('take the banana') == InteractorData('unknown_item', [], None)
+    assert parse('unlock banana with rusty key') == InteractorData('unknown_item', [], None)
+
+
+def test_moves() -> None:
+    assert parse('n') == InteractorData('move', [], 'north')
+    assert parse('go north') == InteractorData('move', [], 'north')
+    assert parse('walk u') == InteractorData('move', [], 'up')
+
+
+@pytest.mark.parametrize('text, room_name', [
+    ('go to the Great Hall', 'the great hall'),
+    ('goto   great   hall', 'great hall'),
+    ('go to, kitchen', 'kitchen'),
+    ('travel: vault', 'vault'),
+    ('goto:kitchen', 'kitchen'),
+    ('go-to the.great hall', 'the.great hall'),
+    ("walk to Bob's room!", "bob's room!"),
+])
+def test_goto_keeps_the_room_name_as_typed(text: str, room_name: str) -> None:
+    assert parse(text) == InteractorData('goto', [], None, room_name)
+
+
+def test_goto_needs_a_room_name() -> None:
+    assert parse('go to') == InteractorData('invalid', [], None)
+    assert parse('travel to ...') == InteractorData('invalid', [], None)
@@ -0,0 +1,84 @@
+"""Tests for splitting worlds into regions, and loading them one region at a time."""
+import pytest
+
+from data.loader import WorldBuilder, load_world
+from data.regions import RegionMap, save_regions
+from engine.controller import Controller
+from engine.gameinteractor import GameInteractor
+from engine.parser import Parser
+from entities.ids import stable_id
+from entities.player import Player
+
+from conftest import ROOT
+
+TEST_WORLD = ROOT / 'data' / 'test_world.jsonl'
+
+
+def play(regions: RegionMap, commands: list[str]) -> list[list[str]]:
+    """Play a new game in a world split into regions, and return the output of each command."""
+    parser = Parser()
+    regions.on_load = lambda region: parser.add_items(region.items.values())
+    controller = Controller(GameInteractor(Player(regions.start), regions), parser)
+    return [controller.parse_input(command) for command in commands]
+
+
+def test_round_trip_with_key_in_another_region(tmp_path) -> None:
+    world = load_world(TEST_WORLD)
+    # the vault is opened in the test room with the pendant, which is in the secret room
+    save_regions(world, tmp_path, lambda room: 'secret' if room.name == 'Secret Room' else 'main')
+    regions = RegionMap(tmp_path)
+
+    main = regions.region('main')
+    assert {room.name for room in main.rooms.values()} == {'Test Room', 'Vault'}
+    assert stable_id('Ruby Pendant') not in main.items
+    assert {room.name for room in regions.region('secret').rooms.values()} == {'Secret Room'}
+
+    output = play(RegionMap(tmp_path), ['north', 'take pendant', 'south', 'use pendant', 'east', 'take coin',
+                                        'inventory'])
+    assert output[3] == ['The ruby glows brightly, and a hidden door in the east wall grinds open.']
+    assert output[4][0] == 'Vault'
+    assert output[6] == ['Ruby Pendant', 'Gold Coin']
+
+
+def test_round_trip_keeps_every_room_and_item(tmp_path) -> None:
+    world = load_world(TEST_WORLD)
+    save_regions(world, tmp_path, lambda room: room.name)
+    regions = RegionMap(tmp_path)
+
+    rooms, items = {}, {}
+    for room in world.rooms.values():
+        region = regions.region(room.name)
+        rooms.update(region.rooms)
+        items.update(region.items)
+    assert rooms.keys() == world.rooms.keys()
+    assert items.keys() == world.items.keys()
+    assert regions.start.room_id == world.start.room_id
+
+
+def _world_with_effect(effect: dict):
+    builder = WorldBuilder()
+    builder.add_records([
+        {'type': 'item', 'id': 'lever', 'name': 'Lever', 'description': 'A lever.'},
+        {'type': 'item', 'id': 'gem', 'name': 'Gem', 'description': 'A gem.'},
+        {'type': 'room', 'id': 'hall', 'name': 'Hall', 'description': 'A hall.', 'contents': ['lever'],
+         'neighbours': {'north': 'tower'}},
+        {'type': 'room', 'id': 'tower', 'name': 'Tower', 'description': 'A tower.', 'neighbours': {'south': 'hall'}},
+        {'type': 'interaction', 'id': 'pull', 'room': 'hall', 'item': 'lever', 'message': 'Click.',
+         'effects': [effect]},
+    ])
+    return builder.finish()
+
+
+def test_item_in_no_room_is_saved_with_the_interaction_that_places_it(tmp_path) -> None:
+    world = _world_with_effect({'add_item': 'gem', 'room': 'hall'})
+    save_regions(world, tmp_path, lambda room: room.name)
+
+    regions = RegionMap(tmp_path)
+    assert stable_id('gem') in regions.region('Hall').items
+    assert stable_id('gem') not in regions.region('Tower').items
+
+
+def test_placing_an_item_in_another_region_is_rejected(tmp_path) -> None:
+    world = _world_with_effect({'add_item': 'gem', 'room': 'tower'})
+    with pytest.raises(ValueError, match='pull'):
+        save_regions(world, tmp_path, lambda room: room.name)
@@ -0,0 +1,40 @@
+"""Tests for rendering the contents of containers, and caching the renderings."""
+from engine.rendering import Renderer
+from entities.item import Item, Container
+from entities.world_state import WorldState
+
+COIN = Item(1, 'Gold Coin', 'A coin.', True, True)
+RING = Item(2, 'Silver Ring', 'A ring.', True, True)
+
+
+def make_chest(item_id: int = 3) -> Container:
+    chest = Container(item_id, 'Old Chest', 'A chest.', True, locked=False)
+    chest.insert_item(COIN)
+    return chest
+
+
+def test_rendering_is_reused_until_the_contents_change() -> None:
+    world, chest = WorldState(), make_chest()
+    renderer = Renderer(world)
+    lines = renderer.contents(chest)
+    assert lines == ('The old chest contains:', 'Gold Coin')
+    assert renderer.contents(chest) is lines
+
+    world.add_item(chest, RING)
+    assert renderer.contents(chest) == ('The old chest contains:', 'Gold Coin', 'Silver Ring')
+    world.pop_item(chest, COIN.item_id)
+    world.pop_item(chest, RING.item_id)
+    assert renderer.contents(chest) == ('It is empty.',)
+
+
+def test_least_recently_used_renderings_are_dropped() -> None:
+    world = WorldState()
+    renderer = Renderer(world, max_cached=2)
+    first, second, third = make_chest(3), make_chest(4), make_chest(5)
+    lines = renderer.contents(first)
+    renderer.contents(second)
+    assert renderer.contents(first) is lines
+    renderer.contents(third)
+
+    assert renderer.contents(first) is lines
+    assert len(renderer._contents) == 2 and second not in renderer._contents
@@ -0,0 +1,131 @@
+"""Tests for the pool of sessions kept in memory: eviction, closing, and the locks that serialise each session."""
+import threading
+import time
+
+from engine.session_manager import SessionManager
+
+
+class FakeController:
+    """Stands in for a Controller, which the pool only passes to its callbacks."""
+
+    def __init__(self, session_id: str) -> None:
+        self.session_id = session_id
+
+
+def make_sessions(**options) -> tuple[SessionManager, list[str]]:
+    """Return a pool of fake sessions of size 1, and the ids of the sessions it closes, in order."""
+    closed = []
+    sessions = SessionManager(FakeController, sizeof=lambda controller: 1,
+                              on_close=lambda controller: closed.append(controller.session_id), **options)
+    return sessions, closed
+
+
+def test_least_recently_used_session_is_evicted_when_full() -> None:
+    sessions, closed = make_sessions(max_sessions=2)
+    first, second = sessions.create(), sessions.create()
+    sessions.get(first.session_id)
+    third = sessions.create()
+
+    assert closed == [second.session_id]
+    assert second.closed and not first.closed
+    assert set(sessions._sessions) == {first.session_id, third.session_id}
+
+
+def test_sessions_over_the_memory_budget_are_evicted() -> None:
+    sessions, closed = make_sessions(max_memory=2)
+    first = sessions.create()
+    sessions.create()
+    sessions.create()
+
+    assert closed == [first.session_id]
+    assert len(sessions) == 2 and sessions.memory == 2
+
+
+def test_evict_idle_evicts_every_idle_session() -> None:
+    sessions, closed = make_sessions(idle_timeout=0.05)
+    ids = [sessions.create().session_id for _ in range(3)]
+    time.sleep(0.1)
+
+    assert sessions.evict_idle() == 3
+    assert sorted(closed) == sorted(ids)
+    assert len(sessions) == 0 and sessions.memory == 0
+
+
+def test_sweep_evicts_idle_sessions_in_the_background() -> None:
+    sessions, closed = make_sessions(idle_timeout=0.0)
+    sessions.create()
+    thread = sessions.sweep(0.01)
+    try:
+        deadline = time.monotonic() + 5
+        while len(sessions) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(sessions) == 0 and len(closed) == 1
+    finally:
+        sessions.stop()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_on_close_is_called_outside_the_lock_of_the_pool() -> None:
+    sessions = SessionManager(FakeController, max_sessions=1, sizeof=lambda controller: 1)
+    # a callback that uses the pool would deadlock if the pool's lock were held while it ran
+    sessions.on_close = lambda controller: sessions.remove('missing')
+    sessions.create()
+    thread = threading.Thread(target=sessions.create)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert len(sessions) == 1
+
+
+def test_session_is_closed_only_once_its_command_has_finished() -> None:
+    sessions, closed = make_sessions()
+    session_id = sessions.create().session_id
+    started, finish = threading.Event(), threading.Event()
+
+    def command() -> None:
+        with sessions.session(session_id):
+            started.set()
+            finish.wait(5)
+
+    thread = threading.Thread(target=command)
+    thread.start()
+    started.wait(5)
+    remover = threading.Thread(target=sessions.remove, args=(session_id,))
+    remover.start()
+    remover.join(timeout=0.1)
+    assert remover.is_alive() and closed == []
+
+    finish.set()
+    thread.join(timeout=5)
+    remover.join(timeout=5)
+    assert closed == [session_id]
+
+
+def test_session_closed_before_its_lock_is_taken_is_looked_up_again() -> None:
+    restored = []
+
+    def restore(session_id: str) -> FakeController:
+        restored.append(session_id)
+        return FakeController(session_id)
+
+    sessions, _ = make_sessions(restore=restore)
+    evicted = sessions.create()
+    sessions.remove(evicted.session_id)
+    # the first lookup returns the session as it was before it was evicted, as if it was evicted in between
+    lookups = iter([evicted])
+    get = sessions.get
+    sessions.get = lambda session_id: next(lookups, None) or get(session_id)
+
+    with sessions.session(evicted.session_id) as session:
+        assert session is not evicted and not session.closed
+        assert session.session_id == evicted.session_id
+    assert restored == [evicted.session_id]
+
+
+def test_session_that_cannot_be_restored_is_replaced_by_a_new_one() -> None:
+    sessions, _ = make_sessions(restore=lambda session_id: None)
+    with sessions.session('unknown') as session:
+        assert session.session_id != 'unknown'
+    assert session.session_id in sessions
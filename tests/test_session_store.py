@@ -0,0 +1,73 @@
+"""Tests for keeping sessions in an SQLite database, and serving them from it."""
+import game_factory
+from engine.session_store import SQLiteSessionStore, StoredSessions
+
+
+def snapshot(location: int, *inventory: int) -> dict:
+    return {'location': location, 'inventory': list(inventory), 'visited': [location], 'unlocked': [],
+            'unlocked_rooms': [], 'triggered': [], 'rooms': {}, 'containers': {}}
+
+
+def test_save_load_and_delete(tmp_path) -> None:
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+    assert store.load('game') is None
+    store.save('game', snapshot(1, 2))
+    store.save('game', snapshot(3, 2, 4))
+    assert store.load('game') == snapshot(3, 2, 4)
+
+    store.delete('game')
+    store.delete('missing')
+    assert store.load('game') is None
+    store.close()
+
+
+def test_saves_are_batched_until_they_are_flushed(tmp_path) -> None:
+    path = str(tmp_path / 'sessions.db')
+    store = SQLiteSessionStore(path, batch_size=3)
+    reader = SQLiteSessionStore(path)
+    store.save('first', snapshot(1))
+    store.save('second', snapshot(2))
+    # the snapshots are waiting, so only the store that saved them sees them
+    assert store.load('first') == snapshot(1)
+    assert reader.load('first') is None
+
+    store.save('third', snapshot(3))
+    assert reader.load('first') == snapshot(1) and reader.load('third') == snapshot(3)
+
+    store.save_many([('fourth', snapshot(4)), ('fifth', snapshot(5))])  # written at once, whatever the batch size
+    assert reader.load('fifth') == snapshot(5)
+    store.save('sixth', snapshot(6))
+    store.close()
+    assert reader.load('sixth') == snapshot(6)
+    reader.close()
+
+
+def test_deleting_a_waiting_snapshot_discards_it(tmp_path) -> None:
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.db'), batch_size=10)
+    store.save('game', snapshot(1))
+    store.delete('game')
+    store.flush()
+    assert store.load('game') is None
+    store.close()
+
+
+def test_stored_sessions_survive_a_new_store(tmp_path) -> None:
+    path = str(tmp_path / 'sessions.db')
+    sessions = StoredSessions(SQLiteSessionStore(path), game_factory.initialise, game_factory.from_snapshot,
+                              game_factory.snapshot)
+    with sessions.session(None) as session:
+        session.controller.announce_room()
+        session.controller.parse_input('north')
+        session.controller.parse_input('take pendant')
+        session_id = session.session_id
+
+    other = StoredSessions(SQLiteSessionStore(path), game_factory.initialise, game_factory.from_snapshot,
+                           game_factory.snapshot)
+    with other.session(session_id) as session:
+        assert session.session_id == session_id
+        assert session.controller.parse_input('inventory') == ['Ruby Pendant']
+        assert session.controller.parse_input('look') == ['This is another room connected to the main room. There '
+                                                          'is a pendant lying on the floor.']
+    with other.session('unknown') as session:
+        assert session.session_id != 'unknown'
+        assert session.controller.parse_input('inventory') == ["You aren't carrying anything."]
@@ -0,0 +1,96 @@
+"""Tests for the static validator of world data files."""
+import json
+
+from data.generator import generate_records
+from data.validator import validate_file, validate_records
+
+from conftest import ROOT
+
+
+def room(room_id: str, contents: list[str] = (), neighbours: dict[str, str] | None = None, **fields) -> dict:
+    return {'type': 'room', 'id': room_id, 'name': room_id.title(), 'description': f'The {room_id}.',
+            'contents': list(contents), 'neighbours': neighbours or {}, **fields}
+
+
+def item(item_id: str, name: str | None = None, **fields) -> dict:
+    return {'type': 'item', 'id': item_id, 'name': name or item_id.title(), 'description': 'An item.', **fields}
+
+
+def checks(records: list[dict]) -> list[tuple[str, str]]:
+    """Return the severity and check of each problem with a world, in order."""
+    return sorted((problem.severity, problem.check) for problem in validate_records(records))
+
+
+def test_test_world_has_no_problems() -> None:
+    assert validate_file(ROOT / 'data' / 'test_world.jsonl') == []
+
+
+def test_invalid_and_duplicate_records() -> None:
+    assert checks([room('hall'), {'type': 'statue'}, {'type': 'item', 'id': 'x'}]) == [
+        ('error', 'record'), ('error', 'record')]
+    assert checks([room('hall', ['key']), item('key'), item('key')]) == [('error', 'duplicate_id')]
+    assert checks([room('hall', neighbours={'sideways': 'hall'})]) == [('error', 'record')]
+
+
+def test_undefined_references() -> None:
+    assert checks([room('hall', ['ghost'])]) == [('error', 'reference')]
+    assert checks([room('hall', neighbours={'north': 'attic'})]) == [('error', 'reference')]
+    assert checks([room('hall'), {'type': 'start', 'room': 'attic'}]) == [('error', 'reference')]
+    assert checks([room('hall', ['box']), {'type': 'container', 'id': 'box', 'name': 'Box', 'description': 'A box.',
+                                           'locked': True, 'key': 'missing'}]) == [
+        ('error', 'reference'), ('error', 'solvability')]
+    assert checks([room('hall', ['key']), item('key'), room('den', ['key'], {'west': 'hall'})]) == [
+        ('error', 'reference')]
+
+
+def test_interactions_with_undefined_rooms_or_items() -> None:
+    interaction = {'type': 'interaction', 'id': 'wave', 'message': 'You wave.'}
+    problems = validate_records([room('hall', ['flag']), item('flag'),
+                                 {**interaction, 'room': 'attic', 'item': 'flag'},
+                                 {**interaction, 'id': 'shout', 'room': 'hall', 'item': 'horn'}])
+    assert sorted(problem.message for problem in problems) == [
+        "interaction 'wave' takes place in a room that is never defined",
+        "the item of interaction 'shout' is never defined"]
+    assert {(problem.severity, problem.check, problem.line) for problem in problems} == {
+        ('error', 'reference', 3), ('error', 'reference', 4)}
+
+
+def test_passages_that_clash() -> None:
+    # the attic leads south to both the hall and the den, so the den can't be reached from it
+    assert checks([room('hall', neighbours={'north': 'attic'}), room('attic'),
+                   room('den', neighbours={'north': 'attic'})]) == [
+        ('error', 'neighbours'), ('warning', 'reachability')]
+
+
+def test_unreachable_rooms_and_unopenable_locks() -> None:
+    assert checks([room('hall'), room('island')]) == [('warning', 'reachability')]
+    assert checks([room('hall', ['box']), {'type': 'container', 'id': 'box', 'name': 'Box',
+                                           'description': 'A box.', 'locked': True}]) == [
+        ('error', 'solvability'), ('error', 'solvability')]
+    # the key of the vault is inside the vault
+    assert checks([room('hall', neighbours={'east': 'vault'}), room('vault', ['key'], locked=True), item('key'),
+                   {'type': 'interaction', 'id': 'open', 'room': 'hall', 'item': 'key', 'message': 'Open.',
+                    'effects': [{'unlock_room': 'vault'}]}]) == [('error', 'solvability')]
+
+
+def test_items_that_cannot_be_named() -> None:
+    assert checks([room('hall', ['a', 'b']), item('a', 'Key'), item('b', 'Key')]) == [
+        ('warning', 'keywords'), ('warning', 'keywords')]
+    assert checks([room('hall', ['a', 'b']), item('a', 'Rusty Key'), item('b', 'Iron Key')]) == []
+
+
+def test_chunks_checked_in_parallel_find_the_same_problems(tmp_path) -> None:
+    records = list(generate_records(3000, seed=5))
+    # problems that are only found once the chunks are merged
+    records.insert(0, item('lantern'))
+    records.append(item('lantern'))
+    records.append(room('island'))
+    path = tmp_path / 'world.jsonl'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records), encoding='utf-8')
+    assert path.stat().st_size > 1 << 18  # large enough to be split into chunks
+
+    expected = sorted(str(problem) for problem in validate_records(records))
+    assert expected == sorted(str(problem) for problem in validate_file(path, processes=1))
+    assert expected == sorted(str(problem) for problem in validate_file(path, processes=2))
+    assert any('reachability' in problem for problem in expected)
+    assert any('duplicate_id' in problem for problem in expected)
@@ -0,0 +1,82 @@
+"""Tests for building world images, and rebuilding them when they are out of date."""
+import shutil
+
+import pytest
+
+from data import world_image
+from data.loader import load_world
+from data.world_image import WorldImageError, file_hash, image_path, load_image, load_world_fast, save_image
+from engine.controller import Controller
+from engine.gameinteractor import GameInteractor
+from engine.parser import Parser
+from entities.ids import stable_id
+from entities.player import Player
+
+from conftest import ROOT
+
+TEST_WORLD = ROOT / 'data' / 'test_world.jsonl'
+
+
+@pytest.fixture
+def world_file(tmp_path):
+    """A copy of the test world, which the tests can change."""
+    path = tmp_path / 'world.jsonl'
+    shutil.copy(TEST_WORLD, path)
+    return path
+
+
+def compile_world(world) -> dict:
+    return {'parser': Parser(world.items.values())}
+
+
+def test_image_is_built_and_then_loaded_instead_of_the_world_file(world_file, monkeypatch) -> None:
+    world, compiled = load_world_fast(world_file, compile_world=compile_world, build=True)
+    assert image_path(world_file).exists()
+
+    monkeypatch.setattr(world_image, 'load_world', lambda path: pytest.fail('the world file was loaded'))
+    loaded, loaded_compiled = load_world_fast(world_file, compile_world=compile_world, build=True)
+    assert loaded.rooms.keys() == world.rooms.keys() and loaded.items.keys() == world.items.keys()
+    assert loaded.start.room_id == world.start.room_id
+    assert isinstance(loaded_compiled['parser'], Parser)
+
+
+def test_image_is_rebuilt_when_the_world_file_changes(world_file) -> None:
+    load_world_fast(world_file, build=True)
+    with open(world_file, 'a', encoding='utf-8') as file:
+        file.write('{"type": "item", "id": "Lamp", "name": "Lamp", "description": "A brass lamp."}\n')
+
+    world, _ = load_world_fast(world_file, build=True)
+    assert stable_id('Lamp') in world.items
+    rebuilt, _ = load_image(image_path(world_file), file_hash(world_file))
+    assert stable_id('Lamp') in rebuilt.items
+
+
+def test_stale_image_is_not_loaded(world_file) -> None:
+    save_image(load_world(world_file), image_path(world_file), 'another hash')
+    with pytest.raises(WorldImageError):
+        load_image(image_path(world_file), file_hash(world_file))
+
+
+def test_corrupt_image_is_replaced(world_file) -> None:
+    image_path(world_file).write_bytes(b'not a world image')
+
+    world, _ = load_world_fast(world_file, build=True)
+    assert len(world.rooms) == 3
+    load_image(image_path(world_file), file_hash(world_file))
+
+
+def test_interactions_work_in_a_loaded_image(world_file) -> None:
+    load_world_fast(world_file, compile_world=compile_world, build=True)
+    world, compiled = load_world_fast(world_file, compile_world=compile_world)
+    controller = Controller(GameInteractor(Player(world.start)), compiled['parser'])
+    for command in ['north', 'take pendant', 'south']:
+        controller.parse_input(command)
+    assert controller.parse_input('use pendant') == [
+        'The ruby glows brightly, and a hidden door in the east wall grinds open.']
+
+
+def test_only_the_finished_image_is_left_behind(world_file) -> None:
+    world = load_world(world_file)
+    for _ in range(3):
+        save_image(world, image_path(world_file), file_hash(world_file))
+    assert sorted(path.name for path in world_file.parent.iterdir()) == ['world.jsonl', 'world.jsonl.image']
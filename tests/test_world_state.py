@@ -0,0 +1,62 @@
+"""Tests for the changes that each player makes to a world template that they share."""
+from data.loader import load_world
+from engine.controller import Controller
+from engine.gameinteractor import GameInteractor
+from engine.parser import Parser
+from entities.ids import stable_id
+from entities.player import Player
+from entities.world_state import WorldState
+
+from conftest import ROOT
+
+WORLD = load_world(ROOT / 'data' / 'test_world.jsonl')
+PARSER = Parser(WORLD.items.values())
+
+
+def new_game() -> Controller:
+    """Return a new game in the test world, which every game shares."""
+    return Controller(GameInteractor(Player(WORLD.start)), PARSER)
+
+
+def test_sessions_do_not_see_each_others_changes() -> None:
+    first, second = new_game(), new_game()
+    unlocks = ['The old chest unlocks.', 'The old chest contains:', 'Sword']
+    assert first.parse_input('take key') == ['Picked up Rusty Key.']
+    assert first.parse_input('unlock chest with key') == unlocks
+    assert first.parse_input('take sword') == ['Picked up Sword.']
+    assert first.parse_input('north')[0] == 'Secret Room'
+    assert first.parse_input('drop key') == ['Dropped Rusty Key.']
+
+    # the second player finds the world as the template left it
+    assert second.parse_input('inspect chest')[1] == 'It is locked.'
+    assert second.parse_input('north')[0] == 'Secret Room'
+    assert second.parse_input('take key') == ["I can't find that item."]
+    assert second.parse_input('south')[0] == 'Test Room'
+    assert second.parse_input('take key') == ['Picked up Rusty Key.']
+    assert second.parse_input('unlock chest with key') == unlocks
+
+    assert first.parse_input('inventory') == ['Sword']
+    assert first.parse_input('take key') == ['Picked up Rusty Key.']
+
+def test_changes_are_recorded_in_the_state_and_not_in_the_template() -> None:
+    chest, key = WORLD.items[stable_id('chest1')], WORLD.items[stable_id('Key1')]
+    template = (dict(WORLD.start.contents), dict(chest.contents))
+    game = new_game()
+    game.parse_input('take key')
+    game.parse_input('unlock chest with key')
+    game.parse_input('take sword')
+
+    assert (dict(WORLD.start.contents), dict(chest.contents)) == template and chest.locked
+    world = game.interactor.player.world
+    assert key.item_id not in world.contents(WORLD.start)
+    assert len(world.contents(chest)) == 0 and not world.is_locked(chest)
+
+
+def test_putting_an_item_back_leaves_no_change() -> None:
+    world = WorldState()
+    key = world.pop_item(WORLD.start, stable_id('Key1'))
+    assert world.revision_of(WORLD.start) != 0
+    world.add_item(WORLD.start, key)
+
+    assert world.room_deltas == {} and world.revision_of(WORLD.start) == 0
+    assert world.contents(WORLD.start) is WORLD.start.contents